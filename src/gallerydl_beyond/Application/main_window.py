@@ -6,6 +6,8 @@ from PyQt6.QtGui import QKeyEvent
 from PyQt6.QtWidgets import QHBoxLayout, QMainWindow, QPushButton, QTabWidget, QVBoxLayout, QWidget
 
 from gallerydl_beyond.common import DEFAULT_DB_FILENAME, DatabaseManager, SettingsKeys
+from gallerydl_beyond.common.maintenance_scheduler import MaintenanceScheduler
+from gallerydl_beyond.common.status_writer import StatusWriter
 from gallerydl_beyond.components.history_tab_widget import HistoryTabWidget
 from gallerydl_beyond.components.main_tab_widget import DownloadsTabWidget
 from gallerydl_beyond.dialogs.database_dialog import DatabaseDialog
@@ -30,11 +32,20 @@ class MainWindow(QMainWindow):
         self.db_manager.ensure_database()
 
         # Reset any URLs left in IN_PROGRESS state from a previous session
-        reset_count = self.db_manager.reset_in_progress_to_stopped()
+        reset_count = self.db_manager.reset_in_progress_to_stopped(startup=True)
         if reset_count > 0:
             logging.getLogger(__name__).info(f"Reset {reset_count} interrupted download(s) to stopped")
 
+        # Group-commits worker status changes; closed (and so flushed) in closeEvent.
+        self.status_writer = StatusWriter(self.db_manager)
+
         self.settings = QSettings("ZCode", "GalleryDLBeyond")
+        if self.settings.value(SettingsKeys.PROFILE_QUERIES, False, type=bool):
+            self.db_manager.enable_profiling(
+                slow_statement_ms=float(
+                    self.settings.value(SettingsKeys.SLOW_STATEMENT_MS, DatabaseManager.SLOW_STATEMENT_MS)
+                )
+            )
         self.gallerydl_manager = GalleryDLManager(self.settings)
         self.config_manager = ConfigManager()
         self.config_path = None
@@ -42,6 +53,19 @@ class MainWindow(QMainWindow):
         self.gallerydl_cmd = None
         self._startup_worker: StartupWorker | None = None
 
+        # WAL checkpoints, statistics and space reclaim while nothing is downloading.
+        self.maintenance = MaintenanceScheduler(
+            self.db_manager,
+            is_idle=self._is_idle,
+            attempt_retention_days=int(
+                self.settings.value(SettingsKeys.ATTEMPT_RETENTION_DAYS, DatabaseManager.ATTEMPT_RETENTION_DAYS)
+            ),
+            attempts_per_url=int(self.settings.value(SettingsKeys.ATTEMPTS_PER_URL, DatabaseManager.ATTEMPTS_PER_URL)),
+            archive_after_days=int(
+                self.settings.value(SettingsKeys.ARCHIVE_AFTER_DAYS, DatabaseManager.ARCHIVE_AFTER_DAYS)
+            ),
+        )
+
         geometry = self.settings.value(SettingsKeys.WINDOW_GEOMETRY)
         if geometry is not None:
             self.restoreGeometry(geometry)
@@ -130,6 +154,7 @@ class MainWindow(QMainWindow):
             gallerydl_cmd=self.gallerydl_cmd,
             config_path=self.config_path,
             max_workers=max_workers,
+            status_writer=self.status_writer,
         )
         self._wire_download_manager(self.download_manager)
 
@@ -243,6 +268,11 @@ class MainWindow(QMainWindow):
             self.downloads_tab.append_log_error("URL add failed")
             self.downloads_tab.append_log_line(str(e))
 
+    def _is_idle(self) -> bool:
+        """True while no downloads are running (called from the maintenance thread)."""
+        manager = self.download_manager
+        return manager is None or not manager.is_running
+
     def _try_auto_start(self) -> None:
         """Try to start downloading newly added URLs if the manager is running."""
         if self.download_manager and self.download_manager.is_running:
@@ -259,6 +289,10 @@ class MainWindow(QMainWindow):
             for worker in list(self.download_manager._workers.values()):
                 worker.wait(5000)  # Wait up to 5 seconds per worker
 
+        # Commit the workers' final status changes before the database goes away.
+        self.maintenance.close()
+        self.status_writer.close()
+        self.db_manager.close()
         event.accept()
 
     def start_up(self):
@@ -344,12 +378,13 @@ class MainWindow(QMainWindow):
     def _on_worker_started(self, worker_id: int, url: str) -> None:
         self.downloads_tab.set_active(worker_id, url)
         self.downloads_tab.append_log_line(f"[{worker_id}] Starting: {url}")
-        self.history_tab.refresh(preserve_page=True)
+        # Status changes never change which rows match the History filters.
+        self.history_tab.refresh(preserve_page=True, recount=False)
 
     def _on_worker_done(self, worker_id: int, message: str) -> None:
         self.downloads_tab.clear_active(worker_id)
         self.downloads_tab.append_log_line(f"[{worker_id}] {message}")
-        self.history_tab.refresh(preserve_page=True)
+        self.history_tab.refresh(preserve_page=True, recount=False)
 
     def _history_check_new(self, url: str) -> None:
         updated = self.db_manager.requeue_existing_url(url, check_new_only=True, force_redownload=False)
@@ -1,11 +1,23 @@
 from gallerydl_beyond.common.constants import DEFAULT_DB_FILENAME, SettingsKeys, UrlStatus
-from gallerydl_beyond.common.database_manager import DatabaseManager, TagRow, UrlRow
+from gallerydl_beyond.common.database_manager import (
+    Attempt,
+    AttemptRow,
+    DatabaseManager,
+    StatusTransition,
+    TagFilter,
+    TagRow,
+    UrlRow,
+)
 
 
 __all__ = [
     "DEFAULT_DB_FILENAME",
+    "Attempt",
+    "AttemptRow",
     "DatabaseManager",
     "SettingsKeys",
+    "StatusTransition",
+    "TagFilter",
     "TagRow",
     "UrlRow",
     "UrlStatus",
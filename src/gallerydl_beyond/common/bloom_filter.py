@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+
+
+_MASK_64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    """Set of 64-bit integer keys that can answer "definitely absent" without storage.
+
+    Keys must already be well-mixed hashes (such as `url_normalizer.url_key()`);
+    the bit positions are derived from the key itself by double hashing. Holding
+    `capacity` keys, membership tests report false positives at roughly
+    `error_rate`; past that the rate climbs, so callers should rebuild larger.
+    Keys cannot be removed.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if not 0.0 < error_rate < 1.0:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = max(1, int(capacity))
+        self.error_rate = float(error_rate)
+        self.num_bits = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        # Keys that set at least one new bit: the distinct keys added, less the few
+        # that were already false positives.
+        self.count = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the bit array."""
+        return len(self._bits)
+
+    def _positions(self, key: int) -> Iterable[int]:
+        key &= _MASK_64
+        h1 = key & 0xFFFFFFFF
+        h2 = (key >> 32) | 1
+        m = self.num_bits
+        return ((h1 + i * h2) % m for i in range(self.num_hashes))
+
+    def add(self, key: int) -> bool:
+        """Add `key`; returns True if it was not (apparently) present before."""
+        bits = self._bits
+        added = False
+        for pos in self._positions(key):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def update(self, keys: Iterable[int]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: int) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
@@ -18,6 +18,14 @@ class SettingsKeys:
     GALLERYDL_CUSTOM_PATH = "gallerydl/customPath"  # str | None
     GALLERYDL_EXTERNAL_INTERP = "gallerydl/externalInterp"  # str | None — path to external Python interpreter
     HISTORY_PAGE_SIZE = "history/pageSize"  # int, default: 100
+    # Bounds on the per-run download history; 0 turns a limit off.
+    ATTEMPT_RETENTION_DAYS = "history/attemptRetentionDays"  # int, default: 90
+    ATTEMPTS_PER_URL = "history/attemptsPerUrl"  # int, default: 20
+    # Days after which finished URLs move to the archive tier; 0 keeps them in the queue table.
+    ARCHIVE_AFTER_DAYS = "history/archiveAfterDays"  # int, default: 30
+    # Opt-in DatabaseManager profiling: per-method latencies and a slow-statement log.
+    PROFILE_QUERIES = "database/profileQueries"  # bool, default: False
+    SLOW_STATEMENT_MS = "database/slowStatementMs"  # float, default: 50
     # Window geometry/state — saved on close, restored on launch. Bare-string
     # keys "geometry"/"windowState" are kept for back-compat with installs
     # that already wrote them to QSettings, so the values round-trip across
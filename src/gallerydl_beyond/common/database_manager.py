@@ -1,15 +1,133 @@
 from __future__ import annotations
 
+import contextlib
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import socket
 import sqlite3
-from contextlib import contextmanager
-from dataclasses import dataclass
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable
 
 from PyQt6.QtCore import QMutex
 
+from gallerydl_beyond.common.bloom_filter import BloomFilter
 from gallerydl_beyond.common.constants import DEFAULT_DB_FILENAME, UrlStatus
+from gallerydl_beyond.common.query_profiler import QueryProfiler
+from gallerydl_beyond.common.url_normalizer import url_key
+
+
+logger = logging.getLogger(__name__)
+
+# UPDATE ... RETURNING needs SQLite 3.35+; older builds fall back to SELECT + UPDATE.
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# The trigram tokenizer indexes 3-character windows, so shorter search terms
+# can't use the FTS index and fall back to LIKE.
+_FTS_MIN_TERM_LENGTH = 3
+
+# Column list matching `_url_row()`.
+_URL_COLUMNS = (
+    "id, url, status, force_redownload, check_new_only, download_count, "
+    "date_added, date_processed, last_error, skipped_count, priority"
+)
+
+# `urls` DDL, formatted with the table name (the v2 rebuild creates it under another
+# name first). Dates are Unix seconds (UTC); UrlRow exposes them as ISO 8601 strings.
+_URLS_TABLE_SQL = """
+CREATE TABLE {table} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    status INTEGER NOT NULL DEFAULT 0,
+    force_redownload INTEGER NOT NULL DEFAULT 0,
+    check_new_only INTEGER NOT NULL DEFAULT 0,
+    download_count INTEGER NOT NULL DEFAULT 0,
+    date_added INTEGER NOT NULL,
+    date_processed INTEGER,
+    last_error TEXT,
+    skipped_count INTEGER NOT NULL DEFAULT 0,
+    url_key INTEGER,
+    priority INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Columns of the `all_urls` view: `_URL_COLUMNS`, then url_key.
+_ALL_URLS_COLUMNS = _URL_COLUMNS + ", url_key"
+
+# Fields written by export_queue() / read by import_queue(), in file column order.
+# The row id is left out: it is local to each database.
+_EXPORT_FIELDS = (
+    "url",
+    "status",
+    "force_redownload",
+    "check_new_only",
+    "download_count",
+    "date_added",
+    "date_processed",
+    "last_error",
+    "skipped_count",
+    "priority",
+    "tags",
+)
+_EXPORT_FORMATS = {".jsonl": "jsonl", ".csv": "csv"}
+
+
+def queue_file_format(file_path: Path) -> tuple[str, bool] | None:
+    """Return (format, gzipped) for a queue export path, or None if it is not one.
+
+    Recognized suffixes are .jsonl and .csv, each optionally followed by .gz.
+    """
+    suffixes = [s.lower() for s in file_path.suffixes[-2:]]
+    gzipped = bool(suffixes) and suffixes[-1] == ".gz"
+    if gzipped:
+        suffixes.pop()
+    fmt = _EXPORT_FORMATS.get(suffixes[-1]) if suffixes else None
+    return (fmt, gzipped) if fmt else None
+
+
+def _to_epoch(value: str | int | None) -> int | None:
+    """Convert an ISO 8601 timestamp (naive means UTC) to epoch seconds.
+
+    Numbers (and digit strings) are taken as epoch seconds already; None, empty
+    or unparsable values give None.
+    """
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text)
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def _from_epoch(value: int | str | None) -> str | None:
+    """Convert epoch seconds to the UTC ISO 8601 string UrlRow exposes."""
+    if value is None or isinstance(value, str):
+        return value
+    return datetime.fromtimestamp(int(value), timezone.utc).isoformat()
+
+
+def _now_epoch() -> int:
+    return int(datetime.now(timezone.utc).timestamp())
 
 
 @dataclass(frozen=True)
@@ -32,48 +150,683 @@ class UrlRow:
     last_error: str | None
     skipped_count: int = 0
     tags: tuple[str, ...] = ()
+    # Claimed before lower priorities; ties go in id (queue) order.
+    priority: int = 0
+
+
+@dataclass(frozen=True)
+class TagFilter:
+    """Tag conditions for count_urls()/list_urls().
+
+    A URL matches if it has every tag in `all_of`, at least one tag in `any_of`
+    (when given) and no tag in `none_of`. Empty groups don't restrict.
+    """
+
+    all_of: tuple[int, ...] = ()
+    any_of: tuple[int, ...] = ()
+    none_of: tuple[int, ...] = ()
+
+    def __post_init__(self):
+        # Accept any iterable of ids; store sorted unique tuples so equal filters compare equal.
+        for name in ("all_of", "any_of", "none_of"):
+            object.__setattr__(self, name, tuple(sorted({int(tag_id) for tag_id in getattr(self, name)})))
+
+    def __bool__(self) -> bool:
+        return bool(self.all_of or self.any_of or self.none_of)
+
+
+@dataclass(frozen=True)
+class Attempt:
+    """Timings of one download run, recorded with the status transition that ends it.
+
+    Times are epoch seconds (time.time()). `first_output_at` is None if gallery-dl
+    printed nothing; `exit_code` is None if the process never started or exited.
+    """
+
+    claimed_at: float
+    started_at: float
+    finished_at: float
+    first_output_at: float | None = None
+    exit_code: int | None = None
+    # Output lines that matched a file failure pattern.
+    failure_lines: int = 0
+
+
+@dataclass(frozen=True)
+class AttemptRow:
+    """A stored Attempt, with the URL it ran and the status it ended in."""
+
+    id: int
+    url_id: int
+    status: int
+    claimed_at: float
+    started_at: float
+    finished_at: float
+    first_output_at: float | None
+    exit_code: int | None
+    failure_lines: int
+
+    @property
+    def duration(self) -> float:
+        """Seconds from process start to exit."""
+        return self.finished_at - self.started_at
+
+
+@dataclass(frozen=True)
+class StatusTransition:
+    """One worker status change, applied by DatabaseManager.apply_status_transitions().
+
+    Build these with the named constructors, which mirror the `mark_*` methods.
+    """
+
+    url_id: int
+    status: int
+    last_error: str | None = None
+    # Set for completed transitions (epoch seconds): bumps download_count and sets date_processed.
+    date_processed: int | None = None
+    skipped_count: int | None = None
+    # The run that ended in this status; stored in `attempts` in the same transaction.
+    attempt: Attempt | None = None
+
+    @classmethod
+    def completed(cls, url_id: int, *, attempt: Attempt | None = None) -> StatusTransition:
+        return cls(int(url_id), UrlStatus.COMPLETED, date_processed=_now_epoch(), attempt=attempt)
+
+    @classmethod
+    def completed_partial(
+        cls, url_id: int, skipped_count: int, errors: str | None = None, *, attempt: Attempt | None = None
+    ) -> StatusTransition:
+        return cls(
+            int(url_id),
+            UrlStatus.COMPLETED_PARTIAL,
+            last_error=errors,
+            date_processed=_now_epoch(),
+            skipped_count=int(skipped_count),
+            attempt=attempt,
+        )
+
+    @classmethod
+    def failed(cls, url_id: int, error: str, *, attempt: Attempt | None = None) -> StatusTransition:
+        return cls(int(url_id), UrlStatus.FAILED, last_error=error, attempt=attempt)
+
+    @classmethod
+    def pending(cls, url_id: int, *, attempt: Attempt | None = None) -> StatusTransition:
+        return cls(int(url_id), UrlStatus.PENDING, attempt=attempt)
+
+    @classmethod
+    def stopped(cls, url_id: int, *, attempt: Attempt | None = None) -> StatusTransition:
+        return cls(int(url_id), UrlStatus.STOPPED, last_error="Stopped by user", attempt=attempt)
+
+    @classmethod
+    def skipped(cls, url_id: int, *, attempt: Attempt | None = None) -> StatusTransition:
+        return cls(int(url_id), UrlStatus.SKIPPED, last_error="Skipped by user", attempt=attempt)
+
+
+def _caller_name() -> str:
+    """Name of the method that entered `_read()`/`_write()`, for the profiler.
+
+    That is the first frame outside contextlib and the private helpers of this
+    module: a public DatabaseManager method, or the caller's own function when
+    code outside this module opens a transaction itself. Functions nested in a
+    method count as that method.
+    """
+    frame = sys._getframe(1)
+    while frame.f_back is not None and (
+        frame.f_code.co_filename == contextlib.__file__
+        or (frame.f_code.co_filename == __file__ and frame.f_code.co_name.startswith("_"))
+    ):
+        frame = frame.f_back
+    return frame.f_code.co_qualname.removeprefix("DatabaseManager.").partition(".<locals>")[0]
+
+
+def _to_ms(seconds: float | None) -> int | None:
+    return None if seconds is None else round(seconds * 1000)
+
+
+def _from_ms(ms: int | None) -> float | None:
+    return None if ms is None else ms / 1000
+
+
+def _url_row(r: tuple, tags: tuple[str, ...] = ()) -> UrlRow:
+    """Build a UrlRow from a row selected with `_URL_COLUMNS`; dates become ISO strings."""
+    return UrlRow(
+        id=int(r[0]),
+        url=str(r[1]),
+        status=int(r[2]),
+        force_redownload=int(r[3]),
+        check_new_only=int(r[4]),
+        download_count=int(r[5]),
+        date_added=str(_from_epoch(r[6])),
+        date_processed=_from_epoch(r[7]),
+        last_error=r[8],
+        skipped_count=int(r[9]) if r[9] is not None else 0,
+        tags=tags,
+        priority=int(r[10]),
+    )
+
+
+class _Cancelled(Exception):
+    """Raised inside export_queue()/backup() when the progress callback asks to stop."""
+
+
+class _UrlRowCache:
+    """Bounded LRU of UrlRow by id, with a secondary index by lookup URL.
+
+    Rows are cached without tags. Only rows that exist are cached, so inserts
+    never need to invalidate. A read that raced a write must not re-insert the
+    row it read before that write: callers take `generation` before reading and
+    put() drops the row if any write has started since.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(0, int(capacity))
+        self._lock = threading.Lock()
+        self._rows: OrderedDict[int, UrlRow] = OrderedDict()
+        self._ids_by_url: dict[str, int] = {}
+        self._urls_by_id: dict[int, list[str]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, url_id: int) -> UrlRow | None:
+        with self._lock:
+            row = self._rows.get(url_id)
+            if row is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(url_id)
+            self.hits += 1
+            return row
+
+    def get_by_url(self, url: str) -> UrlRow | None:
+        with self._lock:
+            url_id = self._ids_by_url.get(url)
+            if url_id is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(url_id)
+            self.hits += 1
+            return self._rows[url_id]
+
+    def put(self, row: UrlRow, generation: int, lookup_url: str | None = None) -> None:
+        """Cache `row`, also reachable by `lookup_url`, unless a write started after `generation`."""
+        if not self.capacity:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._rows[row.id] = row
+            self._rows.move_to_end(row.id)
+            urls = self._urls_by_id.setdefault(row.id, [])
+            for url in {row.url, lookup_url or row.url}:
+                if url not in urls:
+                    urls.append(url)
+                    self._ids_by_url[url] = row.id
+            while len(self._rows) > self.capacity:
+                self._drop(next(iter(self._rows)))
+
+    def _drop(self, url_id: int) -> None:
+        self._rows.pop(url_id, None)
+        for url in self._urls_by_id.pop(url_id, ()):
+            self._ids_by_url.pop(url, None)
+
+    def begin_write(self) -> None:
+        """Reject puts of rows read before now (called as each write transaction starts)."""
+        with self._lock:
+            self._generation += 1
+
+    def discard(self, url_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            for url_id in url_ids:
+                self._drop(url_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._rows.clear()
+            self._ids_by_url.clear()
+            self._urls_by_id.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._rows), "capacity": self.capacity}
 
 
 class DatabaseManager:
     """Thread-safe SQLite access layer.
 
-    Uses a `QMutex` so it can be safely used from Qt threads.
+    Each thread gets its own long-lived connection, so PRAGMAs run once per thread
+    and sqlite3's prepared statement cache survives between calls. Write
+    transactions are serialized with a `QMutex`; reads take no lock and rely on
+    WAL mode to run alongside the writer.
+
+    Several processes may share one database file. Claimed URLs are leased to
+    the claiming manager's `owner_id` for LEASE_SECONDS; the owner keeps the
+    lease with renew_leases() while it downloads, and only URLs whose lease ran
+    out (or, at startup, was held by an earlier run on this host) are reset by
+    reset_in_progress_to_stopped().
     """
 
-    def __init__(self, db_path: str | Path = DEFAULT_DB_FILENAME, mutex: QMutex | None = None):
+    # Prepared statements kept per connection by sqlite3 (its default is 128).
+    STATEMENT_CACHE_SIZE = 256
+    # Seconds SQLite waits on a lock held by another process before giving up.
+    BUSY_TIMEOUT = 30.0
+    # Shorter wait for checkpoint_wal(): a busy checkpoint is simply retried later.
+    CHECKPOINT_BUSY_TIMEOUT = 1.0
+    # Lines inserted per write transaction by import_urls(); the write lock is
+    # released between chunks so download workers are not blocked for the whole import.
+    IMPORT_CHUNK_SIZE = 5000
+    # Rows fetched per batch by export_queue().
+    EXPORT_BATCH_SIZE = 5000
+    # Pages copied per step by backup(), and snapshots kept by backup_snapshot().
+    BACKUP_PAGES_PER_STEP = 1024
+    BACKUP_KEEP = 5
+    # UrlRows kept by the read-through cache behind get_by_id()/get_by_url() (0 disables it).
+    ROW_CACHE_SIZE = 2048
+    # Bloom filter of stored url_keys that lets bulk inserts skip the duplicate
+    # probe for URLs that are definitely new: target false-positive rate, and the
+    # fewest keys it is sized for (it is sized for twice the stored URLs).
+    URL_FILTER_ERROR_RATE = 0.01
+    URL_FILTER_MIN_CAPACITY = 100_000
+    # Rows ANALYZE samples per index in optimize(), so its cost does not grow with the table.
+    ANALYSIS_LIMIT = 1000
+    # Default retention of prune_attempts(): days of run history, and runs kept per URL.
+    ATTEMPT_RETENTION_DAYS = 90
+    ATTEMPTS_PER_URL = 20
+    # archive_completed(): age (days since processed) at which finished URLs move to
+    # `urls_history`, and rows moved per call.
+    ARCHIVE_AFTER_DAYS = 30
+    ARCHIVE_BATCH_SIZE = 2000
+    # Statuses archive_completed() moves; nothing else happens to such rows unless a user acts.
+    ARCHIVE_STATUSES = (UrlStatus.COMPLETED, UrlStatus.SKIPPED)
+    # Seconds a claim stays leased to its owner without a renew_leases() call.
+    LEASE_SECONDS = 120.0
+    # Default enable_profiling() threshold for logging a statement with its query plan.
+    SLOW_STATEMENT_MS = 50.0
+
+    # Schema migrations, in order: step N (1-based) is recorded as `PRAGMA user_version = N`
+    # in the same transaction that applies it. Only append to this list. Steps must also
+    # cope with databases created before user_version was tracked (version 0).
+    MIGRATIONS: tuple[str, ...] = (
+        "_migrate_if_needed",  # 1: base schema, legacy import, tags, status_counts, url_key
+        "_ensure_url_search_index",  # 2: urls_fts trigram search index
+        "_ensure_tag_filter_index",  # 3: url_tags (tag_id, url_id) index, tags.url_count
+        "_rebuild_urls_v2",  # 4: INTEGER (epoch) dates in urls, (status, id) index
+        "_ensure_maintenance_log",  # 5: maintenance_log table
+        "_add_url_priority",  # 6: urls.priority, (status, priority DESC, id) queue index
+        "_ensure_attempts",  # 7: attempts table (one row per download run)
+        "_add_urls_history",  # 8: urls_history cold tier, all_urls view, tier-aware triggers
+        "_ensure_leases",  # 9: leases table (owner and expiry of each claimed URL)
+        "_rekey_query_urls",  # 10: url_key of URLs with a query, after narrowing tracking params
+    )
+
+    def __init__(
+        self, db_path: str | Path = DEFAULT_DB_FILENAME, mutex: QMutex | None = None, *, owner_id: str | None = None
+    ):
         self.db_path = Path(db_path)
         self._mutex = mutex or QMutex()
+        # Identifies this manager's claims to other processes sharing the database.
+        self.owner_id = owner_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Connection pool keyed by thread id; guarded by _pool_lock for add/remove.
+        self._pool_lock = threading.Lock()
+        self._connections: dict[int, sqlite3.Connection] = {}
+        # Set by ensure_database() once the urls_fts search index is known to exist.
+        self._fts_enabled = False
+        # Set once ensure_database() has confirmed the schema is current.
+        self._schema_ready = False
+        self._row_cache = _UrlRowCache(self.ROW_CACHE_SIZE)
+        # Rows changed by the current write transaction (guarded by the write mutex);
+        # dropped from the row cache once it commits. None means every row.
+        self._stale_ids: set[int] | None = set()
+        # Built by the first bulk insert; see _prepare_url_filter().
+        self._url_filter: BloomFilter | None = None
+        self._url_filter_high_water = 0  # Highest urls.id whose key is in the filter
+        self._url_filter_stale = False
+        # Set by enable_profiling(); None (the default) keeps the transaction paths untimed.
+        self._profiler: QueryProfiler | None = None
+        # Threads whose pooled connection has a profiler trace callback installed.
+        # Each thread installs and removes its own, see _trace().
+        self._traced: set[int] = set()
 
     @contextmanager
     def _locked(self):
-        self._mutex.lock()
+        profiler = self._profiler
+        if profiler is None:
+            self._mutex.lock()
+        else:
+            started = time.perf_counter()
+            self._mutex.lock()
+            profiler.lock_waited(time.perf_counter() - started)
         try:
             yield
         finally:
             self._mutex.unlock()
 
+    def _open_connection(self) -> sqlite3.Connection:
+        # check_same_thread=False only so close() can run from the GUI thread at
+        # shutdown; a pooled connection is otherwise only used by its own thread.
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=self.STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA foreign_keys = ON;")
+        # Only takes effect on a new, empty file (and must precede WAL); existing
+        # databases switch over on their next vacuum().
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        # Keeps temp.selected_ids (bulk operations) off disk.
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        # Lets SQL backfill `url_key` for rows written without one (see _backfill_url_keys()).
+        conn.create_function("url_key", 1, url_key, deterministic=True)
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the calling thread's pooled connection, opening it on first use."""
+        thread_id = threading.get_ident()
+        conn = self._connections.get(thread_id)
+        if conn is None:
+            conn = self._open_connection()
+            with self._pool_lock:
+                self._connections[thread_id] = conn
+        return conn
+
     @contextmanager
     def _connect(self):
-        # Keep connections short-lived; safer across threads.
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         try:
-            conn.execute("PRAGMA foreign_keys = ON;")
-            conn.execute("PRAGMA journal_mode = WAL;")
-            conn.execute("PRAGMA synchronous = NORMAL;")
             yield conn
             conn.commit()
-        finally:
+        except BaseException:
+            conn.rollback()
+            raise
+
+    @contextmanager
+    def _read(self):
+        """Run a read-only snapshot on this thread's connection without locking.
+
+        The explicit BEGIN keeps multi-statement reads consistent; in WAL mode it
+        never waits for (or blocks) the writer.
+        """
+        profiler = self._profiler
+        timing = nullcontext() if profiler is None else profiler.call(_caller_name())
+        with timing, self._connect() as conn:
+            self._trace(conn, profiler)
+            conn.execute("BEGIN;")
+            yield conn
+
+    @contextmanager
+    def _write(self):
+        """Run a write transaction, serialized with other writers by the mutex.
+
+        Rows passed to `_invalidate_rows()` inside the block leave the row cache
+        after the commit.
+        """
+        profiler = self._profiler
+        timing = nullcontext() if profiler is None else profiler.call(_caller_name())
+        with timing, self._locked():
+            self._stale_ids = set()
+            self._row_cache.begin_write()
+            with self._connect() as conn:
+                self._trace(conn, profiler)
+                # IMMEDIATE takes the write lock up front, so read-then-write methods
+                # can't hit SQLITE_BUSY on upgrade when another process shares the file.
+                conn.execute("BEGIN IMMEDIATE;")
+                yield conn
+            stale, self._stale_ids = self._stale_ids, set()
+            if stale is None:
+                self._row_cache.clear()
+            elif stale:
+                self._row_cache.discard(stale)
+
+    def _trace(self, conn: sqlite3.Connection, profiler: QueryProfiler | None) -> None:
+        """Point this thread's connection's trace callback at `profiler`, or remove it once profiling is off.
+
+        Only the owning thread touches its connection's callback, so
+        disable_profiling() never changes a connection another thread is using.
+        """
+        thread_id = threading.get_ident()
+        if profiler is not None:
+            conn.set_trace_callback(profiler.statement)
+            self._traced.add(thread_id)
+        elif thread_id in self._traced:
+            conn.set_trace_callback(None)
+            self._traced.discard(thread_id)
+
+    def _invalidate_rows(self, url_ids: Iterable[int] | None = None) -> None:
+        """Mark rows changed by the current write transaction (None: any row may have changed)."""
+        if url_ids is None or self._stale_ids is None:
+            self._stale_ids = None
+            return
+        self._stale_ids.update(int(url_id) for url_id in url_ids)
+        if len(self._stale_ids) > self._row_cache.capacity:
+            self._stale_ids = None
+
+    def _prepare_url_filter(self) -> None:
+        """Build the url_key Bloom filter if there is none or it has gone stale.
+
+        Runs on a read snapshot, so writers are not blocked while a large table is
+        scanned; `_sync_url_filter()` adds rows inserted since.
+        """
+        if self._url_filter is not None and not self._url_filter_stale:
+            return
+        with self._read() as conn:
+            high_water, total = conn.execute(
+                """
+                SELECT MAX((SELECT COALESCE(MAX(id), 0) FROM urls), (SELECT COALESCE(MAX(id), 0) FROM urls_history)),
+                       (SELECT COALESCE(SUM(url_count), 0) FROM status_counts);
+                """
+            ).fetchone()
+            url_filter = BloomFilter(max(2 * int(total), self.URL_FILTER_MIN_CAPACITY), self.URL_FILTER_ERROR_RATE)
+            url_filter.update(
+                key
+                for (key,) in conn.execute(
+                    "SELECT url_key FROM all_urls WHERE id <= ? AND url_key IS NOT NULL;", (high_water,)
+                )
+            )
+        logger.info(
+            "Built URL filter: %d keys, capacity %d, %.1f KiB",
+            url_filter.count,
+            url_filter.capacity,
+            url_filter.nbytes / 1024,
+        )
+        with self._locked():
+            self._url_filter = url_filter
+            self._url_filter_high_water = int(high_water)
+            self._url_filter_stale = False
+
+    def _sync_url_filter(self, conn: sqlite3.Connection) -> BloomFilter | None:
+        """Inside a write transaction, add keys of rows inserted since the filter last saw the table.
+
+        Ids only grow (AUTOINCREMENT), so this also picks up rows written by other
+        processes, including any archived since. Deleted rows leave their keys behind, which only costs false
+        positives; once they (or overfilling) would push the false-positive rate
+        up, the filter is marked for a rebuild.
+        """
+        url_filter = self._url_filter
+        if url_filter is None:
+            return None
+        for url_id, key in conn.execute(
+            "SELECT id, url_key FROM all_urls WHERE id > ? AND url_key IS NOT NULL;", (self._url_filter_high_water,)
+        ):
+            url_filter.add(key)
+            self._url_filter_high_water = max(self._url_filter_high_water, int(url_id))
+        total = conn.execute("SELECT COALESCE(SUM(url_count), 0) FROM status_counts;").fetchone()[0]
+        if url_filter.count > url_filter.capacity or url_filter.count - int(total) > url_filter.count // 2:
+            self._url_filter_stale = True
+        return url_filter
+
+    def url_filter_stats(self) -> dict | None:
+        """Return the bulk-insert Bloom filter's size, or None if it has not been built.
+
+        Keys: keys, capacity, error_rate, hashes, bytes.
+        """
+        url_filter = self._url_filter
+        if url_filter is None:
+            return None
+        return {
+            "keys": url_filter.count,
+            "capacity": url_filter.capacity,
+            "error_rate": url_filter.error_rate,
+            "hashes": url_filter.num_hashes,
+            "bytes": url_filter.nbytes,
+        }
+
+    def cache_stats(self) -> dict[str, int]:
+        """Return the row cache's counters: hits, misses, size and capacity."""
+        return self._row_cache.stats()
+
+    def clear_cache(self) -> None:
+        """Empty the row cache, e.g. after another process has written to the database."""
+        self._row_cache.clear()
+
+    def release_thread_connection(self) -> None:
+        """Close the calling thread's pooled connection, if any.
+
+        Worker threads call this before exiting so short-lived threads don't leave
+        connections behind in the pool.
+        """
+        with self._pool_lock:
+            conn = self._connections.pop(threading.get_ident(), None)
+        self._traced.discard(threading.get_ident())
+        if conn is not None:
+            conn.close()
+
+    def close(self) -> None:
+        """Close every pooled connection (call on application shutdown).
+
+        The manager stays usable; connections are reopened lazily on next use.
+        """
+        with self._pool_lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._traced.clear()
+        for conn in connections:
             conn.close()
 
+    def enable_profiling(self, *, slow_statement_ms: float | None = None) -> None:
+        """Start timing every transaction and statement; read the results with profile_snapshot().
+
+        Each read or write transaction counts as a call of the method that ran it,
+        lock wait included (see QueryProfiler). Statements slower than
+        `slow_statement_ms` (default SLOW_STATEMENT_MS; 0 for all) are logged with
+        their query plan. Calling this again starts over.
+        """
+        threshold = self.SLOW_STATEMENT_MS if slow_statement_ms is None else slow_statement_ms
+        self._profiler = QueryProfiler(slow_statement_ms=threshold, explain=self.explain_query_plan)
+
+    def disable_profiling(self) -> None:
+        """Stop profiling and drop the statistics collected.
+
+        Each thread removes its connection's trace callback at its next transaction;
+        until then the old profiler ignores what it is sent.
+        """
+        self._profiler = None
+
+    def profile_snapshot(self, *, reset: bool = False) -> dict | None:
+        """Return QueryProfiler.snapshot(), or None while profiling is off."""
+        profiler = self._profiler
+        return None if profiler is None else profiler.snapshot(reset=reset)
+
+    def explain_query_plan(self, sql: str, params: Iterable = ()) -> list[str]:
+        """Return the EXPLAIN QUERY PLAN steps of `sql` on this thread's connection."""
+        return [row[3] for row in self._connection().execute("EXPLAIN QUERY PLAN " + sql, tuple(params))]
+
+    @property
+    def schema_version(self) -> int:
+        """The schema version this code migrates databases to."""
+        return len(self.MIGRATIONS)
+
     def ensure_database(self) -> None:
-        """Create DB file if missing and ensure schema is migrated."""
+        """Create DB file if missing and apply any pending schema migrations.
+
+        An up-to-date database costs one read of `user_version` plus one index
+        lookup per tier for rows written without a `url_key` (by another tool or an
+        older build), which are then filled in; repeat calls on the same manager
+        return without touching the database.
+        """
+        if self._schema_ready:
+            return
         with self._locked():
+            if self._schema_ready:
+                return
             self.db_path.parent.mkdir(parents=True, exist_ok=True)
             if not self.db_path.exists():
                 self.db_path.touch()
 
             with self._connect() as conn:
-                self._migrate_if_needed(conn)
+                version, has_fts = self._read_schema_state(conn)
+            if version < self.schema_version:
+                self._apply_migrations(version)
+                self._row_cache.clear()
+                with self._connect() as conn:
+                    version, has_fts = self._read_schema_state(conn)
+            elif version > self.schema_version:
+                logger.warning(
+                    "Database %s has schema version %d, newer than this version of the app (%d)",
+                    self.db_path,
+                    version,
+                    self.schema_version,
+                )
+            if version >= self.schema_version:
+                self._backfill_url_keys_on_open()
+            self._fts_enabled = has_fts
+            self._schema_ready = True
+
+    def _backfill_url_keys_on_open(self) -> None:
+        """Run `_backfill_url_keys()` if any row lacks a key; checking is one index lookup per tier."""
+        with self._connect() as conn:
+            missing = any(
+                conn.execute(f"SELECT EXISTS(SELECT 1 FROM {table} WHERE url_key IS NULL);").fetchone()[0]
+                for (table,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('urls', 'urls_history');"
+                ).fetchall()
+            )
+        if not missing:
+            return
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE;")
+            self._backfill_url_keys(conn)
+        self._row_cache.clear()
+
+    @staticmethod
+    def _read_schema_state(conn: sqlite3.Connection) -> tuple[int, bool]:
+        """Return (user_version, whether urls_fts exists) in one statement."""
+        version, has_fts = conn.execute(
+            """
+            SELECT (SELECT user_version FROM pragma_user_version),
+                   EXISTS(SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'urls_fts');
+            """
+        ).fetchone()
+        return int(version), bool(has_fts)
+
+    def _apply_migrations(self, from_version: int) -> None:
+        """Run each migration after `from_version` in its own transaction.
+
+        Foreign keys are off meanwhile (the pragma cannot change inside a
+        transaction), so steps that rebuild a table don't cascade deletes.
+        """
+        self._connection().execute("PRAGMA foreign_keys = OFF;")
+        try:
+            for number in range(from_version + 1, self.schema_version + 1):
+                with self._connect() as conn:
+                    conn.execute("BEGIN IMMEDIATE;")
+                    # Another process may have migrated since the version was read.
+                    if conn.execute("PRAGMA user_version;").fetchone()[0] >= number:
+                        continue
+                    step = self.MIGRATIONS[number - 1]
+                    getattr(self, step)(conn)
+                    conn.execute(f"PRAGMA user_version = {number};")
+                logger.info("Applied schema migration %d (%s) to %s", number, step, self.db_path)
+        finally:
+            self._connection().execute("PRAGMA foreign_keys = ON;")
 
     def _migrate_if_needed(self, conn: sqlite3.Connection) -> None:
         """Migrate from legacy schema to enhanced schema."""
@@ -92,7 +845,13 @@ class DatabaseManager:
             # Check if skipped_count column needs to be added
             if "skipped_count" not in cols:
                 conn.execute("ALTER TABLE urls ADD COLUMN skipped_count INTEGER NOT NULL DEFAULT 0;")
+            if "url_key" not in cols:
+                conn.execute("ALTER TABLE urls ADD COLUMN url_key INTEGER;")
+            if "priority" not in cols:
+                conn.execute("ALTER TABLE urls ADD COLUMN priority INTEGER NOT NULL DEFAULT 0;")
             self._ensure_indexes(conn)
+            self._backfill_url_keys(conn)
+            self._ensure_status_counts(conn)
             # Ensure tags tables exist (migration for existing databases)
             self._create_tags_tables(conn)
             return
@@ -101,6 +860,7 @@ class DatabaseManager:
         legacy_cols = {"id", "url", "processed", "date_processed"}
         if set(cols) >= legacy_cols and "status" not in cols:
             self._migrate_legacy_urls(conn)
+            self._backfill_url_keys(conn)
             self._create_tags_tables(conn)
             return
 
@@ -108,29 +868,186 @@ class DatabaseManager:
         raise RuntimeError(f"Unsupported urls table schema: {cols}")
 
     def _create_urls_table(self, conn: sqlite3.Connection) -> None:
+        conn.execute(_URLS_TABLE_SQL.format(table="urls"))
+        self._ensure_indexes(conn)
+        self._ensure_status_counts(conn)
+
+    def _ensure_status_counts(self, conn: sqlite3.Connection) -> None:
+        """Create the trigger-maintained `status_counts` summary table.
+
+        One row per status with its URL count and download_count total, kept in
+        step with `urls` by triggers so get_counts()/get_statistics() never scan.
+        The table is backfilled from `urls` when it is first created.
+        """
+        existed = (
+            conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='status_counts';").fetchone()
+            is not None
+        )
         conn.execute(
             """
-            CREATE TABLE urls (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                url TEXT NOT NULL UNIQUE,
-                status INTEGER NOT NULL DEFAULT 0,
-                force_redownload INTEGER NOT NULL DEFAULT 0,
-                check_new_only INTEGER NOT NULL DEFAULT 0,
-                download_count INTEGER NOT NULL DEFAULT 0,
-                date_added TEXT NOT NULL,
-                date_processed TEXT,
-                last_error TEXT,
-                skipped_count INTEGER NOT NULL DEFAULT 0
+            CREATE TABLE IF NOT EXISTS status_counts (
+                status INTEGER PRIMARY KEY,
+                url_count INTEGER NOT NULL DEFAULT 0,
+                download_total INTEGER NOT NULL DEFAULT 0
             );
             """
         )
-        self._ensure_indexes(conn)
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_urls_counts_insert AFTER INSERT ON urls
+            BEGIN
+                INSERT OR IGNORE INTO status_counts (status) VALUES (NEW.status);
+                UPDATE status_counts
+                SET url_count = url_count + 1, download_total = download_total + NEW.download_count
+                WHERE status = NEW.status;
+            END;
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_urls_counts_delete AFTER DELETE ON urls
+            BEGIN
+                UPDATE status_counts
+                SET url_count = url_count - 1, download_total = download_total - OLD.download_count
+                WHERE status = OLD.status;
+            END;
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_urls_counts_update AFTER UPDATE OF status, download_count ON urls
+            WHEN OLD.status IS NOT NEW.status OR OLD.download_count IS NOT NEW.download_count
+            BEGIN
+                UPDATE status_counts
+                SET url_count = url_count - 1, download_total = download_total - OLD.download_count
+                WHERE status = OLD.status;
+                INSERT OR IGNORE INTO status_counts (status) VALUES (NEW.status);
+                UPDATE status_counts
+                SET url_count = url_count + 1, download_total = download_total + NEW.download_count
+                WHERE status = NEW.status;
+            END;
+            """
+        )
+        if not existed:
+            self._rebuild_status_counts(conn)
+
+    def _ensure_url_search_index(self, conn: sqlite3.Connection) -> bool:
+        """Create the `urls_fts` trigram index over `urls.url`, kept in sync by triggers.
+
+        Returns False if this SQLite build lacks FTS5 or the trigram tokenizer, in
+        which case search falls back to LIKE.
+        """
+        existed = (
+            conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='urls_fts';").fetchone() is not None
+        )
+        if not existed:
+            try:
+                conn.execute(
+                    """
+                    CREATE VIRTUAL TABLE urls_fts USING fts5(
+                        url, content='urls', content_rowid='id', tokenize='trigram'
+                    );
+                    """
+                )
+            except sqlite3.OperationalError:
+                return False
+
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_urls_fts_insert AFTER INSERT ON urls
+            BEGIN
+                INSERT INTO urls_fts (rowid, url) VALUES (NEW.id, NEW.url);
+            END;
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_urls_fts_delete AFTER DELETE ON urls
+            BEGIN
+                INSERT INTO urls_fts (urls_fts, rowid, url) VALUES ('delete', OLD.id, OLD.url);
+            END;
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_urls_fts_update AFTER UPDATE OF url ON urls
+            BEGIN
+                INSERT INTO urls_fts (urls_fts, rowid, url) VALUES ('delete', OLD.id, OLD.url);
+                INSERT INTO urls_fts (rowid, url) VALUES (NEW.id, NEW.url);
+            END;
+            """
+        )
+        if not existed:
+            conn.execute("INSERT INTO urls_fts (urls_fts) VALUES ('rebuild');")
+        return True
+
+    def _rebuild_status_counts(self, conn: sqlite3.Connection, table: str = "urls") -> None:
+        """Recount `status_counts` from `table` (`all_urls` once the history tier exists)."""
+        conn.execute("DELETE FROM status_counts;")
+        conn.execute(
+            f"""
+            INSERT INTO status_counts (status, url_count, download_total)
+            SELECT status, COUNT(*), COALESCE(SUM(download_count), 0) FROM {table} GROUP BY status;
+            """
+        )
 
     def _ensure_indexes(self, conn: sqlite3.Connection) -> None:
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_status ON urls(status);")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_date_processed ON urls(date_processed);")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_date_added ON urls(date_added);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_url ON urls(url);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_url_key ON urls(url_key);")
+        # Keyset pagination needs an index per History sort column (id and url are covered
+        # already: url by the autoindex behind its UNIQUE constraint).
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_download_count ON urls(download_count);")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_urls_sort_processed ON urls(COALESCE(date_processed, date_added));"
+        )
+
+    def _backfill_url_keys(self, conn: sqlite3.Connection) -> None:
+        """Fill in `url_key` for rows that lack one, in both tiers, and log any duplicate clusters found.
+
+        Runs in the migration that adds the column and on every ensure_database()
+        that finds rows without a key.
+        """
+        filled = conn.execute("UPDATE urls SET url_key = url_key(url) WHERE url_key IS NULL;").rowcount
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'urls_history';").fetchone():
+            filled += conn.execute("UPDATE urls_history SET url_key = url_key(url) WHERE url_key IS NULL;").rowcount
+        if filled <= 0:
+            return
+        clusters = self._duplicate_clusters(conn)
+        if clusters:
+            logger.warning(
+                "Backfilled %d URL key(s); %d group(s) of URLs normalize to the same address "
+                "(%d redundant row(s)). See DatabaseManager.find_duplicate_urls().",
+                filled,
+                len(clusters),
+                sum(len(cluster) - 1 for cluster in clusters),
+            )
+            for cluster in clusters[:20]:
+                logger.info("Duplicate URLs: %s", ", ".join(row.url for row in cluster))
+
+    @staticmethod
+    def _duplicate_clusters(conn: sqlite3.Connection, table: str = "urls") -> list[list[UrlRow]]:
+        rows = conn.execute(
+            f"""
+            SELECT {_URL_COLUMNS}, url_key FROM {table}
+            WHERE url_key IN (
+                SELECT url_key FROM {table} WHERE url_key IS NOT NULL GROUP BY url_key HAVING COUNT(*) > 1
+            )
+            ORDER BY url_key, id;
+            """
+        ).fetchall()
+        clusters: dict[int, list[UrlRow]] = {}
+        for r in rows:
+            clusters.setdefault(int(r[-1]), []).append(_url_row(r))
+        return list(clusters.values())
+
+    def find_duplicate_urls(self) -> list[list[UrlRow]]:
+        """Return groups of URLs that normalize to the same address, oldest first in each group.
+
+        Covers archived URLs too.
+        """
+        with self._read() as conn:
+            return self._duplicate_clusters(conn, "all_urls")
 
     def _create_tags_tables(self, conn: sqlite3.Connection) -> None:
         """Create tags and url_tags tables if they don't exist."""
@@ -156,7 +1073,290 @@ class DatabaseManager:
             """
         )
         conn.execute("CREATE INDEX IF NOT EXISTS idx_url_tags_url_id ON url_tags(url_id);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_url_tags_tag_id ON url_tags(tag_id);")
+
+    def _ensure_tag_filter_index(self, conn: sqlite3.Connection) -> None:
+        """Prepare tags for multi-tag filtering (see `_tag_filter_sql()`).
+
+        `(tag_id, url_id)` is a covering index for listing a tag's URLs, replacing
+        the plain `tag_id` index. `tags.url_count` is kept in step with `url_tags`
+        by triggers, so the smallest tag of a filter is known without counting.
+        """
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_url_tags_tag_url ON url_tags(tag_id, url_id);")
+        conn.execute("DROP INDEX IF EXISTS idx_url_tags_tag_id;")
+
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(tags);")}
+        if "url_count" not in cols:
+            conn.execute("ALTER TABLE tags ADD COLUMN url_count INTEGER NOT NULL DEFAULT 0;")
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_url_tags_count_insert AFTER INSERT ON url_tags
+            BEGIN
+                UPDATE tags SET url_count = url_count + 1 WHERE id = NEW.tag_id;
+            END;
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_url_tags_count_delete AFTER DELETE ON url_tags
+            BEGIN
+                UPDATE tags SET url_count = url_count - 1 WHERE id = OLD.tag_id;
+            END;
+            """
+        )
+        conn.execute("UPDATE tags SET url_count = (SELECT COUNT(*) FROM url_tags WHERE url_tags.tag_id = tags.id);")
+
+    def _rebuild_urls_v2(self, conn: sqlite3.Connection) -> None:
+        """Store `urls` dates as INTEGER Unix seconds and settle its index set.
+
+        SQLite cannot change a column's type, so a table with TEXT dates is copied
+        (ids kept, ISO dates converted) into a new table that then replaces it.
+        Runs with foreign keys off (see `_apply_migrations()`), so dropping the old
+        table does not cascade into `url_tags`. Also drops `idx_urls_url`, which
+        duplicated the UNIQUE autoindex, and `idx_urls_status`, which the claim
+        queue index replaces (see `_add_url_priority()`).
+        """
+        types = {row[1]: str(row[2]).upper() for row in conn.execute("PRAGMA table_info(urls);")}
+        if types.get("date_added") != "INTEGER":
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'urls';").fetchone()
+            sequence = int(row[0]) if row else 0
+            has_fts = (
+                conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='urls_fts';").fetchone()
+                is not None
+            )
+
+            conn.create_function("to_epoch", 1, _to_epoch, deterministic=True)
+            conn.execute(_URLS_TABLE_SQL.format(table="urls_v2"))
+            conn.execute(
+                """
+                INSERT INTO urls_v2 (
+                    id, url, status, force_redownload, check_new_only, download_count,
+                    date_added, date_processed, last_error, skipped_count, url_key
+                )
+                SELECT id, url, status, force_redownload, check_new_only, download_count,
+                       COALESCE(to_epoch(date_added), to_epoch(date_processed), ?), to_epoch(date_processed),
+                       last_error, skipped_count, url_key
+                FROM urls ORDER BY id;
+                """,
+                (_now_epoch(),),
+            )
+            conn.execute("DROP TABLE urls;")
+            conn.execute("ALTER TABLE urls_v2 RENAME TO urls;")
+            # Keep AUTOINCREMENT from reusing ids of rows deleted before the rebuild.
+            if (
+                conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'urls';", (sequence,)).rowcount
+                == 0
+                and sequence
+            ):
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('urls', ?);", (sequence,))
+
+            # Dropping the table dropped its triggers; status_counts itself is still accurate.
+            self._ensure_status_counts(conn)
+            if has_fts:
+                self._ensure_url_search_index(conn)
+            violations = conn.execute("PRAGMA foreign_key_check;").fetchall()
+            if violations:
+                logger.warning("%d foreign key violation(s) after rebuilding urls", len(violations))
+
+        conn.execute("DROP INDEX IF EXISTS idx_urls_url;")
+        conn.execute("DROP INDEX IF EXISTS idx_urls_status;")
+        self._ensure_indexes(conn)
+
+    def _ensure_maintenance_log(self, conn: sqlite3.Connection) -> None:
+        """Create `maintenance_log`: when each maintenance task last ran, and for how long."""
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS maintenance_log (
+                task TEXT PRIMARY KEY,
+                last_run INTEGER NOT NULL,
+                duration_ms INTEGER NOT NULL,
+                detail TEXT
+            );
+            """
+        )
+
+    def _add_url_priority(self, conn: sqlite3.Connection) -> None:
+        """Add `urls.priority` and the index claim_next_batch() walks.
+
+        `(status, priority DESC, id)` lists one status's queue in claim order, so
+        a claim reads its rows straight off the index.
+        """
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(urls);")}
+        if "priority" not in cols:
+            conn.execute("ALTER TABLE urls ADD COLUMN priority INTEGER NOT NULL DEFAULT 0;")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_queue ON urls(status, priority DESC, id);")
+        conn.execute("DROP INDEX IF EXISTS idx_urls_status_id;")
+        conn.execute("DROP INDEX IF EXISTS idx_urls_status;")
+
+    def _ensure_attempts(self, conn: sqlite3.Connection) -> None:
+        """Create `attempts`: one row per download run, times in epoch milliseconds.
+
+        There is no foreign key to `urls`: run history outlives clearing URLs from
+        the queue and is bounded by prune_attempts() instead. Rows are inserted
+        as runs finish, so ids follow `finished_at`.
+        """
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS attempts (
+                id INTEGER PRIMARY KEY,
+                url_id INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                claimed_at INTEGER NOT NULL,
+                started_at INTEGER NOT NULL,
+                first_output_at INTEGER,
+                finished_at INTEGER NOT NULL,
+                exit_code INTEGER,
+                failure_lines INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_attempts_url_started ON attempts(url_id, started_at);")
+
+    def _ensure_leases(self, conn: sqlite3.Connection) -> None:
+        """Create `leases`: the owner and expiry (epoch milliseconds) of each claimed URL.
+
+        A row exists only while its URL is IN_PROGRESS, so the table holds one row
+        per running download and needs no index. IN_PROGRESS URLs without a row
+        (claimed before leases existed) count as expired.
+        """
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS leases (
+                url_id INTEGER PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at INTEGER NOT NULL
+            );
+            """
+        )
+
+    def _rekey_query_urls(self, conn: sqlite3.Connection) -> None:
+        """Recompute `url_key` for URLs with a query string, in both tiers.
+
+        Share parameters such as `si` used to be stripped on every host and are
+        now only stripped on the sites that add them (see `url_normalizer`), so
+        keys of other URLs carrying them changed. Keys only become more distinct,
+        so no new duplicates appear.
+        """
+        for table in ("urls", "urls_history"):
+            conn.execute(f"UPDATE {table} SET url_key = url_key(url) WHERE instr(url, '?') > 0;")
+
+    def _add_urls_history(self, conn: sqlite3.Connection) -> None:
+        """Add the `urls_history` cold tier and the `all_urls` view over both tiers.
+
+        archive_completed() moves old finished rows out of `urls`, ids kept, so the
+        queue and its indexes only hold rows that may still change. Reads that
+        should see every URL go through `all_urls`; ordered reads on it are
+        flattened into one index walk per tier. Archived rows are read-only: a
+        write that changes a row's status moves it back first (`_unarchive()`).
+
+        Triggers on both tables keep `status_counts`, `urls_fts` and `url_tags`
+        covering both tiers. Each does nothing while the row's id is also in the
+        other table, which is the case only mid-move, so moving a row costs no
+        index or counter updates. `url_tags` loses its foreign key to `urls` (a
+        move would cascade), replaced by a check trigger and the delete triggers.
+        """
+        conn.execute(_URLS_TABLE_SQL.format(table="IF NOT EXISTS urls_history"))
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_history_url_key ON urls_history(url_key);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_history_date_added ON urls_history(date_added);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_history_date_processed ON urls_history(date_processed);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_history_download_count ON urls_history(download_count);")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_urls_history_sort_processed "
+            "ON urls_history(COALESCE(date_processed, date_added));"
+        )
+        conn.execute(
+            f"""
+            CREATE VIEW IF NOT EXISTS all_urls AS
+            SELECT {_ALL_URLS_COLUMNS} FROM urls
+            UNION ALL
+            SELECT {_ALL_URLS_COLUMNS} FROM urls_history;
+            """
+        )
+
+        if any(row[2] == "urls" for row in conn.execute("PRAGMA foreign_key_list(url_tags);")):
+            conn.execute(
+                """
+                CREATE TABLE url_tags_v2 (
+                    url_id INTEGER NOT NULL,
+                    tag_id INTEGER NOT NULL,
+                    date_assigned TEXT NOT NULL,
+                    PRIMARY KEY (url_id, tag_id),
+                    FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE
+                );
+                """
+            )
+            conn.execute("INSERT INTO url_tags_v2 SELECT url_id, tag_id, date_assigned FROM url_tags;")
+            conn.execute("DROP TABLE url_tags;")
+            conn.execute("ALTER TABLE url_tags_v2 RENAME TO url_tags;")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_url_tags_url_id ON url_tags(url_id);")
+            # Recreates the (tag_id, url_id) index and the tags.url_count triggers.
+            self._ensure_tag_filter_index(conn)
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_url_tags_url_exists BEFORE INSERT ON url_tags
+            WHEN NOT EXISTS (SELECT 1 FROM urls WHERE id = NEW.url_id)
+                AND NOT EXISTS (SELECT 1 FROM urls_history WHERE id = NEW.url_id)
+            BEGIN
+                SELECT RAISE(ABORT, 'FOREIGN KEY constraint failed');
+            END;
+            """
+        )
+
+        fts = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'urls_fts';").fetchone()
+        if fts is not None and "all_urls" not in fts[0]:
+            conn.execute("DROP TABLE urls_fts;")
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE urls_fts USING fts5(
+                    url, content='all_urls', content_rowid='id', tokenize='trigram'
+                );
+                """
+            )
+            conn.execute("INSERT INTO urls_fts (urls_fts) VALUES ('rebuild');")
+
+        for table, other in (("urls", "urls_history"), ("urls_history", "urls")):
+            prefix = "trg_urls" if table == "urls" else "trg_urls_history"
+            inserted = f"NOT EXISTS (SELECT 1 FROM {other} WHERE id = NEW.id)"
+            deleted = f"NOT EXISTS (SELECT 1 FROM {other} WHERE id = OLD.id)"
+            bodies = {
+                f"{prefix}_counts_insert": (
+                    "INSERT",
+                    inserted,
+                    """
+                    INSERT OR IGNORE INTO status_counts (status) VALUES (NEW.status);
+                    UPDATE status_counts
+                    SET url_count = url_count + 1, download_total = download_total + NEW.download_count
+                    WHERE status = NEW.status;
+                    """,
+                ),
+                f"{prefix}_counts_delete": (
+                    "DELETE",
+                    deleted,
+                    """
+                    UPDATE status_counts
+                    SET url_count = url_count - 1, download_total = download_total - OLD.download_count
+                    WHERE status = OLD.status;
+                    """,
+                ),
+                f"{prefix}_tags_delete": ("DELETE", deleted, "DELETE FROM url_tags WHERE url_id = OLD.id;"),
+            }
+            if fts is not None:
+                bodies[f"{prefix}_fts_insert"] = (
+                    "INSERT",
+                    inserted,
+                    "INSERT INTO urls_fts (rowid, url) VALUES (NEW.id, NEW.url);",
+                )
+                bodies[f"{prefix}_fts_delete"] = (
+                    "DELETE",
+                    deleted,
+                    "INSERT INTO urls_fts (urls_fts, rowid, url) VALUES ('delete', OLD.id, OLD.url);",
+                )
+            for name, (event, condition, body) in bodies.items():
+                conn.execute(f"DROP TRIGGER IF EXISTS {name};")
+                conn.execute(f"CREATE TRIGGER {name} AFTER {event} ON {table} WHEN {condition} BEGIN {body} END;")
+
+        violations = conn.execute("PRAGMA foreign_key_check;").fetchall()
+        if violations:
+            logger.warning("%d foreign key violation(s) after adding urls_history", len(violations))
 
     def _migrate_legacy_urls(self, conn: sqlite3.Connection) -> None:
         # Rename existing table and recreate with new schema.
@@ -167,11 +1367,12 @@ class DatabaseManager:
         cursor = conn.cursor()
         cursor.execute("SELECT id, url, processed, date_processed FROM urls_legacy ORDER BY id ASC;")
 
-        now = datetime.now(timezone.utc).isoformat()
+        now = _now_epoch()
         rows: Iterable[tuple[int, str, int, str | None]] = cursor.fetchall()
         for _legacy_id, url, processed, date_processed in rows:
             status = UrlStatus.COMPLETED if int(processed) == 1 else UrlStatus.PENDING
             download_count = 1 if status == UrlStatus.COMPLETED else 0
+            date_processed = _to_epoch(date_processed)
             date_added = date_processed or now
 
             conn.execute(
@@ -188,61 +1389,73 @@ class DatabaseManager:
         self._ensure_indexes(conn)
 
     def url_exists(self, url: str) -> bool:
-        with self._locked(), self._connect() as conn:
-            cur = conn.execute("SELECT 1 FROM urls WHERE url = ? LIMIT 1;", (url,))
-            return cur.fetchone() is not None
+        """Return True if `url`, or a URL that normalizes to the same address, is stored."""
+        return self.get_by_url(url) is not None
 
     def get_by_url(self, url: str) -> UrlRow | None:
+        """Return the row stored for `url` (or a URL that normalizes to the same address).
+
+        Served from the row cache when possible. The returned row has no tags.
+        """
         url = url.strip()
         if not url:
             return None
 
-        with self._locked(), self._connect() as conn:
+        cached = self._row_cache.get_by_url(url)
+        if cached is not None:
+            return cached
+        generation = self._row_cache.generation
+        # Match on the normalized key, preferring the exact string if both are stored.
+        with self._read() as conn:
             row = conn.execute(
-                """
-                SELECT id, url, status, force_redownload, check_new_only, download_count,
-                       date_added, date_processed, last_error, skipped_count
-                FROM urls
-                WHERE url = ?
-                LIMIT 1;
-                """,
-                (url,),
+                f"SELECT {_URL_COLUMNS} FROM all_urls WHERE url_key = ? ORDER BY url = ? DESC, id LIMIT 1;",
+                (url_key(url), url),
             ).fetchone()
-
-            if row is None:
-                return None
-
-            return UrlRow(
-                id=int(row[0]),
-                url=str(row[1]),
-                status=int(row[2]),
-                force_redownload=int(row[3]),
-                check_new_only=int(row[4]),
-                download_count=int(row[5]),
-                date_added=str(row[6]),
-                date_processed=row[7],
-                last_error=row[8],
-                skipped_count=int(row[9]) if row[9] is not None else 0,
-            )
+        if row is None:
+            return None
+        result = _url_row(row)
+        self._row_cache.put(result, generation, url)
+        return result
+
+    def get_by_id(self, url_id: int) -> UrlRow | None:
+        """Return the row with id `url_id`, served from the row cache when possible. The row has no tags."""
+        url_id = int(url_id)
+        cached = self._row_cache.get(url_id)
+        if cached is not None:
+            return cached
+        generation = self._row_cache.generation
+        with self._read() as conn:
+            row = conn.execute(f"SELECT {_URL_COLUMNS} FROM all_urls WHERE id = ?;", (url_id,)).fetchone()
+        if row is None:
+            return None
+        result = _url_row(row)
+        self._row_cache.put(result, generation)
+        return result
 
     def add_url(self, url: str, *, force_redownload: bool = False, check_new_only: bool = False) -> int | None:
         """Add a URL to the queue.
 
-        Returns the new row id, or None if the URL already exists.
+        Returns the new row id, or None if the URL (or one that normalizes to the
+        same address, see `url_normalizer`) already exists.
         """
         url = url.strip()
         if not url:
             raise ValueError("url cannot be empty")
 
-        with self._locked(), self._connect() as conn:
-            now = datetime.now(timezone.utc).isoformat()
+        # Not answered from the row cache: another instance sharing the file may have
+        # deleted a cached row, so existence is checked in the write transaction.
+        key = url_key(url)
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM all_urls WHERE url_key = ? LIMIT 1;", (key,)).fetchone() is not None:
+                return None
+            now = _now_epoch()
             try:
                 cur = conn.execute(
                     """
                     INSERT INTO urls (
                         url, status, force_redownload, check_new_only,
-                        download_count, date_added, date_processed, last_error
-                    ) VALUES (?, ?, ?, ?, 0, ?, NULL, NULL);
+                        download_count, date_added, date_processed, last_error, url_key
+                    ) VALUES (?, ?, ?, ?, 0, ?, NULL, NULL, ?);
                     """,
                     (
                         url,
@@ -250,6 +1463,7 @@ class DatabaseManager:
                         1 if force_redownload else 0,
                         1 if check_new_only else 0,
                         now,
+                        key,
                     ),
                 )
             except sqlite3.IntegrityError:
@@ -267,7 +1481,8 @@ class DatabaseManager:
         """Re-queue an existing URL (UNIQUE url).
 
         Because `urls.url` is UNIQUE, duplicate handling must update the existing row
-        instead of inserting a new one.
+        instead of inserting a new one. The row is found by normalized key, so
+        `url` may be any spelling of the stored address.
 
         Returns the row id if updated, otherwise None if URL doesn't exist.
         """
@@ -275,12 +1490,16 @@ class DatabaseManager:
         if not url:
             raise ValueError("url cannot be empty")
 
-        with self._locked(), self._connect() as conn:
-            row = conn.execute("SELECT id FROM urls WHERE url = ? LIMIT 1;", (url,)).fetchone()
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT id FROM all_urls WHERE url_key = ? ORDER BY url = ? DESC, id LIMIT 1;", (url_key(url), url)
+            ).fetchone()
             if row is None:
                 return None
-
             url_id = int(row[0])
+
+            self._invalidate_rows([url_id])
+            self._unarchive(conn, "id = ?", (url_id,))
             conn.execute(
                 """
                 UPDATE urls
@@ -301,38 +1520,126 @@ class DatabaseManager:
 
     def get_counts(self) -> tuple[int, int, int]:
         """Return (pending_count, stopped_count, active_count)."""
-        with self._locked(), self._connect() as conn:
-            pending = conn.execute("SELECT COUNT(*) FROM urls WHERE status = ?;", (UrlStatus.PENDING,)).fetchone()[0]
-            stopped = conn.execute("SELECT COUNT(*) FROM urls WHERE status = ?;", (UrlStatus.STOPPED,)).fetchone()[0]
-            active = conn.execute("SELECT COUNT(*) FROM urls WHERE status = ?;", (UrlStatus.IN_PROGRESS,)).fetchone()[
-                0
-            ]
-            return int(pending), int(stopped), int(active)
+        with self._read() as conn:
+            counts = dict(
+                conn.execute(
+                    "SELECT status, url_count FROM status_counts WHERE status IN (?, ?, ?);",
+                    (UrlStatus.PENDING, UrlStatus.STOPPED, UrlStatus.IN_PROGRESS),
+                ).fetchall()
+            )
+            return (
+                int(counts.get(UrlStatus.PENDING, 0)),
+                int(counts.get(UrlStatus.STOPPED, 0)),
+                int(counts.get(UrlStatus.IN_PROGRESS, 0)),
+            )
+
+    def _filter_sql(
+        self, conn: sqlite3.Connection, search: str | None, tags: TagFilter | None
+    ) -> tuple[str, list[str], list]:
+        """Build the FROM-clause joins, WHERE conditions and params for History filters.
+
+        A search term uses the `urls_fts` trigram index (joined as `urls_fts`) when
+        available and long enough; otherwise it falls back to a LIKE scan.
+        """
+        joins = ""
+        conditions: list[str] = []
+        params: list = []
+
+        term = search.strip() if search else ""
+        if term:
+            if self._fts_enabled and len(term) >= _FTS_MIN_TERM_LENGTH:
+                joins = " JOIN urls_fts ON urls_fts.rowid = u.id"
+                conditions.append("urls_fts MATCH ?")
+                # A quoted phrase of trigrams is a literal substring match.
+                params.append('url : "' + term.replace('"', '""') + '"')
+            else:
+                conditions.append("u.url LIKE ?")
+                params.append(f"%{term}%")
+
+        if tags:
+            condition, tag_params = self._tag_filter_sql(conn, tags)
+            conditions.append(condition)
+            params.extend(tag_params)
+
+        return joins, conditions, params
 
-    def count_urls(self, *, search: str | None = None, tag_id: int | None = None) -> int:
+    @staticmethod
+    def _tag_filter_sql(conn: sqlite3.Connection, tags: TagFilter) -> tuple[str, list]:
+        """Build the WHERE condition and params for a TagFilter.
+
+        Matching ids come from the `(tag_id, url_id)` index of the smallest `all_of`
+        tag (by `tags.url_count`); every other tag is a primary-key probe per
+        candidate. The cost follows the smallest tag, not the table. Without
+        `all_of`, candidates are the union of the `any_of` tags; with only
+        `none_of`, every URL has to be checked.
+        """
+        tag_ids = set(tags.all_of + tags.any_of + tags.none_of)
+        placeholders = ",".join("?" * len(tag_ids))
+        sizes = dict(conn.execute(f"SELECT id, url_count FROM tags WHERE id IN ({placeholders});", list(tag_ids)))
+
+        def by_size(ids: tuple[int, ...], largest_first: bool = False) -> list[int]:
+            return sorted(ids, key=lambda tag_id: sizes.get(tag_id, 0), reverse=largest_first)
+
+        if not tags.all_of and not tags.any_of:
+            probe = "EXISTS (SELECT 1 FROM url_tags p WHERE p.url_id = u.id AND p.tag_id = ?)"
+            return " AND ".join(f"NOT {probe}" for _ in tags.none_of), by_size(tags.none_of, largest_first=True)
+
+        probe = "EXISTS (SELECT 1 FROM url_tags p WHERE p.url_id = c.url_id AND p.tag_id = ?)"
+        checks: list[str] = []
+        params: list = []
+        if tags.all_of:
+            # Probe the smaller tags first: they reject the most candidates.
+            first, *rest = by_size(tags.all_of)
+            source = "SELECT c.url_id FROM url_tags c WHERE c.tag_id = ?"
+            params.append(first)
+            checks.extend(probe for _ in rest)
+            params.extend(rest)
+            if tags.any_of:
+                # Probe the larger tags first: they are the likeliest to match.
+                checks.append("(" + " OR ".join(probe for _ in tags.any_of) + ")")
+                params.extend(by_size(tags.any_of, largest_first=True))
+        else:
+            source = f"SELECT c.url_id FROM url_tags c WHERE c.tag_id IN ({','.join('?' * len(tags.any_of))})"
+            params.extend(tags.any_of)
+        checks.extend(f"NOT {probe}" for _ in tags.none_of)
+        params.extend(by_size(tags.none_of, largest_first=True))
+
+        return "u.id IN (" + " AND ".join([source] + checks) + ")", params
+
+    @staticmethod
+    def _combine_tag_filter(tag_id: int | None, tags: TagFilter | None) -> TagFilter | None:
+        if tag_id is None:
+            return tags
+        tags = tags or TagFilter()
+        return replace(tags, all_of=tags.all_of + (int(tag_id),))
+
+    def count_urls(
+        self, *, search: str | None = None, tag_id: int | None = None, tags: TagFilter | None = None
+    ) -> int:
         """Return total count of URLs matching filters.
 
+        The unfiltered total is read from `status_counts` rather than counted.
+        Filtered counts add up each tier separately: an aggregate over the
+        `all_urls` view would not be flattened and would read every row.
+
         Args:
             search: filters by substring match on URL.
             tag_id: if provided, only count URLs with this tag.
+            tags: tag combination to filter by (combined with `tag_id`).
         """
-        with self._locked(), self._connect() as conn:
-            base_query = "SELECT COUNT(*) FROM urls u"
-            conditions = []
-            params: list = []
-
-            if search and search.strip():
-                conditions.append("u.url LIKE ?")
-                params.append(f"%{search.strip()}%")
-
-            if tag_id is not None:
-                conditions.append("EXISTS (SELECT 1 FROM url_tags ut WHERE ut.url_id = u.id AND ut.tag_id = ?)")
-                params.append(int(tag_id))
-
+        tags = self._combine_tag_filter(tag_id, tags)
+        with self._read() as conn:
+            joins, conditions, params = self._filter_sql(conn, search, tags)
             if conditions:
-                base_query += " WHERE " + " AND ".join(conditions)
-
-            result = conn.execute(base_query + ";", params).fetchone()
+                where = " WHERE " + " AND ".join(conditions)
+                query = (
+                    f"SELECT (SELECT COUNT(*) FROM urls u{joins}{where})"
+                    f" + (SELECT COUNT(*) FROM urls_history u{joins}{where});"
+                )
+                params = params + params
+            else:
+                query = "SELECT COALESCE(SUM(url_count), 0) FROM status_counts;"
+            result = conn.execute(query, params).fetchone()
             return int(result[0])
 
     # Valid sort columns for list_urls
@@ -344,83 +1651,126 @@ class DatabaseManager:
         "date_added": "u.date_added",
         "date_processed": "COALESCE(u.date_processed, u.date_added)",
     }
+    DEFAULT_SORT_COLUMN = "date_processed"
+    # Orders search hits best match first; other sorts apply when not searching.
+    RELEVANCE_SORT = "relevance"
+
+    @classmethod
+    def page_cursor(cls, row: UrlRow, sort_column: str) -> tuple:
+        """Return the keyset cursor `(sort_value, id)` of `row` for `list_urls(after=...)`."""
+        if sort_column not in cls.SORT_COLUMNS:
+            sort_column = cls.DEFAULT_SORT_COLUMN
+        if sort_column == "date_processed":
+            return (_to_epoch(row.date_processed or row.date_added), row.id)
+        if sort_column == "date_added":
+            return (_to_epoch(row.date_added), row.id)
+        return (getattr(row, sort_column), row.id)
 
     def list_urls(
         self,
         *,
         search: str | None = None,
         tag_id: int | None = None,
+        tags: TagFilter | None = None,
         limit: int = 100,
         offset: int = 0,
+        after: tuple | None = None,
         sort_column: str = "date_processed",
         sort_ascending: bool = False,
     ) -> list[UrlRow]:
         """Return recent URLs for History tab.
 
+        Rows are ordered by the sort column with `id` as tie-breaker, so every row
+        has a unique position and keyset cursors are stable. Archived URLs are
+        included: the query reads `all_urls` and orders by its result columns, so
+        SQLite merges one index walk per tier.
+
         Args:
             search: filters by substring match on URL.
             tag_id: if provided, only return URLs with this tag.
+            tags: tag combination to filter by (combined with `tag_id`).
             limit: max number of results.
-            offset: number of results to skip (for pagination).
-            sort_column: column to sort by (id, url, status, download_count, date_added, date_processed).
+            offset: number of results to skip (for pagination). Cost grows with the offset.
+            after: keyset cursor from `page_cursor()` of the last row already shown;
+                returns the rows that follow it. Costs O(limit) regardless of depth.
+                Takes precedence over `offset`.
+            sort_column: column to sort by (id, url, status, download_count, date_added, date_processed),
+                or RELEVANCE_SORT to rank search hits (best first, ignores sort_ascending).
             sort_ascending: if True, sort ascending; otherwise descending.
         """
         limit = max(1, int(limit))
         offset = max(0, int(offset))
 
-        # Validate and map sort column
-        sql_sort_column = self.SORT_COLUMNS.get(sort_column, "COALESCE(u.date_processed, u.date_added)")
-        sort_direction = "ASC" if sort_ascending else "DESC"
+        tags = self._combine_tag_filter(tag_id, tags)
+        with self._read() as conn:
+            joins, conditions, params = self._filter_sql(conn, search, tags)
+
+            # Validate and map sort column
+            direction = "ASC" if sort_ascending else "DESC"
+            if sort_column == self.RELEVANCE_SORT and joins:
+                if after is not None:
+                    raise ValueError("keyset cursors are not supported with relevance sorting")
+                sort_key = "urls_fts.rank"
+                direction = "ASC"
+            else:
+                sort_key = self.SORT_COLUMNS.get(sort_column, self.SORT_COLUMNS[self.DEFAULT_SORT_COLUMN])
 
-        with self._locked(), self._connect() as conn:
-            # Build query with optional filters
-            base_query = """
+            select = f"""
                 SELECT u.id, u.url, u.status, u.force_redownload, u.check_new_only,
                        u.download_count, u.date_added, u.date_processed, u.last_error,
-                       u.skipped_count,
-                       (SELECT GROUP_CONCAT(t.name, ', ')
-                        FROM url_tags ut
-                        JOIN tags t ON ut.tag_id = t.id
-                        WHERE ut.url_id = u.id
-                        ORDER BY t.name) AS tag_names
-                FROM urls u
-            """
-            conditions = []
-            params: list = []
-
-            if search and search.strip():
-                conditions.append("u.url LIKE ?")
-                params.append(f"%{search.strip()}%")
+                       u.skipped_count, u.priority, {sort_key} AS sort_key
+                FROM all_urls u{joins}
+            """
 
-            if tag_id is not None:
-                conditions.append("EXISTS (SELECT 1 FROM url_tags ut WHERE ut.url_id = u.id AND ut.tag_id = ?)")
-                params.append(int(tag_id))
+            def where(extra: list[str]) -> str:
+                return " WHERE " + " AND ".join(conditions + extra) if conditions or extra else ""
 
-            if conditions:
-                base_query += " WHERE " + " AND ".join(conditions)
-
-            base_query += f" ORDER BY {sql_sort_column} {sort_direction} LIMIT ? OFFSET ?;"
-            params.append(limit)
-            params.append(offset)
-
-            rows = conn.execute(base_query, params).fetchall()
-
-            return [
-                UrlRow(
-                    id=int(r[0]),
-                    url=str(r[1]),
-                    status=int(r[2]),
-                    force_redownload=int(r[3]),
-                    check_new_only=int(r[4]),
-                    download_count=int(r[5]),
-                    date_added=str(r[6]),
-                    date_processed=r[7],
-                    last_error=r[8],
-                    skipped_count=int(r[9]) if r[9] is not None else 0,
-                    tags=tuple(r[10].split(", ")) if r[10] else (),
+            if after is None:
+                query = select + where([]) + f" ORDER BY sort_key {direction}, u.id {direction} LIMIT ? OFFSET ?;"
+                query_params = params + [limit, offset]
+            else:
+                # Split the seek in two so each half is an index range: rows tied with
+                # the cursor's sort value (seeking on id), then rows strictly beyond it.
+                # A single (key, id) < (?, ?) row-value test only seeks on the key and
+                # walks every tied row, which is O(n) for low-cardinality sorts.
+                sort_value, last_id = after
+                cmp = ">" if sort_ascending else "<"
+                ties = select + where([f"{sort_key} = ?", f"u.id {cmp} ?"]) + f" ORDER BY u.id {direction} LIMIT ?"
+                beyond = (
+                    select
+                    + where([f"{sort_key} {cmp} ?"])
+                    + f" ORDER BY sort_key {direction}, u.id {direction} LIMIT ?"
                 )
-                for r in rows
-            ]
+                query = (
+                    f"SELECT * FROM ({ties}) UNION ALL SELECT * FROM ({beyond})"
+                    f" ORDER BY sort_key {direction}, id {direction} LIMIT ?;"
+                )
+                query_params = params + [sort_value, int(last_id), limit] + params + [sort_value, limit, limit]
+
+            rows = conn.execute(query, query_params).fetchall()
+            # Same read transaction, so tags match the page snapshot.
+            names = self._tag_names_for(conn, [int(r[0]) for r in rows])
+            return [_url_row(r, names.get(int(r[0]), ())) for r in rows]
+
+    @staticmethod
+    def _tag_names_for(conn: sqlite3.Connection, url_ids: list[int]) -> dict[int, tuple[str, ...]]:
+        """Return sorted tag names per URL id, for all of `url_ids` in one query."""
+        if not url_ids:
+            return {}
+        names: dict[int, list[str]] = {}
+        placeholders = ",".join("?" * len(url_ids))
+        for url_id, name in conn.execute(
+            f"""
+            SELECT ut.url_id, t.name
+            FROM url_tags ut
+            JOIN tags t ON ut.tag_id = t.id
+            WHERE ut.url_id IN ({placeholders})
+            ORDER BY ut.url_id, t.name;
+            """,
+            url_ids,
+        ):
+            names.setdefault(int(url_id), []).append(str(name))
+        return {url_id: tuple(tag_names) for url_id, tag_names in names.items()}
 
     def claim_next_pending(self, include_stopped: bool = False) -> UrlRow | None:
         """Atomically claim one pending URL (PENDING -> IN_PROGRESS).
@@ -429,133 +1779,224 @@ class DatabaseManager:
             include_stopped: If True, also claim STOPPED URLs. Use this only when
                             the user explicitly clicks Start, not for auto-refilling.
         """
-        with self._locked(), self._connect() as conn:
-            conn.isolation_level = None
-            conn.execute("BEGIN IMMEDIATE;")
-            if include_stopped:
-                row = conn.execute(
-                    """
-                    SELECT id, url, status, force_redownload, check_new_only, download_count,
-                           date_added, date_processed, last_error, skipped_count
-                    FROM urls
-                    WHERE status IN (?, ?)
-                    ORDER BY id ASC
-                    LIMIT 1;
-                    """,
-                    (UrlStatus.PENDING, UrlStatus.STOPPED),
-                ).fetchone()
-            else:
-                row = conn.execute(
-                    """
-                    SELECT id, url, status, force_redownload, check_new_only, download_count,
-                           date_added, date_processed, last_error, skipped_count
-                    FROM urls
-                    WHERE status = ?
-                    ORDER BY id ASC
-                    LIMIT 1;
-                    """,
-                    (UrlStatus.PENDING,),
-                ).fetchone()
+        rows = self.claim_next_batch(1, include_stopped=include_stopped)
+        return rows[0] if rows else None
 
-            if row is None:
-                conn.execute("COMMIT;")
-                return None
+    def claim_next_batch(self, n: int, include_stopped: bool = False) -> list[UrlRow]:
+        """Atomically claim up to `n` pending URLs (PENDING -> IN_PROGRESS).
 
-            url_id = int(row[0])
-            conn.execute("UPDATE urls SET status = ? WHERE id = ?;", (UrlStatus.IN_PROGRESS, url_id))
-            conn.execute("COMMIT;")
-
-            return UrlRow(
-                id=int(row[0]),
-                url=str(row[1]),
-                status=UrlStatus.IN_PROGRESS,
-                force_redownload=int(row[3]),
-                check_new_only=int(row[4]),
-                download_count=int(row[5]),
-                date_added=str(row[6]),
-                date_processed=row[7],
-                last_error=row[8],
-                skipped_count=int(row[9]) if row[9] is not None else 0,
-            )
+        All rows are claimed in a single write transaction, so filling every free
+        worker slot costs one transaction regardless of the worker count. Each
+        claimed URL is leased to `owner_id` for LEASE_SECONDS (see renew_leases()).
 
-    def mark_completed(self, url_id: int) -> None:
-        with self._locked(), self._connect() as conn:
-            now = datetime.now(timezone.utc).isoformat()
-            conn.execute(
-                """
-                UPDATE urls
-                SET status = ?,
-                    download_count = download_count + 1,
-                    date_processed = ?,
-                    last_error = NULL
-                WHERE id = ?;
-                """,
-                (UrlStatus.COMPLETED, now, url_id),
+        Args:
+            n: maximum number of URLs to claim.
+            include_stopped: If True, also claim STOPPED URLs (see claim_next_pending).
+
+        Returns the claimed rows in queue order, highest priority first, then
+        oldest first (may be fewer than `n`, or empty).
+        """
+        n = int(n)
+        if n <= 0:
+            return []
+
+        statuses = [UrlStatus.PENDING, UrlStatus.STOPPED] if include_stopped else [UrlStatus.PENDING]
+        # Read each status's first `n` ids straight off idx_urls_queue and merge:
+        # `status IN (...)` would sort every queued row in a temp B-tree, where the
+        # merge sorts at most `n` per status.
+        arm = "SELECT id, priority FROM urls WHERE status = ? ORDER BY priority DESC, id LIMIT ?"
+        if len(statuses) == 1:
+            queued = f"SELECT id FROM ({arm})"
+        else:
+            arms = " UNION ALL ".join(f"SELECT * FROM ({arm})" for _ in statuses)
+            queued = f"SELECT id FROM ({arms} ORDER BY priority DESC, id LIMIT ?)"
+        params = [p for status in statuses for p in (status, n)] + ([n] if len(statuses) > 1 else [])
+
+        with self._write() as conn:
+            if _HAS_RETURNING:
+                rows = conn.execute(
+                    f"UPDATE urls SET status = ? WHERE id IN ({queued}) RETURNING {_URL_COLUMNS};",
+                    [UrlStatus.IN_PROGRESS] + params,
+                ).fetchall()
+            else:
+                ids = [r[0] for r in conn.execute(queued + ";", params).fetchall()]
+                if not ids:
+                    return []
+                id_placeholders = ",".join("?" for _ in ids)
+                conn.execute(
+                    f"UPDATE urls SET status = ? WHERE id IN ({id_placeholders});",
+                    [UrlStatus.IN_PROGRESS] + ids,
+                )
+                rows = conn.execute(
+                    f"SELECT {_URL_COLUMNS} FROM urls WHERE id IN ({id_placeholders});",
+                    ids,
+                ).fetchall()
+            expires_at = _to_ms(time.time() + self.LEASE_SECONDS)
+            conn.executemany(
+                "INSERT OR REPLACE INTO leases (url_id, owner, expires_at) VALUES (?, ?, ?);",
+                ((r[0], self.owner_id, expires_at) for r in rows),
             )
+            self._invalidate_rows(r[0] for r in rows)
 
-    def mark_failed(self, url_id: int, error: str) -> None:
-        with self._locked(), self._connect() as conn:
-            conn.execute(
-                "UPDATE urls SET status = ?, last_error = ? WHERE id = ?;",
-                (UrlStatus.FAILED, error, url_id),
+        # RETURNING gives no ordering guarantee; hand rows back in claim order.
+        return sorted((_url_row(r) for r in rows), key=lambda row: (-row.priority, row.id))
+
+    def apply_status_transitions(self, transitions: Iterable[StatusTransition]) -> int:
+        """Apply status transitions in order, all in one write transaction.
+
+        Transitions that carry an Attempt also add it to the `attempts` table.
+        A transition releases this manager's lease on its URL. It is dropped,
+        attempt included, if another owner holds the lease: that owner reclaimed
+        the URL after this one's lease expired.
+
+        Returns the number of rows updated.
+        """
+        transitions = list(transitions)
+        with self._write() as conn:
+            self._invalidate_rows(t.url_id for t in transitions)
+            updated = 0
+            for t in transitions:
+                cur = conn.execute(
+                    """
+                    UPDATE urls
+                    SET status = ?1,
+                        last_error = ?2,
+                        download_count = download_count + ?3,
+                        date_processed = COALESCE(?4, date_processed),
+                        skipped_count = COALESCE(?5, skipped_count)
+                    WHERE id = ?6 AND NOT EXISTS (SELECT 1 FROM leases WHERE url_id = ?6 AND owner != ?7);
+                    """,
+                    (
+                        t.status,
+                        t.last_error,
+                        1 if t.date_processed is not None else 0,
+                        t.date_processed,
+                        t.skipped_count,
+                        t.url_id,
+                        self.owner_id,
+                    ),
+                )
+                # A dropped transition's run isn't this owner's to record.
+                if cur.rowcount <= 0:
+                    continue
+                updated += 1
+                if t.attempt is not None:
+                    conn.execute(
+                        """
+                        INSERT INTO attempts (
+                            url_id, status, claimed_at, started_at, first_output_at, finished_at,
+                            exit_code, failure_lines
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                        """,
+                        (
+                            t.url_id,
+                            t.status,
+                            _to_ms(t.attempt.claimed_at),
+                            _to_ms(t.attempt.started_at),
+                            _to_ms(t.attempt.first_output_at),
+                            _to_ms(t.attempt.finished_at),
+                            t.attempt.exit_code,
+                            int(t.attempt.failure_lines),
+                        ),
+                    )
+            if updated < len(transitions):
+                logger.warning(
+                    "Dropped %d status change(s) for URLs leased by another owner", len(transitions) - updated
+                )
+            conn.executemany(
+                "DELETE FROM leases WHERE url_id = ? AND owner = ?;", ((t.url_id, self.owner_id) for t in transitions)
             )
+            return updated
+
+    def mark_completed(self, url_id: int, *, attempt: Attempt | None = None) -> None:
+        self.apply_status_transitions([StatusTransition.completed(url_id, attempt=attempt)])
 
-    def mark_pending(self, url_id: int) -> None:
+    def mark_failed(self, url_id: int, error: str, *, attempt: Attempt | None = None) -> None:
+        self.apply_status_transitions([StatusTransition.failed(url_id, error, attempt=attempt)])
+
+    def mark_pending(self, url_id: int, *, attempt: Attempt | None = None) -> None:
         """Mark a URL as pending (put it back in the queue)."""
-        with self._locked(), self._connect() as conn:
-            conn.execute(
-                "UPDATE urls SET status = ?, last_error = NULL WHERE id = ?;",
-                (UrlStatus.PENDING, url_id),
-            )
+        self.apply_status_transitions([StatusTransition.pending(url_id, attempt=attempt)])
 
-    def mark_stopped(self, url_id: int) -> None:
+    def mark_stopped(self, url_id: int, *, attempt: Attempt | None = None) -> None:
         """Mark a URL as stopped (user manually stopped the download)."""
-        with self._locked(), self._connect() as conn:
-            conn.execute(
-                "UPDATE urls SET status = ?, last_error = ? WHERE id = ?;",
-                (UrlStatus.STOPPED, "Stopped by user", url_id),
-            )
+        self.apply_status_transitions([StatusTransition.stopped(url_id, attempt=attempt)])
 
-    def mark_skipped(self, url_id: int) -> None:
+    def mark_skipped(self, url_id: int, *, attempt: Attempt | None = None) -> None:
         """Mark a URL as skipped (user chose to skip this download)."""
-        with self._locked(), self._connect() as conn:
-            conn.execute(
-                "UPDATE urls SET status = ?, last_error = ? WHERE id = ?;",
-                (UrlStatus.SKIPPED, "Skipped by user", url_id),
-            )
+        self.apply_status_transitions([StatusTransition.skipped(url_id, attempt=attempt)])
 
-    def mark_completed_partial(self, url_id: int, skipped_count: int, errors: str | None = None) -> None:
+    def mark_completed_partial(
+        self, url_id: int, skipped_count: int, errors: str | None = None, *, attempt: Attempt | None = None
+    ) -> None:
         """Mark a URL as completed with partial failures (some files skipped)."""
-        with self._locked(), self._connect() as conn:
-            now = datetime.now(timezone.utc).isoformat()
-            conn.execute(
-                """
-                UPDATE urls
-                SET status = ?,
-                    download_count = download_count + 1,
-                    date_processed = ?,
-                    skipped_count = ?,
-                    last_error = ?
-                WHERE id = ?;
-                """,
-                (UrlStatus.COMPLETED_PARTIAL, now, skipped_count, errors, url_id),
-            )
+        self.apply_status_transitions(
+            [StatusTransition.completed_partial(url_id, skipped_count, errors, attempt=attempt)]
+        )
 
-    def reset_in_progress_to_stopped(self) -> int:
-        """Reset any IN_PROGRESS URLs to STOPPED status.
+    def reset_in_progress_to_stopped(self, *, startup: bool = False) -> int:
+        """Reset IN_PROGRESS URLs whose lease has expired to STOPPED status.
 
-        This should be called on startup to handle URLs that were left in progress
-        when the app was closed or crashed.
+        This should be called on startup, and periodically after, to handle URLs
+        that were left in progress when an app instance was closed or crashed.
+        URLs still leased, by this or another running instance, are left alone.
+
+        With `startup`, leases held by other owners on this host count as expired
+        too: they belong to an earlier run of the app that crashed, so waiting for
+        them to run out would leave its URLs stuck until the next periodic reset.
 
         Returns the number of URLs that were reset.
         """
-        with self._locked(), self._connect() as conn:
+        started = time.perf_counter()
+        params = {
+            "now": _to_ms(time.time()),
+            "owner": self.owner_id,
+            "host": f"{socket.gethostname()}:" if startup else None,
+        }
+        live = """
+            expires_at > :now
+            AND (:host IS NULL OR owner = :owner OR substr(owner, 1, length(:host)) != :host)
+        """
+        with self._write() as conn:
+            self._invalidate_rows()
             cur = conn.execute(
-                "UPDATE urls SET status = ?, last_error = ? WHERE status = ?;",
-                (UrlStatus.STOPPED, "Interrupted - app was closed", UrlStatus.IN_PROGRESS),
+                f"""
+                UPDATE urls SET status = :stopped, last_error = :error
+                WHERE status = :in_progress AND id NOT IN (SELECT url_id FROM leases WHERE {live});
+                """,
+                {
+                    **params,
+                    "stopped": UrlStatus.STOPPED,
+                    "error": "Interrupted - app was closed",
+                    "in_progress": UrlStatus.IN_PROGRESS,
+                },
             )
+            conn.execute(f"DELETE FROM leases WHERE NOT ({live});", params)
+            self._log_maintenance(conn, "reclaim_leases", started, f"{cur.rowcount} URL(s) reset")
             return cur.rowcount
 
+    def renew_leases(self) -> int:
+        """Extend every lease held by `owner_id` to LEASE_SECONDS from now.
+
+        Call this well within LEASE_SECONDS for as long as claimed URLs are being
+        downloaded. Returns the number of leases renewed; a lease that expired and
+        was reset by another instance is not renewed.
+        """
+        with self._write() as conn:
+            cur = conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE owner = ?;",
+                (_to_ms(time.time() + self.LEASE_SECONDS), self.owner_id),
+            )
+            return int(cur.rowcount)
+
+    def list_leases(self) -> dict[int, tuple[str, float]]:
+        """Return `{url_id: (owner, expires_at)}` for every claimed URL, expiry in epoch seconds."""
+        with self._read() as conn:
+            return {
+                int(url_id): (owner, _from_ms(expires_at))
+                for url_id, owner, expires_at in conn.execute("SELECT url_id, owner, expires_at FROM leases;")
+            }
+
     def delete_url(self, url_id: int) -> bool:
         """Delete a URL row from the database.
 
@@ -564,8 +2005,8 @@ class DatabaseManager:
         Raises:
             RuntimeError: if the row is currently in progress.
         """
-        with self._locked(), self._connect() as conn:
-            row = conn.execute("SELECT status FROM urls WHERE id = ? LIMIT 1;", (int(url_id),)).fetchone()
+        with self._write() as conn:
+            row = conn.execute("SELECT status FROM all_urls WHERE id = ? LIMIT 1;", (int(url_id),)).fetchone()
             if row is None:
                 return False
 
@@ -573,8 +2014,10 @@ class DatabaseManager:
             if status == UrlStatus.IN_PROGRESS:
                 raise RuntimeError("Cannot remove a URL while it is downloading")
 
-            cur = conn.execute("DELETE FROM urls WHERE id = ?;", (int(url_id),))
-            return int(cur.rowcount) > 0
+            self._invalidate_rows([url_id])
+            deleted = conn.execute("DELETE FROM urls WHERE id = ?;", (int(url_id),)).rowcount
+            deleted += conn.execute("DELETE FROM urls_history WHERE id = ?;", (int(url_id),)).rowcount
+            return deleted > 0
 
     def get_statistics(self) -> dict:
         """Get comprehensive database statistics.
@@ -585,33 +2028,78 @@ class DatabaseManager:
             - total_downloads: sum of all download_count
             - date_range: (oldest_date, newest_date) or (None, None)
         """
-        with self._locked(), self._connect() as conn:
-            total = conn.execute("SELECT COUNT(*) FROM urls;").fetchone()[0]
-
-            by_status = {}
-            for status_val in (
-                UrlStatus.PENDING,
-                UrlStatus.IN_PROGRESS,
-                UrlStatus.COMPLETED,
-                UrlStatus.FAILED,
-                UrlStatus.STOPPED,
-                UrlStatus.COMPLETED_PARTIAL,
-                UrlStatus.SKIPPED,
-            ):
-                count = conn.execute("SELECT COUNT(*) FROM urls WHERE status = ?;", (status_val,)).fetchone()[0]
-                by_status[status_val] = int(count)
-
-            total_downloads = conn.execute("SELECT COALESCE(SUM(download_count), 0) FROM urls;").fetchone()[0]
-
-            oldest = conn.execute("SELECT MIN(date_added) FROM urls;").fetchone()[0]
-            newest = conn.execute("SELECT MAX(COALESCE(date_processed, date_added)) FROM urls;").fetchone()[0]
+        with self._read() as conn:
+            by_status = {
+                status_val: 0
+                for status_val in (
+                    UrlStatus.PENDING,
+                    UrlStatus.IN_PROGRESS,
+                    UrlStatus.COMPLETED,
+                    UrlStatus.FAILED,
+                    UrlStatus.STOPPED,
+                    UrlStatus.COMPLETED_PARTIAL,
+                    UrlStatus.SKIPPED,
+                )
+            }
+            total_downloads = 0
+            for status_val, count, downloads in conn.execute(
+                "SELECT status, url_count, download_total FROM status_counts;"
+            ).fetchall():
+                by_status[int(status_val)] = int(count)
+                total_downloads += int(downloads)
+
+            # MIN/MAX on indexed columns are single index lookups, per tier. A row is
+            # never processed before it was added, so the newest COALESCE(date_processed,
+            # date_added) is the largest of the column maxima.
+            oldest: list = []
+            newest: list = []
+            for table in ("urls", "urls_history"):
+                first_added, last_added, last_processed = conn.execute(
+                    f"""
+                    SELECT (SELECT MIN(date_added) FROM {table}),
+                           (SELECT MAX(date_added) FROM {table}),
+                           (SELECT MAX(date_processed) FROM {table});
+                    """
+                ).fetchone()
+                oldest.append(first_added)
+                newest.extend((last_added, last_processed))
+            oldest = min((d for d in oldest if d is not None), default=None)
+            newest = max((d for d in newest if d is not None), default=None)
 
             return {
-                "total": int(total),
+                "total": sum(by_status.values()),
                 "by_status": by_status,
-                "total_downloads": int(total_downloads),
-                "date_range": (oldest, newest),
+                "total_downloads": total_downloads,
+                "date_range": (_from_epoch(oldest), _from_epoch(newest)),
+            }
+
+    def verify_status_counts(self, *, repair: bool = True) -> bool:
+        """Check the `status_counts` summary table against a full count of both URL tiers.
+
+        Returns True if the table was consistent. When it has drifted (e.g. rows
+        changed by a tool that bypassed the triggers) and `repair` is True, the
+        table is rebuilt from them.
+        """
+        started = time.perf_counter()
+        with self._write() as conn:
+            actual = {
+                int(status): (int(count), int(downloads))
+                for status, count, downloads in conn.execute(
+                    "SELECT status, COUNT(*), COALESCE(SUM(download_count), 0) FROM all_urls GROUP BY status;"
+                ).fetchall()
             }
+            stored = {
+                int(status): (int(count), int(downloads))
+                for status, count, downloads in conn.execute(
+                    "SELECT status, url_count, download_total FROM status_counts;"
+                ).fetchall()
+                if count or downloads
+            }
+            consistent = actual == stored
+            if not consistent and repair:
+                self._rebuild_status_counts(conn, "all_urls")
+            self._log_maintenance(conn, "verify_counts", started, "ok" if consistent else "drifted")
+            return consistent
 
     def clear_by_status(self, status: int) -> int:
         """Delete all URLs with the given status.
@@ -624,16 +2112,19 @@ class DatabaseManager:
         if status == UrlStatus.IN_PROGRESS:
             raise RuntimeError("Cannot clear URLs that are currently downloading")
 
-        with self._locked(), self._connect() as conn:
-            cur = conn.execute("DELETE FROM urls WHERE status = ?;", (status,))
-            return int(cur.rowcount)
+        with self._write() as conn:
+            self._invalidate_rows()
+            deleted = conn.execute("DELETE FROM urls WHERE status = ?;", (status,)).rowcount
+            deleted += conn.execute("DELETE FROM urls_history WHERE status = ?;", (status,)).rowcount
+            return int(deleted)
 
     def retry_all_failed(self) -> int:
         """Reset all FAILED URLs to PENDING status for retry.
 
         Returns the number of URLs reset.
         """
-        with self._locked(), self._connect() as conn:
+        with self._write() as conn:
+            self._invalidate_rows()
             cur = conn.execute(
                 "UPDATE urls SET status = ?, last_error = NULL WHERE status = ?;",
                 (UrlStatus.PENDING, UrlStatus.FAILED),
@@ -641,32 +2132,236 @@ class DatabaseManager:
             return int(cur.rowcount)
 
     def clear_all(self) -> int:
-        """Delete all URLs from the database.
+        """Delete all URLs from the database, archived ones included.
 
         Returns the number of rows deleted.
 
         Raises:
             RuntimeError: if any URLs are currently IN_PROGRESS.
         """
-        with self._locked(), self._connect() as conn:
+        with self._write() as conn:
             in_progress = conn.execute(
                 "SELECT COUNT(*) FROM urls WHERE status = ?;", (UrlStatus.IN_PROGRESS,)
             ).fetchone()[0]
             if in_progress > 0:
                 raise RuntimeError(f"Cannot clear database while {in_progress} downloads are in progress")
 
-            cur = conn.execute("DELETE FROM urls;")
-            return int(cur.rowcount)
+            self._invalidate_rows()
+            deleted = conn.execute("DELETE FROM urls;").rowcount
+            deleted += conn.execute("DELETE FROM urls_history;").rowcount
+            return int(deleted)
 
     def vacuum(self) -> None:
-        """Compact the database file to reclaim space."""
+        """Compact the database file to reclaim space.
+
+        Also verifies the status counters and rebuilds them if they have drifted,
+        and switches databases created without incremental auto-vacuum over to it.
+        Rewrites the whole file under the write lock; the maintenance scheduler
+        uses incremental_vacuum() instead.
+        """
+        self.verify_status_counts()
+        started = time.perf_counter()
+        size_before = self.get_file_size()
         with self._locked():
-            # VACUUM must run outside a transaction
-            conn = sqlite3.connect(self.db_path)
-            try:
-                conn.execute("VACUUM;")
-            finally:
-                conn.close()
+            # VACUUM must run outside a transaction; pooled connections are always
+            # committed between calls, so this thread's connection is safe to use.
+            conn = self._connection()
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+            conn.execute("VACUUM;")
+        with self._write() as conn:
+            self._log_maintenance(conn, "vacuum", started, f"{size_before - self.get_file_size()} bytes freed")
+
+    def checkpoint_wal(self) -> bool:
+        """Copy the write-ahead log into the database file and truncate it.
+
+        Returns False if a reader kept the checkpoint from finishing within
+        CHECKPOINT_BUSY_TIMEOUT; the WAL is then left for the next attempt. The
+        write mutex is not held: SQLite's own locks keep writers out while the log
+        is copied, so writers in this process wait at most for that, not for the
+        checkpoint's wait on readers.
+        """
+        started = time.perf_counter()
+        wal_path = self.db_path.with_name(self.db_path.name + "-wal")
+        wal_size = wal_path.stat().st_size if wal_path.exists() else 0
+        conn = self._connection()
+        conn.execute(f"PRAGMA busy_timeout = {int(self.CHECKPOINT_BUSY_TIMEOUT * 1000)};")
+        try:
+            busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE);").fetchone()[0]
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {int(self.BUSY_TIMEOUT * 1000)};")
+        detail = "blocked by a reader" if busy else f"{wal_size} bytes of WAL"
+        with self._write() as conn:
+            self._log_maintenance(conn, "checkpoint", started, detail)
+        return not busy
+
+    def optimize(self) -> None:
+        """Refresh the query planner's statistics.
+
+        Runs ANALYZE sampling at most ANALYSIS_LIMIT rows per index, so it stays
+        quick on large tables, followed by `PRAGMA optimize`.
+        """
+        started = time.perf_counter()
+        with self._locked():
+            conn = self._connection()
+            conn.execute(f"PRAGMA analysis_limit = {int(self.ANALYSIS_LIMIT)};")
+            conn.execute("ANALYZE;")
+            conn.execute("PRAGMA optimize;")
+            conn.commit()
+        with self._write() as conn:
+            self._log_maintenance(conn, "optimize", started)
+
+    def incremental_vacuum(self, max_pages: int) -> int:
+        """Return up to `max_pages` free pages to the file system.
+
+        Each call is one short write transaction, so large reclaims can be spread
+        over many calls. Does nothing (returns 0) until incremental auto-vacuum is
+        enabled; see vacuum(). Returns the number of pages freed.
+        """
+        max_pages = int(max_pages)
+        if max_pages <= 0 or self.page_usage()["auto_vacuum"] != "incremental":
+            return 0
+        started = time.perf_counter()
+        with self._write() as conn:
+            before = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+            # Pages are freed one per step, so the statement has to be stepped to the end.
+            conn.execute(f"PRAGMA incremental_vacuum({max_pages});").fetchall()
+            freed = int(before) - int(conn.execute("PRAGMA freelist_count;").fetchone()[0])
+            if freed > 0:
+                self._log_maintenance(conn, "incremental_vacuum", started, f"{freed} page(s)")
+        return freed
+
+    def page_usage(self) -> dict:
+        """Return the file's page layout.
+
+        Keys: page_size, page_count, free_pages, auto_vacuum ("none", "full" or "incremental").
+        """
+        with self._read() as conn:
+            page_size, page_count, free_pages, auto_vacuum = conn.execute(
+                """
+                SELECT (SELECT page_size FROM pragma_page_size),
+                       (SELECT page_count FROM pragma_page_count),
+                       (SELECT freelist_count FROM pragma_freelist_count),
+                       (SELECT auto_vacuum FROM pragma_auto_vacuum);
+                """
+            ).fetchone()
+        return {
+            "page_size": int(page_size),
+            "page_count": int(page_count),
+            "free_pages": int(free_pages),
+            "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(int(auto_vacuum), "none"),
+        }
+
+    def maintenance_log(self) -> dict[str, dict]:
+        """Return the last run of each maintenance task, keyed by task name.
+
+        Tasks: checkpoint, optimize, incremental_vacuum, verify_counts, prune_attempts, vacuum.
+        Values have last_run (ISO 8601), duration_ms and detail (a summary or None).
+        """
+        with self._read() as conn:
+            rows = conn.execute("SELECT task, last_run, duration_ms, detail FROM maintenance_log;").fetchall()
+        return {
+            task: {"last_run": _from_epoch(last_run), "duration_ms": int(duration_ms), "detail": detail}
+            for task, last_run, duration_ms, detail in rows
+        }
+
+    @staticmethod
+    def _log_maintenance(conn: sqlite3.Connection, task: str, started: float, detail: str | None = None) -> None:
+        """Record a maintenance run that began at `started` (a perf_counter() value)."""
+        conn.execute(
+            "INSERT OR REPLACE INTO maintenance_log (task, last_run, duration_ms, detail) VALUES (?, ?, ?, ?);",
+            (task, _now_epoch(), int((time.perf_counter() - started) * 1000), detail),
+        )
+
+    @property
+    def backup_dir(self) -> Path:
+        """Default folder for backup_snapshot(): `backups` next to the database."""
+        return self.db_path.parent / "backups"
+
+    def backup(
+        self,
+        file_path: Path,
+        *,
+        pages_per_step: int | None = None,
+        progress: Callable[[int, int], bool | None] | None = None,
+    ) -> bool:
+        """Write a consistent copy of the database to `file_path` while it stays in use.
+
+        Uses SQLite's online backup API inside one read transaction, so the copy is
+        the database as of the start and, WAL readers never blocking writers,
+        downloads keep committing meanwhile. Pages are copied `pages_per_step` at a
+        time. The copy is checked with `quick_check`, switched to a rollback journal
+        so it is a single self-contained file, and renamed into place.
+
+        Args:
+            progress: called after each step with (pages_copied, total_pages).
+                Returning False cancels the backup and no file is left behind.
+
+        Returns True once written, False if cancelled.
+        """
+        pages_per_step = max(1, pages_per_step or self.BACKUP_PAGES_PER_STEP)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = file_path.with_name(file_path.name + ".part")
+
+        def report(_status: int, remaining: int, total: int) -> None:
+            if progress is not None and progress(total - remaining, total) is False:
+                raise _Cancelled
+
+        def remove_part() -> None:
+            for suffix in ("", "-wal", "-shm"):
+                part_path.with_name(part_path.name + suffix).unlink(missing_ok=True)
+
+        remove_part()
+        target = sqlite3.connect(part_path)
+        try:
+            with self._read() as conn:
+                # The first read fixes the snapshot that every backup step copies from.
+                conn.execute("SELECT COUNT(*) FROM sqlite_master;").fetchone()
+                conn.backup(target, pages=pages_per_step, progress=report)
+            (check,) = target.execute("PRAGMA quick_check;").fetchone()
+            if check != "ok":
+                raise sqlite3.DatabaseError(f"Backup failed its integrity check: {check}")
+            target.execute("PRAGMA journal_mode = DELETE;")
+            target.close()
+            part_path.replace(file_path)
+        except _Cancelled:
+            target.close()
+            remove_part()
+            return False
+        except BaseException:
+            target.close()
+            remove_part()
+            raise
+        return True
+
+    def backup_snapshot(
+        self,
+        directory: Path | None = None,
+        *,
+        keep: int | None = None,
+        progress: Callable[[int, int], bool | None] | None = None,
+    ) -> Path | None:
+        """Back up to a new timestamped file in `directory` (default backup_dir).
+
+        Once it is written, snapshots beyond the newest `keep` (default BACKUP_KEEP)
+        are deleted. Returns the new snapshot's path, or None if cancelled.
+        """
+        directory = directory or self.backup_dir
+        keep = max(1, self.BACKUP_KEEP if keep is None else int(keep))
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = directory / f"{self.db_path.stem}-{stamp}.db"
+        if not self.backup(path, progress=progress):
+            return None
+        for old in self.list_snapshots(directory)[keep:]:
+            old.unlink(missing_ok=True)
+        return path
+
+    def list_snapshots(self, directory: Path | None = None) -> list[Path]:
+        """Return the snapshots backup_snapshot() wrote to `directory`, newest first."""
+        directory = directory or self.backup_dir
+        if not directory.is_dir():
+            return []
+        pattern = re.compile(re.escape(self.db_path.stem) + r"-\d{8}-\d{6}-\d{6}\.db")
+        return sorted((p for p in directory.iterdir() if pattern.fullmatch(p.name)), reverse=True)
 
     def get_file_size(self) -> int:
         """Return the database file size in bytes."""
@@ -683,59 +2378,334 @@ class DatabaseManager:
 
         Returns the number of URLs exported.
         """
-        with self._locked(), self._connect() as conn:
+        with self._read() as conn:
             if include_all:
-                rows = conn.execute("SELECT url FROM urls ORDER BY id ASC;").fetchall()
+                rows = conn.execute("SELECT url FROM all_urls ORDER BY id ASC;")
             else:
                 rows = conn.execute(
-                    "SELECT url FROM urls WHERE status IN (?, ?) ORDER BY id ASC;",
+                    "SELECT url FROM all_urls WHERE status IN (?, ?) ORDER BY id ASC;",
                     (UrlStatus.COMPLETED, UrlStatus.COMPLETED_PARTIAL),
-                ).fetchall()
+                )
 
+            # Stream from the cursor; reads hold no lock, so writers are not blocked.
+            count = 0
             file_path.parent.mkdir(parents=True, exist_ok=True)
             with open(file_path, "w", encoding="utf-8") as f:
                 for (url,) in rows:
                     f.write(f"{url}\n")
+                    count += 1
+
+            return count
+
+    def export_queue(
+        self,
+        file_path: Path,
+        *,
+        batch_size: int | None = None,
+        progress: Callable[[int, int], bool | None] | None = None,
+    ) -> int:
+        """Export every URL with all of its fields and tags.
+
+        The format follows the suffix (see `queue_file_format()`): JSON Lines with one
+        object per URL, or CSV with a header row and tags as a JSON array. Rows are
+        streamed from one read transaction in `batch_size` batches, so the file is a
+        consistent snapshot and writers are never blocked. The file is written next
+        to `file_path` and renamed into place when complete.
 
-            return len(rows)
+        Args:
+            progress: called after each batch with (rows_written, total_rows).
+                Returning False cancels the export and no file is left behind.
+
+        Returns the number of URLs exported.
+        """
+        file_format = queue_file_format(file_path)
+        if file_format is None:
+            raise ValueError(f"Unsupported export format: {file_path.name}")
+        fmt, gzipped = file_format
+        batch_size = max(1, batch_size or self.EXPORT_BATCH_SIZE)
+
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = file_path.with_name(file_path.name + ".part")
+        written = 0
+        try:
+            with self._read() as conn, open(part_path, "wb") as raw:
+                binary = gzip.GzipFile(fileobj=raw, mode="wb") if gzipped else raw
+                with io.TextIOWrapper(binary, encoding="utf-8", newline="") as f:
+                    (total,) = conn.execute("SELECT COALESCE(SUM(url_count), 0) FROM status_counts;").fetchone()
+                    writer = csv.writer(f) if fmt == "csv" else None
+                    if writer:
+                        writer.writerow(_EXPORT_FIELDS)
+
+                    cursor = conn.execute(f"SELECT {_URL_COLUMNS} FROM all_urls ORDER BY id ASC;")
+                    while rows := cursor.fetchmany(batch_size):
+                        tags = self._tag_names_for(conn, [int(r[0]) for r in rows])
+                        for r in rows:
+                            # Dates leave as ISO strings, like UrlRow, so files stay readable.
+                            record = (
+                                *r[1:6],
+                                _from_epoch(r[6]),
+                                _from_epoch(r[7]),
+                                *r[8:],
+                                list(tags.get(int(r[0]), ())),
+                            )
+                            if writer:
+                                writer.writerow([*record[:-1], json.dumps(record[-1], ensure_ascii=False)])
+                            else:
+                                f.write(json.dumps(dict(zip(_EXPORT_FIELDS, record)), ensure_ascii=False))
+                                f.write("\n")
+                        written += len(rows)
+                        if progress is not None and progress(written, max(total, written)) is False:
+                            raise _Cancelled
+            part_path.replace(file_path)
+        except _Cancelled:
+            part_path.unlink(missing_ok=True)
+            return 0
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
 
-    def import_urls(self, file_path: Path) -> tuple[int, int]:
+        return written
+
+    def import_urls(
+        self,
+        file_path: Path,
+        *,
+        chunk_size: int | None = None,
+        progress: Callable[[int, int], bool | None] | None = None,
+    ) -> tuple[int, int]:
         """Import URLs from a text file (one per line).
 
+        The file is streamed, so memory use does not depend on its size. URLs are
+        inserted `chunk_size` lines at a time, each chunk in its own short write
+        transaction.
+
+        Args:
+            chunk_size: lines per transaction (default IMPORT_CHUNK_SIZE).
+            progress: called after each chunk with (bytes_read, total_bytes).
+                Returning False cancels the import; chunks already committed are kept.
+
         Returns (added_count, skipped_count) - skipped are duplicates.
         """
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
+        chunk_size = max(1, chunk_size or self.IMPORT_CHUNK_SIZE)
+        total_bytes = file_path.stat().st_size
+        bytes_read = 0
         added = 0
         skipped = 0
-        now = datetime.now(timezone.utc).isoformat()
-
-        with self._locked(), self._connect() as conn:
-            for line in lines:
-                url = line.strip()
+        batch: list[str] = []
+
+        def flush() -> bool:
+            nonlocal added, skipped
+            if batch:
+                now = _now_epoch()
+                rows = [(url, UrlStatus.PENDING, 0, 0, 0, now, None, None, 0, 0, url_key(url)) for url in batch]
+                self._prepare_url_filter()
+                with self._write() as conn:
+                    inserted = self._insert_url_rows(conn, rows)
+                added += inserted
+                skipped += len(batch) - inserted
+                batch.clear()
+            return progress is None or progress(bytes_read, total_bytes) is not False
+
+        with open(file_path, "rb") as f:
+            for raw in f:
+                bytes_read += len(raw)
+                url = raw.decode("utf-8").strip().lstrip("\ufeff")
                 if not url or url.startswith("#"):
                     continue
+                batch.append(url)
+                if len(batch) >= chunk_size and not flush():
+                    return added, skipped
+            flush()
 
-                try:
-                    conn.execute(
-                        """
-                        INSERT INTO urls (
-                            url, status, force_redownload, check_new_only,
-                            download_count, date_added, date_processed, last_error
-                        ) VALUES (?, ?, 0, 0, 0, ?, NULL, NULL);
-                        """,
-                        (url, UrlStatus.PENDING, now),
-                    )
-                    added += 1
-                except sqlite3.IntegrityError:
-                    skipped += 1
+        return added, skipped
+
+    def import_queue(
+        self,
+        file_path: Path,
+        *,
+        chunk_size: int | None = None,
+        progress: Callable[[int, int], bool | None] | None = None,
+    ) -> tuple[int, int]:
+        """Import a file written by export_queue(), restoring every field and tag.
+
+        URLs already in the database (by normalized key) are left as they are but still receive the
+        file's tags; missing tags are created. URLs exported while IN_PROGRESS are
+        restored as STOPPED, since no worker here owns them. Records are inserted
+        `chunk_size` at a time, each chunk in its own write transaction.
+
+        Args:
+            progress: called after each chunk with (bytes_read, total_bytes).
+                Returning False cancels the import; chunks already committed are kept.
+
+        Returns (added_count, skipped_count) - skipped are duplicates.
+        """
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        file_format = queue_file_format(file_path)
+        if file_format is None:
+            raise ValueError(f"Unsupported import format: {file_path.name}")
+        fmt, gzipped = file_format
+        chunk_size = max(1, chunk_size or self.IMPORT_CHUNK_SIZE)
+        total_bytes = file_path.stat().st_size
+
+        added = 0
+        skipped = 0
+        batch: list[tuple] = []
+        batch_tags: list[tuple[int, str]] = []
+
+        def flush(bytes_read: int) -> bool:
+            nonlocal added, skipped
+            if batch:
+                now = datetime.now(timezone.utc).isoformat()
+                self._prepare_url_filter()
+                with self._write() as conn:
+                    inserted = self._insert_url_rows(conn, batch)
+                    if batch_tags:
+                        conn.executemany(
+                            "INSERT OR IGNORE INTO tags (name, date_created) VALUES (?, ?);",
+                            ((name, now) for name in {name for _key, name in batch_tags}),
+                        )
+                        conn.executemany(
+                            """
+                            INSERT OR IGNORE INTO url_tags (url_id, tag_id, date_assigned)
+                            SELECT u.id, t.id, ? FROM all_urls u, tags t WHERE u.url_key = ? AND t.name = ?;
+                            """,
+                            ((now, key, name) for key, name in batch_tags),
+                        )
+                added += inserted
+                skipped += len(batch) - inserted
+                batch.clear()
+                batch_tags.clear()
+            return progress is None or progress(bytes_read, total_bytes) is not False
+
+        with open(file_path, "rb") as raw:
+            binary = gzip.GzipFile(fileobj=raw, mode="rb") if gzipped else raw
+            with io.TextIOWrapper(binary, encoding="utf-8-sig", newline="") as f:
+                if fmt == "csv":
+                    records = csv.DictReader(f)
+                else:
+                    records = (json.loads(line) for line in f if line.strip())
+                for record in records:
+                    row, tags = self._queue_record(record)
+                    batch.append(row)
+                    batch_tags.extend((row[-1], name) for name in tags)
+                    if len(batch) >= chunk_size and not flush(raw.tell()):
+                        return added, skipped
+                flush(raw.tell())
+
+        return added, skipped
 
+    def add_urls(
+        self, urls: Iterable[str], *, completed: bool = False, chunk_size: int | None = None
+    ) -> tuple[int, int]:
+        """Add many URLs at once, `chunk_size` per write transaction (default IMPORT_CHUNK_SIZE).
+
+        Like add_url(), URLs that are stored already (by normalized key) are skipped.
+        With `completed`, the URLs are recorded as downloaded once, e.g. when they
+        come from a gallery-dl archive.
+
+        Returns (added_count, skipped_count).
+        """
+        chunk_size = max(1, chunk_size or self.IMPORT_CHUNK_SIZE)
+        status = UrlStatus.COMPLETED if completed else UrlStatus.PENDING
+        added = 0
+        skipped = 0
+        batch: list[str] = []
+
+        def flush() -> None:
+            nonlocal added, skipped
+            now = _now_epoch()
+            rows = [
+                (url, status, 0, 0, int(completed), now, now if completed else None, None, 0, 0, url_key(url))
+                for url in batch
+            ]
+            self._prepare_url_filter()
+            with self._write() as conn:
+                inserted = self._insert_url_rows(conn, rows)
+            added += inserted
+            skipped += len(batch) - inserted
+            batch.clear()
+
+        for url in urls:
+            url = url.strip()
+            if not url:
+                continue
+            batch.append(url)
+            if len(batch) >= chunk_size:
+                flush()
+        if batch:
+            flush()
         return added, skipped
 
+    def _insert_url_rows(self, conn: sqlite3.Connection, rows: list[tuple]) -> int:
+        """Insert `urls` rows (values in `_URL_COLUMNS` order without id, then url_key), skipping duplicates.
+
+        A URL is a duplicate if its url_key is stored already or appears earlier in
+        `rows`. Keys the Bloom filter has never seen are inserted without probing
+        the url_key index; the rest are checked with NOT EXISTS. Returns the number
+        of rows inserted.
+        """
+        unique: dict[int, tuple] = {}
+        for row in rows:
+            unique.setdefault(row[-1], row)
+        url_filter = self._sync_url_filter(conn)
+        # ?12 is 1 for keys the filter has never seen; SQLite then skips the NOT EXISTS probe.
+        # Rows inserted earlier in the chunk are visible to later probes.
+        inserted = conn.executemany(
+            f"""
+            INSERT OR IGNORE INTO urls ({_URL_COLUMNS.removeprefix("id, ")}, url_key)
+            SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10, ?11
+            WHERE ?12 OR NOT EXISTS (SELECT 1 FROM all_urls WHERE url_key = ?11);
+            """,
+            ((*row, url_filter is not None and key not in url_filter) for key, row in unique.items()),
+        ).rowcount
+        if url_filter is not None:
+            # Every key in `rows` is now stored, whether inserted here or before.
+            url_filter.update(unique)
+            self._url_filter_high_water = max(
+                self._url_filter_high_water, conn.execute("SELECT COALESCE(MAX(id), 0) FROM urls;").fetchone()[0]
+            )
+        return inserted
+
+    @staticmethod
+    def _queue_record(record: dict) -> tuple[tuple, list[str]]:
+        """Convert one export_queue() record to (urls row values ending in url_key, tag names)."""
+        url = str(record.get("url") or "").strip()
+        if not url:
+            raise ValueError(f"Record without a URL: {record!r}")
+
+        def integer(key: str) -> int:
+            value = record.get(key)
+            return int(value) if value not in (None, "") else 0
+
+        def optional(key: str) -> str | None:
+            value = record.get(key)
+            return str(value) if value not in (None, "") else None
+
+        status = integer("status")
+        if status == UrlStatus.IN_PROGRESS:
+            status = UrlStatus.STOPPED
+        tags = record.get("tags") or []
+        if isinstance(tags, str):
+            tags = json.loads(tags)
+        row = (
+            url,
+            status,
+            integer("force_redownload"),
+            integer("check_new_only"),
+            integer("download_count"),
+            _to_epoch(optional("date_added")) or _now_epoch(),
+            _to_epoch(optional("date_processed")),
+            optional("last_error"),
+            integer("skipped_count"),
+            integer("priority"),
+            url_key(url),
+        )
+        return row, [name for name in (str(t).strip() for t in tags) if name]
+
     # ============== Tag CRUD Methods ==============
 
     def create_tag(self, name: str) -> int | None:
@@ -747,7 +2717,7 @@ class DatabaseManager:
         if not name:
             raise ValueError("tag name cannot be empty")
 
-        with self._locked(), self._connect() as conn:
+        with self._write() as conn:
             now = datetime.now(timezone.utc).isoformat()
             try:
                 cur = conn.execute(
@@ -767,7 +2737,7 @@ class DatabaseManager:
         if not new_name:
             raise ValueError("tag name cannot be empty")
 
-        with self._locked(), self._connect() as conn:
+        with self._write() as conn:
             try:
                 cur = conn.execute(
                     "UPDATE tags SET name = ? WHERE id = ?;",
@@ -782,19 +2752,19 @@ class DatabaseManager:
 
         Returns True if deleted. Associations in url_tags are CASCADE deleted.
         """
-        with self._locked(), self._connect() as conn:
+        with self._write() as conn:
             cur = conn.execute("DELETE FROM tags WHERE id = ?;", (int(tag_id),))
             return int(cur.rowcount) > 0
 
     def list_tags(self) -> list[TagRow]:
         """List all tags ordered by name."""
-        with self._locked(), self._connect() as conn:
+        with self._read() as conn:
             rows = conn.execute("SELECT id, name, date_created FROM tags ORDER BY name ASC;").fetchall()
             return [TagRow(id=int(r[0]), name=str(r[1]), date_created=str(r[2])) for r in rows]
 
     def get_tag_by_id(self, tag_id: int) -> TagRow | None:
         """Get a tag by its ID."""
-        with self._locked(), self._connect() as conn:
+        with self._read() as conn:
             row = conn.execute(
                 "SELECT id, name, date_created FROM tags WHERE id = ?;",
                 (int(tag_id),),
@@ -810,7 +2780,7 @@ class DatabaseManager:
 
         Returns True if assigned, False if already assigned or IDs invalid.
         """
-        with self._locked(), self._connect() as conn:
+        with self._write() as conn:
             now = datetime.now(timezone.utc).isoformat()
             try:
                 conn.execute(
@@ -826,7 +2796,7 @@ class DatabaseManager:
 
         Returns True if removed, False if not found.
         """
-        with self._locked(), self._connect() as conn:
+        with self._write() as conn:
             cur = conn.execute(
                 "DELETE FROM url_tags WHERE url_id = ? AND tag_id = ?;",
                 (int(url_id), int(tag_id)),
@@ -835,7 +2805,7 @@ class DatabaseManager:
 
     def get_tags_for_url(self, url_id: int) -> list[TagRow]:
         """Get all tags assigned to a URL."""
-        with self._locked(), self._connect() as conn:
+        with self._read() as conn:
             rows = conn.execute(
                 """
                 SELECT t.id, t.name, t.date_created
@@ -848,26 +2818,57 @@ class DatabaseManager:
             ).fetchall()
             return [TagRow(id=int(r[0]), name=str(r[1]), date_created=str(r[2])) for r in rows]
 
-    def set_url_tags(self, url_id: int, tag_ids: Iterable[int]) -> None:
-        """Set the tags for a URL, replacing any existing tags."""
-        tag_ids = list(tag_ids)
-        with self._locked(), self._connect() as conn:
-            # Remove existing tags
-            conn.execute("DELETE FROM url_tags WHERE url_id = ?;", (int(url_id),))
+    def set_url_tags(self, url_id: int, tag_ids: Iterable[int]) -> tuple[int, int]:
+        """Set the tags for a URL, replacing any existing tags.
+
+        Only the difference to the current tags is written; ids of tags that do
+        not exist are ignored.
+
+        Returns (added_count, removed_count).
+        """
+        url_id = int(url_id)
+        wanted = {int(tag_id) for tag_id in tag_ids}
+        with self._write() as conn:
+            current = {
+                int(tag_id)
+                for (tag_id,) in conn.execute("SELECT tag_id FROM url_tags WHERE url_id = ?;", (url_id,)).fetchall()
+            }
+            removed = conn.executemany(
+                "DELETE FROM url_tags WHERE url_id = ? AND tag_id = ?;",
+                ((url_id, tag_id) for tag_id in current - wanted),
+            ).rowcount
 
-            # Add new tags
             now = datetime.now(timezone.utc).isoformat()
-            for tag_id in tag_ids:
-                try:
-                    conn.execute(
-                        "INSERT INTO url_tags (url_id, tag_id, date_assigned) VALUES (?, ?, ?);",
-                        (int(url_id), int(tag_id), now),
-                    )
-                except sqlite3.IntegrityError:
-                    pass  # Skip invalid tag_ids
+            added = conn.executemany(
+                """
+                INSERT OR IGNORE INTO url_tags (url_id, tag_id, date_assigned)
+                SELECT u.id, t.id, ? FROM all_urls u, tags t WHERE u.id = ? AND t.id = ?;
+                """,
+                ((now, url_id, tag_id) for tag_id in wanted - current),
+            ).rowcount
+            return max(added, 0), max(removed, 0)
 
     # ============== Bulk Operations for Multi-Select ==============
 
+    @contextmanager
+    def _selection(self, conn: sqlite3.Connection, url_ids: Iterable[int]) -> Iterator[None]:
+        """Load `url_ids` into `temp.selected_ids` for the duration of the block.
+
+        Bulk statements join against the temp table (`id IN temp.selected_ids`)
+        instead of binding one parameter per id, so a selection of any size is a
+        single statement that SQLite drives through rowid lookups. The table is
+        per connection and is emptied again on exit.
+        """
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS selected_ids (id INTEGER PRIMARY KEY);")
+        conn.execute("DELETE FROM temp.selected_ids;")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO temp.selected_ids (id) VALUES (?);", ((int(url_id),) for url_id in url_ids)
+            )
+            yield
+        finally:
+            conn.execute("DELETE FROM temp.selected_ids;")
+
     def bulk_update_status(self, url_ids: Iterable[int], status: int) -> int:
         """Update status for multiple URLs.
 
@@ -887,12 +2888,13 @@ class DatabaseManager:
         if not url_ids:
             return 0
 
-        with self._locked(), self._connect() as conn:
-            placeholders = ",".join("?" for _ in url_ids)
+        with self._write() as conn, self._selection(conn, url_ids):
+            self._invalidate_rows(url_ids)
+            self._unarchive(conn, "id IN temp.selected_ids")
             # Don't update URLs that are currently IN_PROGRESS
             cur = conn.execute(
-                f"UPDATE urls SET status = ?, last_error = NULL WHERE id IN ({placeholders}) AND status != ?;",
-                [status] + url_ids + [UrlStatus.IN_PROGRESS],
+                "UPDATE urls SET status = ?, last_error = NULL WHERE id IN temp.selected_ids AND status != ?;",
+                (status, UrlStatus.IN_PROGRESS),
             )
             return int(cur.rowcount)
 
@@ -908,22 +2910,22 @@ class DatabaseManager:
         if not url_ids:
             return 0, 0
 
-        with self._locked(), self._connect() as conn:
-            placeholders = ",".join("?" for _ in url_ids)
-
+        with self._write() as conn, self._selection(conn, url_ids):
+            self._invalidate_rows(url_ids)
             # Count how many are IN_PROGRESS (will be skipped)
             in_progress = conn.execute(
-                f"SELECT COUNT(*) FROM urls WHERE id IN ({placeholders}) AND status = ?;",
-                url_ids + [UrlStatus.IN_PROGRESS],
+                "SELECT COUNT(*) FROM urls WHERE id IN temp.selected_ids AND status = ?;",
+                (UrlStatus.IN_PROGRESS,),
             ).fetchone()[0]
 
             # Delete non-IN_PROGRESS URLs
-            cur = conn.execute(
-                f"DELETE FROM urls WHERE id IN ({placeholders}) AND status != ?;",
-                url_ids + [UrlStatus.IN_PROGRESS],
-            )
+            deleted = conn.execute(
+                "DELETE FROM urls WHERE id IN temp.selected_ids AND status != ?;",
+                (UrlStatus.IN_PROGRESS,),
+            ).rowcount
+            deleted += conn.execute("DELETE FROM urls_history WHERE id IN temp.selected_ids;").rowcount
 
-            return int(cur.rowcount), int(in_progress)
+            return int(deleted), int(in_progress)
 
     def bulk_add_tag(self, url_ids: Iterable[int], tag_id: int) -> int:
         """Add a tag to multiple URLs.
@@ -939,20 +2941,19 @@ class DatabaseManager:
             return 0
 
         now = datetime.now(timezone.utc).isoformat()
-        added = 0
-
-        with self._locked(), self._connect() as conn:
-            for url_id in url_ids:
-                try:
-                    conn.execute(
-                        "INSERT INTO url_tags (url_id, tag_id, date_assigned) VALUES (?, ?, ?);",
-                        (int(url_id), int(tag_id), now),
-                    )
-                    added += 1
-                except sqlite3.IntegrityError:
-                    pass  # Already tagged or invalid IDs
-
-        return added
+        with self._write() as conn, self._selection(conn, url_ids):
+            # Joining urls and tags drops unknown ids; OR IGNORE skips already-tagged rows.
+            cur = conn.execute(
+                """
+                INSERT OR IGNORE INTO url_tags (url_id, tag_id, date_assigned)
+                SELECT u.id, t.id, ?
+                FROM temp.selected_ids s
+                JOIN all_urls u ON u.id = s.id
+                JOIN tags t ON t.id = ?;
+                """,
+                (now, int(tag_id)),
+            )
+            return int(cur.rowcount)
 
     def bulk_remove_tag(self, url_ids: Iterable[int], tag_id: int) -> int:
         """Remove a tag from multiple URLs.
@@ -967,11 +2968,10 @@ class DatabaseManager:
         if not url_ids:
             return 0
 
-        with self._locked(), self._connect() as conn:
-            placeholders = ",".join("?" for _ in url_ids)
+        with self._write() as conn, self._selection(conn, url_ids):
             cur = conn.execute(
-                f"DELETE FROM url_tags WHERE url_id IN ({placeholders}) AND tag_id = ?;",
-                url_ids + [int(tag_id)],
+                "DELETE FROM url_tags WHERE url_id IN temp.selected_ids AND tag_id = ?;",
+                (int(tag_id),),
             )
             return int(cur.rowcount)
 
@@ -991,21 +2991,253 @@ class DatabaseManager:
         if not url_ids:
             return 0
 
-        with self._locked(), self._connect() as conn:
-            placeholders = ",".join("?" for _ in url_ids)
+        with self._write() as conn, self._selection(conn, url_ids):
+            self._invalidate_rows(url_ids)
+            self._unarchive(conn, "id IN temp.selected_ids")
             cur = conn.execute(
-                f"""UPDATE urls
+                """UPDATE urls
                    SET status = ?,
                        force_redownload = ?,
                        check_new_only = ?,
                        last_error = NULL
-                   WHERE id IN ({placeholders}) AND status != ?;""",
-                [
+                   WHERE id IN temp.selected_ids AND status != ?;""",
+                (
                     UrlStatus.PENDING,
                     1 if force_redownload else 0,
                     1 if check_new_only else 0,
-                ]
-                + url_ids
-                + [UrlStatus.IN_PROGRESS],
+                    UrlStatus.IN_PROGRESS,
+                ),
+            )
+            return int(cur.rowcount)
+
+    def bulk_adjust_priority(self, url_ids: Iterable[int], delta: int) -> int:
+        """Raise (positive `delta`) or lower the priority of multiple URLs.
+
+        Higher priorities are claimed first (see claim_next_batch()). Archived URLs
+        are not in the queue and are left as they are.
+
+        Returns the number of URLs updated.
+        """
+        url_ids = list(url_ids)
+        if not url_ids or not delta:
+            return 0
+
+        with self._write() as conn, self._selection(conn, url_ids):
+            self._invalidate_rows(url_ids)
+            cur = conn.execute("UPDATE urls SET priority = priority + ? WHERE id IN temp.selected_ids;", (int(delta),))
+            return int(cur.rowcount)
+
+    def adjust_tag_priority(self, tag_id: int, delta: int) -> int:
+        """Raise (positive `delta`) or lower the priority of every queued (not archived) URL with the tag.
+
+        Returns the number of URLs updated.
+        """
+        if not delta:
+            return 0
+
+        with self._write() as conn:
+            self._invalidate_rows()
+            cur = conn.execute(
+                """
+                UPDATE urls SET priority = priority + ?
+                WHERE id IN (SELECT url_id FROM url_tags WHERE tag_id = ?);
+                """,
+                (int(delta), int(tag_id)),
             )
             return int(cur.rowcount)
+
+    def reset_priorities(self) -> int:
+        """Set every queued (not archived) URL back to the default priority (0).
+
+        Returns the number of URLs changed.
+        """
+        with self._write() as conn:
+            self._invalidate_rows()
+            cur = conn.execute("UPDATE urls SET priority = 0 WHERE priority != 0;")
+            return int(cur.rowcount)
+
+    def list_attempts(self, url_id: int, limit: int | None = None) -> list[AttemptRow]:
+        """Return the recorded download runs of a URL, newest first."""
+        sql = """
+            SELECT id, url_id, status, claimed_at, started_at, finished_at, first_output_at, exit_code, failure_lines
+            FROM attempts
+            WHERE url_id = ?
+            ORDER BY started_at DESC, id DESC
+        """
+        params: list = [int(url_id)]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._read() as conn:
+            rows = conn.execute(sql + ";", params).fetchall()
+        return [
+            AttemptRow(
+                id=int(r[0]),
+                url_id=int(r[1]),
+                status=int(r[2]),
+                claimed_at=_from_ms(r[3]),
+                started_at=_from_ms(r[4]),
+                finished_at=_from_ms(r[5]),
+                first_output_at=_from_ms(r[6]),
+                exit_code=r[7],
+                failure_lines=int(r[8]),
+            )
+            for r in rows
+        ]
+
+    def get_attempt_statistics(self, since: float | None = None) -> dict:
+        """Summarize download runs that finished at or after `since` (epoch seconds; all if None).
+
+        Returns dict with:
+            - attempts: number of runs
+            - by_status: dict mapping the status a run ended in -> count
+            - total_seconds: summed run time (process start to exit)
+            - mean_seconds: mean run time, or None without runs
+            - mean_wait_seconds: mean time from claim to process start, or None
+            - mean_first_output_seconds: mean time from start to first output, or None
+            - failure_lines: summed failure lines
+        """
+        where, params = ("WHERE finished_at >= ?", (_to_ms(since),)) if since is not None else ("", ())
+        with self._read() as conn:
+            by_status = {
+                int(status): int(count)
+                for status, count in conn.execute(
+                    f"SELECT status, COUNT(*) FROM attempts {where} GROUP BY status;", params
+                ).fetchall()
+            }
+            total_ms, mean_ms, wait_ms, first_output_ms, failure_lines = conn.execute(
+                f"""
+                SELECT SUM(finished_at - started_at),
+                       AVG(finished_at - started_at),
+                       AVG(started_at - claimed_at),
+                       AVG(first_output_at - started_at),
+                       SUM(failure_lines)
+                FROM attempts {where};
+                """,
+                params,
+            ).fetchone()
+        return {
+            "attempts": sum(by_status.values()),
+            "by_status": by_status,
+            "total_seconds": (total_ms or 0) / 1000,
+            "mean_seconds": _from_ms(mean_ms),
+            "mean_wait_seconds": _from_ms(wait_ms),
+            "mean_first_output_seconds": _from_ms(first_output_ms),
+            "failure_lines": int(failure_lines or 0),
+        }
+
+    def prune_attempts(self, *, max_age_days: float | None = None, max_per_url: int | None = None) -> int:
+        """Bound the `attempts` table.
+
+        Deletes runs that finished more than `max_age_days` ago, then all but the
+        newest `max_per_url` runs of each URL. Either limit defaults to
+        ATTEMPT_RETENTION_DAYS / ATTEMPTS_PER_URL; 0 disables it.
+
+        Returns the number of rows deleted.
+        """
+        max_age_days = self.ATTEMPT_RETENTION_DAYS if max_age_days is None else max_age_days
+        max_per_url = self.ATTEMPTS_PER_URL if max_per_url is None else int(max_per_url)
+        started = time.perf_counter()
+        deleted = 0
+        with self._write() as conn:
+            if max_age_days > 0:
+                cutoff = _to_ms(time.time() - max_age_days * 86400)
+                # Ids follow finish order, so everything below the first id young enough
+                # to keep is old. The walk stops there instead of scanning the table.
+                cur = conn.execute(
+                    """
+                    DELETE FROM attempts
+                    WHERE id < COALESCE(
+                        (SELECT id FROM attempts WHERE finished_at >= ? ORDER BY id LIMIT 1),
+                        (SELECT MAX(id) + 1 FROM attempts)
+                    );
+                    """,
+                    (cutoff,),
+                )
+                deleted += max(int(cur.rowcount), 0)
+            if max_per_url > 0:
+                # Only URLs over the limit are visited: counting walks the (url_id,
+                # started_at) index without sorting, and each URL's newest runs are
+                # read off the same index.
+                cur = conn.execute(
+                    """
+                    DELETE FROM attempts WHERE id IN (
+                        SELECT a.id
+                        FROM (SELECT url_id FROM attempts GROUP BY url_id HAVING COUNT(*) > ?1) AS over
+                        JOIN attempts a ON a.url_id = over.url_id
+                        WHERE a.id NOT IN (
+                            SELECT id FROM attempts
+                            WHERE url_id = over.url_id
+                            ORDER BY started_at DESC, id DESC
+                            LIMIT ?1
+                        )
+                    );
+                    """,
+                    (max_per_url,),
+                )
+                deleted += max(int(cur.rowcount), 0)
+            self._log_maintenance(conn, "prune_attempts", started, f"{deleted} attempt(s) removed")
+        return deleted
+
+    # ============== Cold Tier ==============
+
+    def archive_completed(self, *, older_than_days: float | None = None, batch_size: int | None = None) -> int:
+        """Move up to `batch_size` finished URLs processed over `older_than_days` ago to `urls_history`.
+
+        Only ARCHIVE_STATUSES are moved, oldest first, ids and tags kept; every read
+        of URLs still sees them (see `_add_urls_history()`). Each call is one short
+        write transaction, so a large backlog is moved over many calls. Defaults
+        are ARCHIVE_AFTER_DAYS and ARCHIVE_BATCH_SIZE; 0 days disables archiving.
+
+        Returns the number of URLs moved.
+        """
+        older_than_days = self.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        batch_size = max(1, int(batch_size or self.ARCHIVE_BATCH_SIZE))
+        if older_than_days <= 0:
+            return 0
+        cutoff = _now_epoch() - int(older_than_days * 86400)
+        placeholders = ",".join("?" * len(self.ARCHIVE_STATUSES))
+        # Walks idx_urls_sort_processed up to the cutoff.
+        candidates = f"""
+            SELECT id FROM urls
+            WHERE COALESCE(date_processed, date_added) < ? AND status IN ({placeholders})
+            ORDER BY COALESCE(date_processed, date_added)
+            LIMIT ?
+        """
+        params = (cutoff, *self.ARCHIVE_STATUSES, batch_size)
+        # Most calls find nothing; check on a snapshot before taking the write lock.
+        with self._read() as conn:
+            if conn.execute(candidates, params).fetchone() is None:
+                return 0
+
+        started = time.perf_counter()
+        with self._write() as conn, self._selection(conn, ()):
+            conn.execute(f"INSERT INTO temp.selected_ids (id) {candidates};", params)
+            # Copy first: the delete triggers on urls skip rows already in urls_history.
+            moved = conn.execute(
+                f"""
+                INSERT INTO urls_history ({_ALL_URLS_COLUMNS})
+                SELECT {_ALL_URLS_COLUMNS} FROM urls WHERE id IN temp.selected_ids;
+                """
+            ).rowcount
+            conn.execute("DELETE FROM urls WHERE id IN temp.selected_ids;")
+            self._log_maintenance(conn, "archive", started, f"{moved} URL(s) moved")
+        return int(moved)
+
+    @staticmethod
+    def _unarchive(conn: sqlite3.Connection, condition: str, params: tuple = ()) -> int:
+        """Inside a write transaction, move archived rows matching `condition` back to `urls`.
+
+        Called before a row's status changes: archived rows are read-only, and the
+        queue and counters only follow `urls`. Returns the number of rows moved.
+        """
+        moved = conn.execute(
+            f"""
+            INSERT INTO urls ({_ALL_URLS_COLUMNS})
+            SELECT {_ALL_URLS_COLUMNS} FROM urls_history WHERE {condition};
+            """,
+            params,
+        ).rowcount
+        if moved > 0:
+            conn.execute(f"DELETE FROM urls_history WHERE {condition};", params)
+        return max(int(moved), 0)
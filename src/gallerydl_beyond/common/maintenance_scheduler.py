@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime
+from typing import ClassVar
+
+from gallerydl_beyond.common.database_manager import DatabaseManager
+
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceScheduler:
+    """Background thread that keeps the database in shape while the app is idle.
+
+    Every `tick_interval` seconds, if `is_idle()` says nothing is downloading, it
+    runs at most one step: a WAL checkpoint, one batch of finished URLs moved to
+    the archive tier, one incremental-vacuum slice, a statistics refresh, a
+    status counter check, pruning of old download attempts or a reset of URLs
+    whose claim lease expired, whichever is due first. Each step is short and
+    takes the write lock only briefly, so downloads started meanwhile are barely
+    delayed. Runs are recorded by the DatabaseManager and read back with
+    `maintenance_log()`, so intervals carry over between sessions.
+
+    Call close() before closing the DatabaseManager.
+    """
+
+    # Seconds between idle checks.
+    TICK_INTERVAL = 30.0
+    # Seconds between runs of each periodic task, by maintenance_log name.
+    INTERVALS: ClassVar[dict[str, float]] = {
+        "checkpoint": 10 * 60.0,
+        "optimize": 24 * 3600.0,
+        "verify_counts": 7 * 24 * 3600.0,
+        "prune_attempts": 24 * 3600.0,
+        "reclaim_leases": 10 * 60.0,
+    }
+    # Free pages returned per incremental-vacuum step, and the fewest worth a step.
+    VACUUM_SLICE_PAGES = 256
+    VACUUM_MIN_FREE_PAGES = 64
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        *,
+        is_idle: Callable[[], bool],
+        tick_interval: float | None = None,
+        attempt_retention_days: float | None = None,
+        attempts_per_url: int | None = None,
+        archive_after_days: float | None = None,
+    ):
+        self._db = db
+        self._is_idle = is_idle
+        # Limits for DatabaseManager.prune_attempts(); None uses its defaults.
+        self._attempt_retention_days = attempt_retention_days
+        self._attempts_per_url = attempts_per_url
+        # Age for DatabaseManager.archive_completed(); 0 turns archiving off.
+        self._archive_after_days = (
+            DatabaseManager.ARCHIVE_AFTER_DAYS if archive_after_days is None else archive_after_days
+        )
+        self._tick_interval = self.TICK_INTERVAL if tick_interval is None else max(0.01, float(tick_interval))
+        self._stop = threading.Event()
+        # Epoch seconds of each task's last run; seeded from maintenance_log on first use.
+        self._last_run: dict[str, float] | None = None
+        self._thread = threading.Thread(target=self._run, name="MaintenanceScheduler", daemon=True)
+        self._thread.start()
+
+    def run_pending(self) -> str | None:
+        """Run the first due maintenance step if the app is idle.
+
+        Returns the name of the task that ran, or None.
+        """
+        if not self._is_idle():
+            return None
+        if self._due("checkpoint"):
+            return self._run_task("checkpoint", self._db.checkpoint_wal)
+        # Not on an interval: one batch per idle tick until nothing is old enough.
+        if self._archive_after_days > 0 and self._db.archive_completed(older_than_days=self._archive_after_days) > 0:
+            return "archive"
+
+        usage = self._db.page_usage()
+        if (
+            usage["auto_vacuum"] == "incremental"
+            and usage["free_pages"] >= self.VACUUM_MIN_FREE_PAGES
+            and self._db.incremental_vacuum(self.VACUUM_SLICE_PAGES) > 0
+        ):
+            return "incremental_vacuum"
+
+        if self._due("optimize"):
+            return self._run_task("optimize", self._db.optimize)
+        if self._due("verify_counts"):
+            return self._run_task("verify_counts", self._db.verify_status_counts)
+        if self._due("prune_attempts"):
+            return self._run_task("prune_attempts", self._prune_attempts)
+        if self._due("reclaim_leases"):
+            return self._run_task("reclaim_leases", self._db.reset_in_progress_to_stopped)
+        return None
+
+    def close(self, timeout: float | None = 30.0) -> None:
+        """Stop the scheduler, waiting for a step in progress to finish."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _prune_attempts(self) -> int:
+        return self._db.prune_attempts(max_age_days=self._attempt_retention_days, max_per_url=self._attempts_per_url)
+
+    def _last_runs(self) -> dict[str, float]:
+        if self._last_run is None:
+            self._last_run = {
+                task: datetime.fromisoformat(entry["last_run"]).timestamp()
+                for task, entry in self._db.maintenance_log().items()
+            }
+        return self._last_run
+
+    def _due(self, task: str) -> bool:
+        last = self._last_runs().get(task)
+        return last is None or time.time() - last >= self.INTERVALS[task]
+
+    def _run_task(self, task: str, action: Callable[[], object]) -> str:
+        # Counted as run even if it fails, so a failing task is retried next interval, not next tick.
+        self._last_runs()[task] = time.time()
+        action()
+        return task
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.wait(self._tick_interval):
+                try:
+                    task = self.run_pending()
+                except Exception:
+                    logger.exception("Database maintenance failed")
+                else:
+                    if task:
+                        logger.debug("Ran database maintenance: %s", task)
+        finally:
+            self._db.release_thread_connection()
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the latency histogram buckets; a last bucket holds the rest.
+BUCKETS_MS: tuple[float, ...] = (0.1, 0.5, 1.0, 5.0, 10.0, 50.0, 100.0, 500.0, 1000.0, 5000.0)
+
+# Statements EXPLAIN QUERY PLAN can describe.
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+
+@dataclass
+class _MethodStats:
+    calls: int = 0
+    statements: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    lock_wait_ms: float = 0.0
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+
+
+@dataclass
+class _Call:
+    method: str
+    started: float
+    lock_wait: float = 0.0
+    statements: int = 0
+    # Statement being timed: (sql, start), and statements over the threshold: (sql, seconds).
+    current: tuple[str, float] | None = None
+    slow: list[tuple[str, float]] = field(default_factory=list)
+
+
+class QueryProfiler:
+    """Per-method latency histograms and a slow-statement log for DatabaseManager.
+
+    A call is one read or write transaction, named after the DatabaseManager
+    method that opened it, and its time includes waiting for the write lock.
+    Statements are timed from the SQLite trace callback (`statement()`): each
+    runs until the next statement on the connection or the end of the call, so
+    fetching its rows is included. Statements slower than `slow_statement_ms`
+    are logged with their query plan, which `explain(sql)` returns once the
+    call has finished.
+
+    State is kept per thread, so calls on different connections don't mix.
+    """
+
+    # Slow statements kept for snapshot().
+    SLOW_LOG_SIZE = 100
+
+    def __init__(self, *, slow_statement_ms: float, explain: Callable[[str], list[str]]):
+        self.slow_statement_ms = float(slow_statement_ms)
+        self._explain = explain
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._methods: dict[str, _MethodStats] = {}
+        self._slow: deque[dict] = deque(maxlen=self.SLOW_LOG_SIZE)
+
+    def _stack(self) -> list[_Call]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def call(self, method: str) -> Iterator[None]:
+        """Time the transaction run inside the block as one call of `method`."""
+        stack = self._stack()
+        call = _Call(method, time.perf_counter())
+        stack.append(call)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._finish_statement(call, now)
+            stack.pop()
+            self._record(call, (now - call.started) * 1000)
+
+    def lock_waited(self, seconds: float) -> None:
+        """Add time spent waiting for the write lock to the current call."""
+        stack = self._stack()
+        if stack:
+            stack[-1].lock_wait += seconds
+
+    def statement(self, sql: str) -> None:
+        """Trace callback: `sql` (parameters expanded) starts executing on this thread's connection."""
+        stack = getattr(self._local, "stack", None)
+        if not stack:
+            return
+        call = stack[-1]
+        # Trigger steps are traced again under their parent statement's text.
+        if call.current is not None and call.current[0] == sql:
+            return
+        now = time.perf_counter()
+        self._finish_statement(call, now)
+        call.current = (sql, now)
+        call.statements += 1
+
+    def _finish_statement(self, call: _Call, now: float) -> None:
+        if call.current is None:
+            return
+        sql, started = call.current
+        call.current = None
+        if (now - started) * 1000 >= self.slow_statement_ms and sql.lstrip().upper().startswith(_EXPLAINABLE):
+            call.slow.append((sql, now - started))
+
+    def _record(self, call: _Call, duration_ms: float) -> None:
+        with self._lock:
+            stats = self._methods.setdefault(call.method, _MethodStats())
+            stats.calls += 1
+            stats.statements += call.statements
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.lock_wait_ms += call.lock_wait * 1000
+            stats.histogram[bisect.bisect_left(BUCKETS_MS, duration_ms)] += 1
+        for sql, seconds in call.slow:
+            try:
+                plan = self._explain(sql)
+            except sqlite3.Error as e:
+                plan = [f"(no plan: {e})"]
+            entry = {"method": call.method, "sql": sql, "duration_ms": seconds * 1000, "plan": plan}
+            with self._lock:
+                self._slow.append(entry)
+            logger.warning(
+                "Slow statement in %s (%.1f ms): %s\n  %s", call.method, seconds * 1000, sql, "\n  ".join(plan)
+            )
+
+    def snapshot(self, *, reset: bool = False) -> dict:
+        """Return the statistics collected so far, optionally starting over.
+
+        `methods` maps each method to its calls, statements, total/mean/max
+        milliseconds, lock wait and a histogram of call latencies, counted per
+        `buckets_ms` upper bound plus one last bucket for slower calls.
+        `slow_statements` lists the latest slow statements with their plans.
+        """
+        with self._lock:
+            methods = {
+                name: {
+                    "calls": stats.calls,
+                    "statements": stats.statements,
+                    "total_ms": stats.total_ms,
+                    "mean_ms": stats.total_ms / stats.calls,
+                    "max_ms": stats.max_ms,
+                    "lock_wait_ms": stats.lock_wait_ms,
+                    "histogram": list(stats.histogram),
+                }
+                for name, stats in self._methods.items()
+            }
+            slow = list(self._slow)
+            if reset:
+                self._methods.clear()
+                self._slow.clear()
+        return {"buckets_ms": list(BUCKETS_MS), "methods": methods, "slow_statements": slow}
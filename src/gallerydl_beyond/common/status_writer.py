@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+
+from gallerydl_beyond.common.database_manager import Attempt, DatabaseManager, StatusTransition
+
+
+logger = logging.getLogger(__name__)
+
+
+class StatusWriter:
+    """Write-behind queue that group-commits worker status transitions.
+
+    Offers the same `mark_*` methods as DatabaseManager, so download workers can
+    use either. Transitions are queued in one FIFO and committed by a background
+    thread in a single transaction once the oldest has waited `flush_delay`
+    seconds, so a burst of finishing workers costs one commit instead of one each.
+    A single queue drained in order means transitions for the same URL are never
+    reordered.
+
+    Call close() before closing the DatabaseManager: it commits everything still
+    queued. After close(), transitions are written synchronously, behind anything
+    close() could not commit in time.
+
+    A batch whose commit keeps failing is retried MAX_ATTEMPTS times, then applied
+    one transition at a time; transitions that still fail are logged and dropped
+    so they don't hold up the rest.
+    """
+
+    # Seconds the first queued transition may wait for others to join its commit.
+    FLUSH_DELAY = 0.05
+    # Transitions per commit at most.
+    MAX_BATCH = 500
+    # Seconds to wait before retrying a batch whose commit failed.
+    RETRY_DELAY = 0.5
+    # Commits of a batch tried before its transitions are applied one by one.
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, db: DatabaseManager, *, flush_delay: float | None = None):
+        self._db = db
+        self._flush_delay = self.FLUSH_DELAY if flush_delay is None else max(0.0, float(flush_delay))
+        self._cond = threading.Condition()
+        # Held while committing, so a synchronous write after close() can't overtake a batch in flight.
+        self._commit_lock = threading.Lock()
+        self._queue: deque[StatusTransition] = deque()
+        self._deadline: float | None = None  # When the oldest queued transition must be committed
+        self._submitted = 0  # Transitions ever queued
+        self._committed = 0  # Transitions ever committed
+        self._flush_requested = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="StatusWriter", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending_count(self) -> int:
+        """Transitions queued but not yet committed."""
+        with self._cond:
+            return self._submitted - self._committed
+
+    def submit(self, transition: StatusTransition) -> None:
+        with self._cond:
+            if not self._closed:
+                if not self._queue:
+                    self._deadline = time.monotonic() + self._flush_delay
+                self._queue.append(transition)
+                self._submitted += 1
+                self._cond.notify_all()
+                return
+        with self._commit_lock:
+            # Whatever close() left queued goes first, so transitions for a URL stay in order.
+            with self._cond:
+                backlog = list(self._queue)
+            self._db.apply_status_transitions([*backlog, transition])
+            self._committed_batch(len(backlog))
+
+    def mark_completed(self, url_id: int, *, attempt: Attempt | None = None) -> None:
+        self.submit(StatusTransition.completed(url_id, attempt=attempt))
+
+    def mark_completed_partial(
+        self, url_id: int, skipped_count: int, errors: str | None = None, *, attempt: Attempt | None = None
+    ) -> None:
+        self.submit(StatusTransition.completed_partial(url_id, skipped_count, errors, attempt=attempt))
+
+    def mark_failed(self, url_id: int, error: str, *, attempt: Attempt | None = None) -> None:
+        self.submit(StatusTransition.failed(url_id, error, attempt=attempt))
+
+    def mark_pending(self, url_id: int, *, attempt: Attempt | None = None) -> None:
+        self.submit(StatusTransition.pending(url_id, attempt=attempt))
+
+    def mark_stopped(self, url_id: int, *, attempt: Attempt | None = None) -> None:
+        self.submit(StatusTransition.stopped(url_id, attempt=attempt))
+
+    def mark_skipped(self, url_id: int, *, attempt: Attempt | None = None) -> None:
+        self.submit(StatusTransition.skipped(url_id, attempt=attempt))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Commit everything queued so far without waiting for the deadline.
+
+        Returns True once committed, False if `timeout` seconds passed first.
+        """
+        return self._wait(timeout, hurry=True)
+
+    def wait_committed(self, timeout: float | None = None) -> bool:
+        """Wait until everything queued so far is committed, on the usual deadline.
+
+        Unlike flush() this doesn't hurry the commit, so transitions queued by
+        other threads in the meantime still share it. Returns False if `timeout`
+        seconds passed first.
+        """
+        return self._wait(timeout, hurry=False)
+
+    def _wait(self, timeout: float | None, *, hurry: bool) -> bool:
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._submitted
+            if hurry:
+                self._flush_requested = True
+                self._cond.notify_all()
+            while self._committed < target:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                if not self._thread.is_alive():
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, timeout: float | None = 30.0) -> bool:
+        """Commit everything queued, then stop the writer thread.
+
+        Returns False if some transitions could not be committed in time; they are
+        logged and remain queued.
+        """
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if not flushed:
+            logger.error("StatusWriter closed with %d uncommitted transition(s)", self.pending_count)
+        return flushed
+
+    def _committed_batch(self, count: int) -> None:
+        """Drop the `count` transitions at the head of the queue once they are committed."""
+        with self._cond:
+            for _ in range(count):
+                self._queue.popleft()
+            self._committed += count
+            if self._queue:
+                self._deadline = time.monotonic()  # Already waited; commit the rest right away
+            else:
+                self._flush_requested = False
+            self._cond.notify_all()
+
+    def _apply_each(self, batch: list[StatusTransition]) -> None:
+        """Apply `batch` one transition at a time, logging and dropping those that fail."""
+        for transition in batch:
+            try:
+                self._db.apply_status_transitions([transition])
+            except Exception:
+                logger.exception("Dropped status transition of URL %s to %s", transition.url_id, transition.status)
+
+    def _run(self) -> None:
+        attempts = 0
+        try:
+            while True:
+                with self._cond:
+                    while True:
+                        if self._queue and (
+                            self._flush_requested or self._closed or time.monotonic() >= self._deadline
+                        ):
+                            break
+                        if self._closed:
+                            return
+                        timeout = None if not self._queue else self._deadline - time.monotonic()
+                        self._cond.wait(timeout)
+
+                with self._commit_lock:
+                    # A synchronous write after close() may have drained the queue meanwhile.
+                    with self._cond:
+                        batch = [self._queue[i] for i in range(min(len(self._queue), self.MAX_BATCH))]
+                    if not batch:
+                        continue
+                    attempts += 1
+                    try:
+                        self._db.apply_status_transitions(batch)
+                    except Exception:
+                        if attempts < self.MAX_ATTEMPTS:
+                            # Keep the batch at the head of the queue so order is preserved.
+                            logger.exception("Failed to commit %d status transition(s); retrying", len(batch))
+                            batch = []
+                        else:
+                            logger.exception(
+                                "Failed to commit %d status transition(s) %d times; applying them one by one",
+                                len(batch),
+                                attempts,
+                            )
+                            self._apply_each(batch)
+                    if batch:
+                        attempts = 0
+                        self._committed_batch(len(batch))
+                        continue
+
+                with self._cond:
+                    if self._closed:
+                        return
+                    self._cond.wait(self.RETRY_DELAY)
+        finally:
+            self._db.release_thread_connection()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Hosts that serve the same content under another name, mapped to one canonical host.
+HOST_ALIASES: dict[str, str] = {
+    "x.com": "twitter.com",
+    "mobile.x.com": "twitter.com",
+    "mobile.twitter.com": "twitter.com",
+    "fxtwitter.com": "twitter.com",
+    "vxtwitter.com": "twitter.com",
+    "fixupx.com": "twitter.com",
+    "old.reddit.com": "reddit.com",
+    "new.reddit.com": "reddit.com",
+    "m.reddit.com": "reddit.com",
+    "m.facebook.com": "facebook.com",
+    "m.youtube.com": "youtube.com",
+    "music.youtube.com": "youtube.com",
+    "m.tumblr.com": "tumblr.com",
+}
+
+# Query parameters that only record where a link was shared from, on any site.
+# Only names no site plausibly uses for content belong here; see HOST_TRACKING_PARAMS.
+TRACKING_PARAMS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "dclid",
+        "msclkid",
+        "mc_cid",
+        "mc_eid",
+    }
+)
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+# Per-host parameters that are tracking-only there but meaningful elsewhere
+# (e.g. `s` selects the page type on booru sites).
+HOST_TRACKING_PARAMS: dict[str, frozenset[str]] = {
+    "twitter.com": frozenset({"s", "t", "ref", "ref_src", "ref_url"}),
+    "reddit.com": frozenset({"share_id", "context"}),
+    "instagram.com": frozenset({"igsh", "igshid"}),
+    "youtube.com": frozenset({"si"}),
+    "youtu.be": frozenset({"si"}),
+    "open.spotify.com": frozenset({"si"}),
+}
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Return the canonical form of `url` used for duplicate detection.
+
+    Scheme and host are lowercased, http becomes https, `www.` and default ports
+    are dropped, host aliases are mapped (x.com -> twitter.com), trailing slashes
+    and plain `#fragment`s are removed, and tracking parameters are stripped with
+    the rest sorted. Strings that are not http(s) URLs are only stripped.
+
+    The result is a comparison key, not a URL to download: the stored URL is
+    always the one the user gave.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip(".").removeprefix("www.")
+    host = HOST_ALIASES.get(host, host)
+    host_params = HOST_TRACKING_PARAMS.get(host, frozenset())
+    if port is not None and port not in _DEFAULT_PORTS.values():
+        host = f"{host}:{port}"
+    if parts.username or parts.password:
+        host = f"{parts.netloc.rsplit('@', 1)[0]}@{host}"
+
+    path = parts.path.rstrip("/")
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and key not in host_params and not key.startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    query.sort(key=lambda item: item[0])
+
+    # Client-side routes (#/..., #!/...) identify content; other fragments are anchors.
+    fragment = parts.fragment if parts.fragment.startswith(("/", "!")) else ""
+
+    return urlunsplit(("https", host, path, urlencode(query), fragment))
+
+
+def url_key(url: str) -> int:
+    """Return a 64-bit hash of `normalize_url(url)`, as a signed int that fits SQLite INTEGER."""
+    digest = hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
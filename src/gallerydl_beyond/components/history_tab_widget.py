@@ -17,11 +17,14 @@ from PyQt6.QtWidgets import (
 )
 
 from gallerydl_beyond.common.constants import SettingsKeys, UrlStatus
-from gallerydl_beyond.common.database_manager import DatabaseManager
+from gallerydl_beyond.common.database_manager import DatabaseManager, TagFilter
+from gallerydl_beyond.dialogs.tag_filter_dialog import TagFilterDialog
 from gallerydl_beyond.models.history_model import HistoryModel
 
 
 DEFAULT_PAGE_SIZE = 100
+# Item data of the tag filter entry that opens TagFilterDialog.
+CUSTOM_TAG_FILTER = "custom"
 
 
 class HistoryTabWidget(QWidget):
@@ -51,11 +54,15 @@ class HistoryTabWidget(QWidget):
         self.search = QLineEdit()
         self.search.setPlaceholderText("Search URL...")
 
-        # Tag filter dropdown
+        # Tag filter dropdown: All, a single tag, or a custom combination
         self._tag_filter_label = QLabel("Tag:")
         self._tag_filter = QComboBox()
         self._tag_filter.setMinimumWidth(100)
-        self._tag_filter.currentIndexChanged.connect(lambda _: self.refresh())
+        self._custom_tag_filter: TagFilter | None = None
+        self._tag_filter_index = 0
+        # `activated` rather than `currentIndexChanged`: choosing "Custom..." again
+        # while it is selected should reopen the dialog.
+        self._tag_filter.activated.connect(self._on_tag_filter_changed)
         self._refresh_tag_filter()
 
         self.refresh_button = QPushButton("Refresh")
@@ -141,9 +148,16 @@ class HistoryTabWidget(QWidget):
         layout.addLayout(pagination)
         layout.addWidget(self.table, 1)
 
-    def refresh(self, *, page: int | None = None, preserve_page: bool = False, preserve_sort: bool = True) -> None:
+    def refresh(
+        self,
+        *,
+        page: int | None = None,
+        preserve_page: bool = False,
+        preserve_sort: bool = True,
+        recount: bool = True,
+    ) -> None:
         text = self.search.text().strip() or None
-        tag_id = self._tag_filter.currentData()
+        tags = self._current_tag_filter()
         page_size = self._page_size_combo.currentData() or DEFAULT_PAGE_SIZE
 
         if page is None:
@@ -158,18 +172,67 @@ class HistoryTabWidget(QWidget):
 
         self.model.refresh(
             search=text,
-            tag_id=tag_id,
+            tags=tags,
             page=page,
             page_size=page_size,
             sort_column=sort_column,
             sort_ascending=sort_ascending,
+            recount=recount,
         )
+        # Relevance ranking isn't a column, so no header shows the sort then.
+        self.table.horizontalHeader().setSortIndicatorShown(not self.model.by_relevance)
         self._update_pagination_ui()
         self.table.resizeColumnsToContents()
 
+    def _current_tag_filter(self) -> TagFilter | None:
+        data = self._tag_filter.currentData()
+        if data == CUSTOM_TAG_FILTER:
+            return self._custom_tag_filter
+        if data is None:
+            return None
+        return TagFilter(all_of=(data,))
+
+    def _on_tag_filter_changed(self, index: int) -> None:
+        is_custom = self._tag_filter.itemData(index) == CUSTOM_TAG_FILTER
+        if index == self._tag_filter_index and not is_custom:
+            return  # Same entry chosen again
+        if is_custom and not self._edit_custom_tag_filter():
+            # Dialog cancelled: go back to the previous filter without refreshing.
+            self._tag_filter.blockSignals(True)
+            self._tag_filter.setCurrentIndex(self._tag_filter_index)
+            self._tag_filter.blockSignals(False)
+            return
+        self._tag_filter_index = self._tag_filter.currentIndex()
+        self.refresh()
+
+    def _edit_custom_tag_filter(self) -> bool:
+        """Let the user build a tag combination; returns False if nothing was applied."""
+        try:
+            tags = self._db.list_tags()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to load tags: {e}")
+            return False
+        dialog = TagFilterDialog(
+            lambda message: QMessageBox.warning(self, "Error", message), tags, self._custom_tag_filter
+        )
+        if not dialog.exec() or not dialog.tag_filter:
+            return False
+        self._custom_tag_filter = dialog.tag_filter
+        self._update_custom_tag_filter_label()
+        return True
+
+    def _update_custom_tag_filter_label(self) -> None:
+        index = self._tag_filter.findData(CUSTOM_TAG_FILTER)
+        tag_filter = self._custom_tag_filter
+        if tag_filter:
+            count = len(tag_filter.all_of) + len(tag_filter.any_of) + len(tag_filter.none_of)
+            self._tag_filter.setItemText(index, f"Custom ({count} tag{'s' if count != 1 else ''})...")
+        else:
+            self._tag_filter.setItemText(index, "Custom...")
+
     def _refresh_tag_filter(self) -> None:
         """Refresh the tag filter dropdown."""
-        current_tag_id = self._tag_filter.currentData()
+        current_data = self._tag_filter.currentData()
         self._tag_filter.blockSignals(True)
         self._tag_filter.clear()
         self._tag_filter.addItem("All", None)
@@ -177,15 +240,31 @@ class HistoryTabWidget(QWidget):
             tags = self._db.list_tags()
             for tag in tags:
                 self._tag_filter.addItem(tag.name, tag.id)
+            self._tag_filter.addItem("Custom...", CUSTOM_TAG_FILTER)
+
+            # Drop deleted tags from the custom filter
+            if self._custom_tag_filter:
+                tag_ids = {tag.id for tag in tags}
+                custom = self._custom_tag_filter
+                pruned = TagFilter(
+                    all_of=[t for t in custom.all_of if t in tag_ids],
+                    any_of=[t for t in custom.any_of if t in tag_ids],
+                    none_of=[t for t in custom.none_of if t in tag_ids],
+                )
+                self._custom_tag_filter = pruned if pruned else None
+                if self._custom_tag_filter is None and current_data == CUSTOM_TAG_FILTER:
+                    current_data = None
+            self._update_custom_tag_filter_label()
+
             # Restore selection if still valid
-            if current_tag_id is not None:
-                for i in range(self._tag_filter.count()):
-                    if self._tag_filter.itemData(i) == current_tag_id:
-                        self._tag_filter.setCurrentIndex(i)
-                        break
+            if current_data is not None:
+                index = self._tag_filter.findData(current_data)
+                if index >= 0:
+                    self._tag_filter.setCurrentIndex(index)
         except Exception:
             pass  # Ignore errors loading tags
         finally:
+            self._tag_filter_index = self._tag_filter.currentIndex()
             self._tag_filter.blockSignals(False)
 
     def refresh_tags(self) -> None:
@@ -193,17 +272,18 @@ class HistoryTabWidget(QWidget):
         self._refresh_tag_filter()
         self.refresh()
 
+    # Page navigation keeps the filters, so the total from the last refresh still holds.
     def _go_first(self) -> None:
-        self.refresh(page=0)
+        self.refresh(page=0, recount=False)
 
     def _go_prev(self) -> None:
-        self.refresh(page=self.model.current_page - 1)
+        self.refresh(page=self.model.current_page - 1, recount=False)
 
     def _go_next(self) -> None:
-        self.refresh(page=self.model.current_page + 1)
+        self.refresh(page=self.model.current_page + 1, recount=False)
 
     def _go_last(self) -> None:
-        self.refresh(page=self.model.total_pages - 1)
+        self.refresh(page=self.model.total_pages - 1, recount=False)
 
     def _update_pagination_ui(self) -> None:
         page = self.model.current_page + 1  # 1-indexed for display
@@ -366,6 +446,20 @@ class HistoryTabWidget(QWidget):
             force.triggered.connect(lambda: self._on_force_redownload(urls[0]))
         menu.addAction(force)
 
+        # --- Queue priority ---
+        priority_menu = QMenu("Priority", self)
+        raise_action = QAction("Raise (download sooner)", self)
+        raise_action.triggered.connect(lambda: self._bulk_adjust_priority(url_ids, 1))
+        lower_action = QAction("Lower (download later)", self)
+        lower_action.triggered.connect(lambda: self._bulk_adjust_priority(url_ids, -1))
+        priority_menu.addAction(raise_action)
+        priority_menu.addAction(lower_action)
+        if any(r.priority for r in selected_rows):
+            reset_action = QAction("Reset to normal", self)
+            reset_action.triggered.connect(lambda: self._bulk_reset_priority(selected_rows))
+            priority_menu.addAction(reset_action)
+        menu.addMenu(priority_menu)
+
         # --- Tags submenu ---
         tags_menu = QMenu("Tags", self)
         if is_multi:
@@ -422,6 +516,17 @@ class HistoryTabWidget(QWidget):
             self.refresh(page=self.model.current_page)
             self.urls_requeued.emit(updated)
 
+    def _bulk_adjust_priority(self, url_ids: list[int], delta: int) -> None:
+        """Move URLs up (positive delta) or down the download queue."""
+        if self._db.bulk_adjust_priority(url_ids, delta):
+            self.refresh(preserve_page=True, recount=False)
+
+    def _bulk_reset_priority(self, rows: list) -> None:
+        """Put URLs back to normal priority."""
+        for priority in {r.priority for r in rows if r.priority}:
+            self._db.bulk_adjust_priority([r.id for r in rows if r.priority == priority], -priority)
+        self.refresh(preserve_page=True, recount=False)
+
     def _confirm_and_remove_bulk(self, url_ids: list[int]) -> None:
         """Confirm and remove multiple URLs from history."""
         count = len(url_ids)
@@ -3,6 +3,8 @@ from __future__ import annotations
 import os
 import re
 import sqlite3
+import time
+from datetime import datetime
 from pathlib import Path
 
 from PyQt6.QtCore import Qt
@@ -19,6 +21,7 @@ from PyQt6.QtWidgets import (
     QListWidget,
     QListWidgetItem,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QScrollArea,
     QVBoxLayout,
@@ -27,9 +30,16 @@ from PyQt6.QtWidgets import (
 
 from gallerydl_beyond.common.base_dialog import BaseDialog
 from gallerydl_beyond.common.constants import UrlStatus
-from gallerydl_beyond.common.database_manager import DatabaseManager
+from gallerydl_beyond.common.database_manager import DatabaseManager, queue_file_format
+from gallerydl_beyond.threads.db_task_worker import DbTask, DbTaskWorker
 
 
+# Save/open filters for URL exports. JSON Lines and CSV keep every field and tag.
+EXPORT_FILE_FILTERS = (
+    "JSON Lines (*.jsonl *.jsonl.gz);;CSV (*.csv *.csv.gz);;Text Files - URLs only (*.txt);;All Files (*)"
+)
+IMPORT_FILE_FILTERS = "Supported Files (*.txt *.jsonl *.jsonl.gz *.csv *.csv.gz);;" + EXPORT_FILE_FILTERS
+
 # URL patterns for known extractors (extractor_name -> URL template with {id} placeholder)
 # These are best-effort reconstructions - some sites need tokens or other info we don't have
 # Patterns are curated based on gallery-dl's archive_fmt and URL patterns
@@ -242,6 +252,43 @@ def _format_size(size_bytes: int) -> str:
     return f"{size_bytes:.1f} TB"
 
 
+# Display names for DatabaseManager.maintenance_log() tasks, in display order.
+MAINTENANCE_TASK_LABELS = {
+    "checkpoint": "WAL checkpoint",
+    "archive": "Archiving",
+    "incremental_vacuum": "Space reclaim",
+    "optimize": "Statistics",
+    "verify_counts": "Counter check",
+    "prune_attempts": "Attempt history",
+    "reclaim_leases": "Expired claims",
+    "vacuum": "Full vacuum",
+}
+
+
+def _format_maintenance(log: dict[str, dict]) -> str:
+    """Format maintenance_log() as one line per task that has run."""
+    lines = []
+    for task, label in MAINTENANCE_TASK_LABELS.items():
+        entry = log.get(task)
+        if entry is None:
+            continue
+        when = datetime.fromisoformat(entry["last_run"]).astimezone().strftime("%Y-%m-%d %H:%M")
+        took = f"{entry['duration_ms']} ms" + (f", {entry['detail']}" if entry["detail"] else "")
+        lines.append(f"{label}: {when} ({took})")
+    return "\n".join(lines) or "Not run yet"
+
+
+def _format_attempts(stats: dict) -> str:
+    """Format get_attempt_statistics() as a one-line summary."""
+    if not stats["attempts"]:
+        return "None"
+    failed = stats["by_status"].get(UrlStatus.FAILED, 0)
+    return (
+        f"{stats['attempts']} ({failed} failed), "
+        f"avg {stats['mean_seconds']:.1f} s, {stats['total_seconds'] / 3600:.1f} h total"
+    )
+
+
 def _format_date(iso_date: str | None) -> str:
     """Format ISO date string for display."""
     if not iso_date:
@@ -259,6 +306,7 @@ class DatabaseDialog(BaseDialog):
         self._db = db_manager
         self._config_path = config_path
         self._archive_path: Path | None = None
+        self._task_worker: DbTaskWorker | None = None
 
         # Try to get archive path from config
         if config_path and config_path.exists():
@@ -297,6 +345,7 @@ class DatabaseDialog(BaseDialog):
         self._skipped_label = QLabel()
         self._downloads_label = QLabel()
         self._date_range_label = QLabel()
+        self._attempts_label = QLabel()
 
         stats_layout.addRow("Total URLs:", self._total_label)
         stats_layout.addRow("Completed:", self._completed_label)
@@ -307,6 +356,7 @@ class DatabaseDialog(BaseDialog):
         stats_layout.addRow("Skipped:", self._skipped_label)
         stats_layout.addRow("Total Downloads:", self._downloads_label)
         stats_layout.addRow("Date Range:", self._date_range_label)
+        stats_layout.addRow("Runs (30 days):", self._attempts_label)
 
         stats_group.setLayout(stats_layout)
         self.main_layout.addWidget(stats_group)
@@ -355,6 +405,16 @@ class DatabaseDialog(BaseDialog):
         action_row.addWidget(clear_all_btn)
         bulk_layout.addLayout(action_row)
 
+        # Row 3: Queue priority
+        priority_row = QHBoxLayout()
+        reset_priority_btn = QPushButton("Reset Priorities")
+        reset_priority_btn.setToolTip("Put every URL back to normal priority (queue order by age)")
+        reset_priority_btn.clicked.connect(self._reset_priorities)
+
+        priority_row.addWidget(reset_priority_btn)
+        priority_row.addStretch()
+        bulk_layout.addLayout(priority_row)
+
         bulk_group.setLayout(bulk_layout)
         self.main_layout.addWidget(bulk_group)
 
@@ -364,11 +424,13 @@ class DatabaseDialog(BaseDialog):
         io_layout.setSpacing(8)
 
         export_btn = QPushButton("Export URLs...")
-        export_btn.setToolTip("Export all URLs to a text file")
+        export_btn.setToolTip(
+            "Export all URLs with status, dates and tags (.jsonl/.csv, optionally .gz), or URLs only (.txt)"
+        )
         export_btn.clicked.connect(self._export_urls)
 
         import_btn = QPushButton("Import URLs...")
-        import_btn.setToolTip("Import URLs from a text file (one per line)")
+        import_btn.setToolTip("Import URLs from a text file (one per line) or a .jsonl/.csv export")
         import_btn.clicked.connect(self._import_urls)
 
         io_layout.addWidget(export_btn)
@@ -449,9 +511,19 @@ class DatabaseDialog(BaseDialog):
         delete_tag_btn.setStyleSheet("color: #ff6b6b;")
         delete_tag_btn.clicked.connect(self._delete_tag)
 
+        raise_tag_btn = QPushButton("Raise Priority")
+        raise_tag_btn.setToolTip("Download URLs with the selected tag before others")
+        raise_tag_btn.clicked.connect(lambda: self._adjust_tag_priority(1))
+
+        lower_tag_btn = QPushButton("Lower Priority")
+        lower_tag_btn.setToolTip("Download URLs with the selected tag after others")
+        lower_tag_btn.clicked.connect(lambda: self._adjust_tag_priority(-1))
+
         tag_btn_layout.addWidget(add_tag_btn)
         tag_btn_layout.addWidget(rename_tag_btn)
         tag_btn_layout.addWidget(delete_tag_btn)
+        tag_btn_layout.addWidget(raise_tag_btn)
+        tag_btn_layout.addWidget(lower_tag_btn)
         tag_btn_layout.addStretch()
         tag_layout.addLayout(tag_btn_layout)
 
@@ -469,8 +541,13 @@ class DatabaseDialog(BaseDialog):
         self._db_path_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
         self._db_path_label.setWordWrap(True)
         self._db_size_label = QLabel()
+        self._free_space_label = QLabel()
+        self._free_space_label.setWordWrap(True)
+        self._maintenance_label = QLabel()
         info_layout.addRow("Database:", self._db_path_label)
         info_layout.addRow("Size:", self._db_size_label)
+        info_layout.addRow("Free Space:", self._free_space_label)
+        info_layout.addRow("Maintenance:", self._maintenance_label)
 
         # Archive info (if available)
         if self._archive_path:
@@ -500,8 +577,15 @@ class DatabaseDialog(BaseDialog):
         backup_btn.setToolTip("Create a backup copy of the database file")
         backup_btn.clicked.connect(self._backup_database)
 
+        snapshot_btn = QPushButton("Snapshot")
+        snapshot_btn.setToolTip(
+            f"Save a timestamped backup to {self._db.backup_dir}, keeping the newest {self._db.BACKUP_KEEP}"
+        )
+        snapshot_btn.clicked.connect(self._snapshot_database)
+
         btn_layout.addWidget(vacuum_btn)
         btn_layout.addWidget(backup_btn)
+        btn_layout.addWidget(snapshot_btn)
 
         if self._archive_path:
             clear_archive_btn = QPushButton("Clear Archive")
@@ -542,8 +626,17 @@ class DatabaseDialog(BaseDialog):
             else:
                 self._date_range_label.setText("N/A")
 
+            runs = self._db.get_attempt_statistics(since=time.time() - 30 * 86400)
+            self._attempts_label.setText(_format_attempts(runs))
+
             # File sizes
             self._db_size_label.setText(_format_size(self._db.get_file_size()))
+            usage = self._db.page_usage()
+            free_space = _format_size(usage["free_pages"] * usage["page_size"])
+            if usage["auto_vacuum"] != "incremental":
+                free_space += " (vacuum once to reclaim space automatically)"
+            self._free_space_label.setText(free_space)
+            self._maintenance_label.setText(_format_maintenance(self._db.maintenance_log()))
 
             if self._archive_path and hasattr(self, "_archive_size_label"):
                 if self._archive_path.exists():
@@ -609,6 +702,30 @@ class DatabaseDialog(BaseDialog):
         except Exception as e:
             self._show_error(f"Failed to retry URLs: {e}")
 
+    def _reset_priorities(self) -> None:
+        """Put every URL back to the default priority."""
+        try:
+            reset = self._db.reset_priorities()
+            QMessageBox.information(self, "Priorities Reset", f"Reset the priority of {reset} URL(s).")
+        except Exception as e:
+            self.show_error(f"Failed to reset priorities: {e}")
+
+    def _adjust_tag_priority(self, delta: int) -> None:
+        """Raise or lower the priority of every URL with the selected tag."""
+        item = self._tag_list.currentItem()
+        if item is None:
+            QMessageBox.information(self, "No Selection", "Please select a tag first.")
+            return
+
+        try:
+            updated = self._db.adjust_tag_priority(item.data(Qt.ItemDataRole.UserRole), delta)
+            direction = "Raised" if delta > 0 else "Lowered"
+            QMessageBox.information(
+                self, "Priority Changed", f"{direction} the priority of {updated} URL(s) tagged '{item.text()}'."
+            )
+        except Exception as e:
+            self.show_error(f"Failed to change priority: {e}")
+
     def _clear_all(self) -> None:
         """Clear all URLs from the database."""
         try:
@@ -650,49 +767,119 @@ class DatabaseDialog(BaseDialog):
             self._show_error(f"Failed to clear database: {e}")
 
     def _export_urls(self) -> None:
-        """Export URLs to a text file."""
-        try:
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "Export URLs",
-                "urls_export.txt",
-                "Text Files (*.txt);;All Files (*)",
-            )
+        """Export URLs to a file; the format follows the chosen extension."""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Export URLs",
+            "urls_export.jsonl",
+            EXPORT_FILE_FILTERS,
+        )
 
-            if not file_path:
-                return
+        if not file_path:
+            return
 
-            count = self._db.export_urls(Path(file_path), include_all=True)
-            QMessageBox.information(self, "Export Complete", f"Exported {count} URL(s) to:\n{file_path}")
+        path = Path(file_path)
 
-        except Exception as e:
-            self._show_error(f"Failed to export URLs: {e}")
+        def task(progress) -> int:
+            if queue_file_format(path) is None:
+                return self._db.export_urls(path, include_all=True)
+            return self._db.export_queue(path, progress=progress)
+
+        def on_finished(count: int, cancelled: bool) -> None:
+            if cancelled:
+                QMessageBox.information(self, "Export Cancelled", "The export was cancelled.")
+            else:
+                QMessageBox.information(self, "Export Complete", f"Exported {count} URL(s) to:\n{file_path}")
+
+        self._run_db_task(
+            "Exporting URLs",
+            task,
+            on_finished,
+            lambda exc: self.show_error(f"Failed to export URLs: {exc}"),
+        )
 
     def _import_urls(self) -> None:
-        """Import URLs from a text file."""
-        try:
-            file_path, _ = QFileDialog.getOpenFileName(
-                self,
-                "Import URLs",
-                "",
-                "Text Files (*.txt);;All Files (*)",
-            )
+        """Import URLs from a text file, or a JSON Lines/CSV export with all fields."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Import URLs",
+            "",
+            IMPORT_FILE_FILTERS,
+        )
 
-            if not file_path:
-                return
+        if not file_path:
+            return
 
-            added, skipped = self._db.import_urls(Path(file_path))
-            QMessageBox.information(
-                self,
-                "Import Complete",
-                f"Added: {added} URL(s)\nSkipped (duplicates): {skipped}",
-            )
+        path = Path(file_path)
+        import_file = self._db.import_urls if queue_file_format(path) is None else self._db.import_queue
+
+        def on_finished(result: tuple[int, int], cancelled: bool) -> None:
+            added, skipped = result
+            title = "Import Cancelled" if cancelled else "Import Complete"
+            QMessageBox.information(self, title, f"Added: {added} URL(s)\nSkipped (duplicates): {skipped}")
             self._refresh_stats()
 
-        except FileNotFoundError as e:
-            QMessageBox.warning(self, "File Not Found", str(e))
-        except Exception as e:
-            self._show_error(f"Failed to import URLs: {e}")
+        def on_failed(exc: Exception) -> None:
+            if isinstance(exc, FileNotFoundError):
+                QMessageBox.warning(self, "File Not Found", str(exc))
+            else:
+                self.show_error(f"Failed to import URLs: {exc}")
+            self._refresh_stats()
+
+        self._run_db_task(
+            "Importing URLs",
+            lambda progress: import_file(path, progress=progress),
+            on_finished,
+            on_failed,
+        )
+
+    def _run_db_task(
+        self,
+        title: str,
+        task: DbTask,
+        on_finished: callable,
+        on_failed: callable,
+    ) -> None:
+        """Run a long database task in the background behind a cancellable progress dialog.
+
+        `on_finished(result, cancelled)` or `on_failed(exc)` is called on the GUI thread.
+        """
+        if self._task_worker is not None and self._task_worker.isRunning():
+            QMessageBox.information(self, "Busy", "Another database task is still running.")
+            return
+
+        progress = QProgressDialog(f"{title}...", "Cancel", 0, 1000, self)
+        progress.setWindowTitle(title)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+
+        worker = DbTaskWorker(db_manager=self._db, task=task, parent=self)
+        worker.progress.connect(lambda done, total: progress.setValue(int(done * 1000 / total) if total else 0))
+        progress.canceled.connect(worker.cancel)
+
+        def finished(result) -> None:
+            progress.close()
+            on_finished(result, worker.cancel_requested)
+
+        def failed(exc: Exception) -> None:
+            progress.close()
+            on_failed(exc)
+
+        worker.finished_result.connect(finished)
+        worker.failed.connect(failed)
+        self._task_worker = worker
+        worker.start()
+
+    def done(self, result: int) -> None:
+        # Don't destroy a running worker thread with the dialog; stop it at its next chunk.
+        if self._task_worker is not None and self._task_worker.isRunning():
+            self._task_worker.finished_result.disconnect()
+            self._task_worker.failed.disconnect()
+            self._task_worker.cancel()
+            self._task_worker.wait()
+        super().done(result)
 
     def _vacuum_database(self) -> None:
         """Compact the database."""
@@ -714,26 +901,49 @@ class DatabaseDialog(BaseDialog):
             self._show_error(f"Failed to vacuum database: {e}")
 
     def _backup_database(self) -> None:
-        """Create a backup copy of the database."""
-        try:
-            default_name = f"gallery-dl_backup_{self._db.db_path.stem}.db"
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "Backup Database",
-                default_name,
-                "SQLite Database (*.db);;All Files (*)",
-            )
+        """Write a consistent copy of the database to a chosen file, in the background."""
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Backup Database",
+            f"{self._db.db_path.stem}_backup_{stamp}.db",
+            "SQLite Database (*.db);;All Files (*)",
+        )
 
-            if not file_path:
-                return
+        if not file_path:
+            return
 
-            import shutil
+        def on_finished(written: bool, cancelled: bool) -> None:
+            if written and not cancelled:
+                QMessageBox.information(self, "Backup Complete", f"Database backed up to:\n{file_path}")
+            else:
+                QMessageBox.information(self, "Backup Cancelled", "The backup was cancelled.")
 
-            shutil.copy2(self._db.db_path, file_path)
-            QMessageBox.information(self, "Backup Complete", f"Database backed up to:\n{file_path}")
+        self._run_db_task(
+            "Backing up database",
+            lambda progress: self._db.backup(Path(file_path), progress=progress),
+            on_finished,
+            lambda exc: self.show_error(f"Failed to backup database: {exc}"),
+        )
 
-        except Exception as e:
-            self._show_error(f"Failed to backup database: {e}")
+    def _snapshot_database(self) -> None:
+        """Add a timestamped snapshot to the backups folder, keeping the newest few."""
+
+        def on_finished(path: Path | None, cancelled: bool) -> None:
+            if path is None or cancelled:
+                QMessageBox.information(self, "Snapshot Cancelled", "The snapshot was cancelled.")
+                return
+            kept = len(self._db.list_snapshots())
+            QMessageBox.information(
+                self, "Snapshot Complete", f"Snapshot saved to:\n{path}\n\n{kept} snapshot(s) kept."
+            )
+
+        self._run_db_task(
+            "Taking snapshot",
+            lambda progress: self._db.backup_snapshot(progress=progress),
+            on_finished,
+            lambda exc: self.show_error(f"Failed to snapshot database: {exc}"),
+        )
 
     def _clear_archive(self) -> None:
         """Clear the gallery-dl archive file."""
@@ -913,20 +1123,14 @@ class DatabaseDialog(BaseDialog):
             ):
                 return
 
-            # Add reconstructable URLs
-            added = 0
-            skipped = 0
-            for extractor, ids in galleries.items():
-                for gallery_id in ids:
-                    url = _reconstruct_url(extractor, gallery_id)
-                    if url:
-                        result = self._db.add_url(url)
-                        if result is not None:
-                            # Mark as completed since it was already downloaded
-                            self._db.mark_completed(result)
-                            added += 1
-                        else:
-                            skipped += 1
+            # Add reconstructable URLs, marked completed since they were already downloaded
+            urls = (
+                url
+                for extractor, ids in galleries.items()
+                for gallery_id in ids
+                if (url := _reconstruct_url(extractor, gallery_id))
+            )
+            added, skipped = self._db.add_urls(urls, completed=True)
 
             QMessageBox.information(
                 self,
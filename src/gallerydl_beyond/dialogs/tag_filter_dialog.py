@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QComboBox, QDialogButtonBox, QFormLayout, QLabel, QPushButton, QScrollArea, QWidget
+
+from gallerydl_beyond.common.base_dialog import BaseDialog
+from gallerydl_beyond.common.database_manager import TagFilter, TagRow
+
+
+# (label, TagFilter field) for each choice offered per tag.
+TAG_FILTER_MODES: tuple[tuple[str, str | None], ...] = (
+    ("Ignore", None),
+    ("Must have", "all_of"),
+    ("Any of", "any_of"),
+    ("Must not have", "none_of"),
+)
+
+
+class TagFilterDialog(BaseDialog):
+    """Build a tag combination (AND / OR / NOT) for the History filter."""
+
+    def __init__(self, show_error: callable, tags: list[TagRow], current: TagFilter | None = None):
+        super().__init__("Filter by tags", show_error)
+        self._tags = tags
+        self._mode_combos: dict[int, QComboBox] = {}
+
+        self._build_ui(current or TagFilter())
+
+    @property
+    def tag_filter(self) -> TagFilter:
+        groups: dict[str, list[int]] = {"all_of": [], "any_of": [], "none_of": []}
+        for tag_id, combo in self._mode_combos.items():
+            group = combo.currentData()
+            if group is not None:
+                groups[group].append(tag_id)
+        return TagFilter(**groups)
+
+    def _build_ui(self, current: TagFilter) -> None:
+        self.main_layout.setContentsMargins(12, 12, 12, 12)
+        self.main_layout.setSpacing(10)
+
+        hint = QLabel(
+            "Show URLs that have every 'Must have' tag, at least one 'Any of' tag, and no 'Must not have' tag."
+        )
+        hint.setWordWrap(True)
+        hint.setStyleSheet("color: #8a8a8a;")
+        self.main_layout.addWidget(hint)
+
+        selected = {tag_id: "all_of" for tag_id in current.all_of}
+        selected.update({tag_id: "any_of" for tag_id in current.any_of})
+        selected.update({tag_id: "none_of" for tag_id in current.none_of})
+
+        form_widget = QWidget()
+        form = QFormLayout(form_widget)
+        form.setContentsMargins(0, 0, 0, 0)
+        for tag in self._tags:
+            combo = QComboBox()
+            for label, group in TAG_FILTER_MODES:
+                combo.addItem(label, group)
+            combo.setCurrentIndex(max(0, combo.findData(selected.get(tag.id))))
+            self._mode_combos[tag.id] = combo
+            form.addRow(tag.name, combo)
+
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(form_widget)
+        self.main_layout.addWidget(scroll, 1)
+
+        buttons = QDialogButtonBox()
+        clear_btn = QPushButton("Clear")
+        clear_btn.clicked.connect(self._clear)
+        apply_btn = QPushButton("Apply")
+        apply_btn.setDefault(True)
+        apply_btn.clicked.connect(self.accept)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addButton(clear_btn, QDialogButtonBox.ButtonRole.ResetRole)
+        buttons.addButton(apply_btn, QDialogButtonBox.ButtonRole.AcceptRole)
+        buttons.addButton(cancel_btn, QDialogButtonBox.ButtonRole.RejectRole)
+        self.main_layout.addWidget(buttons, alignment=Qt.AlignmentFlag.AlignRight)
+
+        self.setMinimumWidth(360)
+
+    def _clear(self) -> None:
+        for combo in self._mode_combos.values():
+            combo.setCurrentIndex(0)
@@ -6,7 +6,7 @@ from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
 from PyQt6.QtGui import QColor
 
 from gallerydl_beyond.common.constants import UrlStatus
-from gallerydl_beyond.common.database_manager import DatabaseManager, UrlRow
+from gallerydl_beyond.common.database_manager import DatabaseManager, TagFilter, UrlRow
 
 
 class HistoryModel(QAbstractTableModel):
@@ -42,23 +42,44 @@ class HistoryModel(QAbstractTableModel):
         self._current_page: int = 0
         self._total_count: int = 0
         self._search: str | None = None
-        self._tag_id: int | None = None
-        # Sorting state
+        self._tags: TagFilter | None = None
+        # Keyset cursor of the row just before the current page (None on the first
+        # page), and the filter/sort state the cursors belong to.
+        self._anchor: tuple | None = None
+        self._view: tuple | None = None
+        # Sorting state. A new search ranks hits by relevance until a column header
+        # is clicked; the column sort applies again once the search is cleared.
         self._sort_column: str = "date_processed"
         self._sort_ascending: bool = False
+        self._by_relevance: bool = False
 
     def refresh(
         self,
         *,
         search: str | None = None,
-        tag_id: int | None = None,
+        tags: TagFilter | None = None,
         page: int = 0,
         page_size: int = 100,
         sort_column: str | None = None,
         sort_ascending: bool | None = None,
+        recount: bool = True,
     ) -> None:
+        """Load a page of results.
+
+        Pages next to, or at either end of, the current one are fetched with keyset
+        cursors, so their cost does not depend on how deep into the history they are.
+        Search hits ranked by relevance have no cursor and are paged by offset.
+
+        Args:
+            recount: re-run the exact (filtered) count. The count is always refreshed
+                when filters or sorting change; navigation can skip it.
+        """
+        if not search:
+            self._by_relevance = False
+        elif not self._search:
+            self._by_relevance = True
         self._search = search
-        self._tag_id = tag_id
+        self._tags = tags
         self._page_size = page_size
 
         # Update sort state if provided
@@ -67,24 +88,73 @@ class HistoryModel(QAbstractTableModel):
         if sort_ascending is not None:
             self._sort_ascending = sort_ascending
 
-        self._total_count = self._db.count_urls(search=search, tag_id=tag_id)
+        view = (search, tags, page_size, self._sort_column, self._sort_ascending, self._by_relevance)
+        same_view = view == self._view
+        self._view = view
+
+        if recount or not same_view:
+            self._total_count = self._db.count_urls(search=search, tags=tags)
 
         # Clamp page to valid range
         max_page = max(0, (self._total_count - 1) // page_size) if self._total_count > 0 else 0
-        self._current_page = max(0, min(page, max_page))
-
-        offset = self._current_page * page_size
+        page = max(0, min(page, max_page))
 
         self.beginResetModel()
-        self._rows = self._db.list_urls(
-            search=search,
-            tag_id=tag_id,
-            limit=page_size,
+        if self._by_relevance:
+            self._anchor = None
+            self._rows = self._query(limit=page_size, offset=page * page_size)
+        elif not same_view or page == 0:
+            self._load_after(None)
+        elif page == self._current_page:
+            self._load_after(self._anchor)
+        elif page == self._current_page + 1 and self._rows:
+            self._load_after(self._cursor(self._rows[-1]))
+        elif page == self._current_page - 1 and self._rows:
+            self._load_before(self._cursor(self._rows[0]), page_size)
+        elif page == max_page:
+            self._load_before(None, self._total_count - max_page * page_size)
+        else:
+            self._load_offset(page * page_size)
+        self._current_page = page if self._by_relevance or self._anchor is not None else 0
+        self.endResetModel()
+
+    def _cursor(self, row: UrlRow) -> tuple:
+        return self._db.page_cursor(row, self._sort_column)
+
+    def _query(
+        self, *, limit: int, after: tuple | None = None, offset: int = 0, reverse: bool = False
+    ) -> list[UrlRow]:
+        return self._db.list_urls(
+            search=self._search,
+            tags=self._tags,
+            limit=limit,
             offset=offset,
-            sort_column=self._sort_column,
-            sort_ascending=self._sort_ascending,
+            after=after,
+            sort_column=self._db.RELEVANCE_SORT if self._by_relevance else self._sort_column,
+            sort_ascending=self._sort_ascending != reverse,
         )
-        self.endResetModel()
+
+    def _load_after(self, anchor: tuple | None) -> None:
+        """Load the page that starts right after `anchor` (the first page if None)."""
+        self._anchor = anchor
+        self._rows = self._query(limit=self._page_size, after=anchor)
+
+    def _load_before(self, cursor: tuple | None, count: int) -> None:
+        """Load the `count` rows that precede `cursor` (the end of the results if None).
+
+        Walks backwards with the sort reversed; the one extra row fetched is the
+        row before the page, i.e. the new anchor.
+        """
+        count = max(1, count)
+        rows = self._query(limit=count + 1, after=cursor, reverse=True)
+        self._anchor = self._cursor(rows[count]) if len(rows) > count else None
+        self._rows = list(reversed(rows[:count]))
+
+    def _load_offset(self, offset: int) -> None:
+        """Fallback for jumps to arbitrary pages; fetches the anchor row with the page."""
+        rows = self._query(limit=self._page_size + 1, offset=offset - 1)
+        self._anchor = self._cursor(rows[0]) if rows else None
+        self._rows = rows[1:]
 
     def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:  # noqa: N802
         """Handle column header click for sorting."""
@@ -93,9 +163,10 @@ class HistoryModel(QAbstractTableModel):
             return  # Column not sortable
 
         ascending = order == Qt.SortOrder.AscendingOrder
+        self._by_relevance = False
         self.refresh(
             search=self._search,
-            tag_id=self._tag_id,
+            tags=self._tags,
             page=0,  # Reset to first page on sort change
             page_size=self._page_size,
             sort_column=sort_col,
@@ -128,6 +199,11 @@ class HistoryModel(QAbstractTableModel):
     def sort_ascending(self) -> bool:
         return self._sort_ascending
 
+    @property
+    def by_relevance(self) -> bool:
+        """Whether search hits are ranked best match first instead of by `sort_column`."""
+        return self._by_relevance
+
     def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # noqa: N802
         if parent.isValid():
             return 0
@@ -160,7 +236,8 @@ class HistoryModel(QAbstractTableModel):
             if col == 1:
                 return row.url
             if col == 2:
-                return self._status_text(row.status)
+                text = self._status_text(row.status)
+                return f"{text} ({row.priority:+d})" if row.priority else text
             if col == 3:
                 return str(row.download_count)
             if col == 4:
@@ -173,6 +250,8 @@ class HistoryModel(QAbstractTableModel):
                 return ", ".join(row.tags) if row.tags else ""
 
         if role == Qt.ItemDataRole.ToolTipRole:
+            if col == 2 and row.priority:
+                return f"Priority {row.priority:+d}: claimed before lower priorities"
             if col == 6 and row.last_error:
                 return row.last_error
             if col == 7 and row.tags:
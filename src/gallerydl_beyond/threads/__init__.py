@@ -1,9 +1,11 @@
+from gallerydl_beyond.threads.db_task_worker import DbTaskWorker
 from gallerydl_beyond.threads.download_manager import DownloadManager
 from gallerydl_beyond.threads.download_worker import DownloadWorker
 from gallerydl_beyond.threads.startup_worker import StartupWorker
 
 
 __all__ = [
+    "DbTaskWorker",
     "DownloadManager",
     "DownloadWorker",
     "StartupWorker",
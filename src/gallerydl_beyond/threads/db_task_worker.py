@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from gallerydl_beyond.common.database_manager import DatabaseManager
+
+
+logger = logging.getLogger(__name__)
+
+# A long-running database task: receives a progress callback (done, total) that
+# returns False once cancellation has been requested.
+DbTask = Callable[[Callable[[int, int], bool]], Any]
+
+
+class DbTaskWorker(QThread):
+    """Run a long database operation (import, export, ...) off the GUI thread."""
+
+    progress = pyqtSignal("qint64", "qint64")  # done, total (bytes can exceed 2 GiB)
+    finished_result = pyqtSignal(object)  # task return value
+    failed = pyqtSignal(object)  # exception
+
+    def __init__(self, *, db_manager: DatabaseManager, task: DbTask, parent=None):
+        super().__init__(parent)
+        self._db = db_manager
+        self._task = task
+        self._cancel_requested = False
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested
+
+    def cancel(self) -> None:
+        """Ask the task to stop at its next progress report."""
+        self._cancel_requested = True
+
+    def _report(self, done: int, total: int) -> bool:
+        self.progress.emit(int(done), int(total))
+        return not self._cancel_requested
+
+    def run(self) -> None:
+        try:
+            result = self._task(self._report)
+        except Exception as exc:
+            logger.exception("Database task failed")
+            self.failed.emit(exc)
+        else:
+            self.finished_result.emit(result)
+        finally:
+            self._db.release_thread_connection()
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import logging
+import time
 from pathlib import Path
 
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 
 from gallerydl_beyond.common.database_manager import DatabaseManager
+from gallerydl_beyond.common.status_writer import StatusWriter
 from gallerydl_beyond.threads.download_worker import DownloadWorker
 
 
@@ -23,6 +25,9 @@ class DownloadManager(QObject):
 
     queue_updated = pyqtSignal(int, int, int)  # pending_count, stopped_count, active_count
 
+    # Lease renewals per DatabaseManager.LEASE_SECONDS, so a few missed beats don't lose a claim.
+    HEARTBEATS_PER_LEASE = 4
+
     def __init__(
         self,
         *,
@@ -30,10 +35,12 @@ class DownloadManager(QObject):
         gallerydl_cmd: list[str],
         config_path: str | Path,
         max_workers: int = 2,
+        status_writer: StatusWriter | None = None,
         parent=None,
     ):
         super().__init__(parent)
         self._db = db_manager
+        self._status_writer = status_writer
         self._gallerydl_cmd = list(gallerydl_cmd)
         self._config_path = Path(config_path)
 
@@ -45,6 +52,11 @@ class DownloadManager(QObject):
         self._next_worker_id = 1
         self._workers: dict[int, DownloadWorker] = {}
 
+        # Renews this instance's claim leases while any worker runs.
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setInterval(int(self._db.LEASE_SECONDS * 1000 / self.HEARTBEATS_PER_LEASE))
+        self._heartbeat.timeout.connect(self._renew_leases)
+
     @property
     def is_running(self) -> bool:
         return self._running
@@ -133,6 +145,12 @@ class DownloadManager(QObject):
         if self._running and not self._paused:
             self._fill_workers()
 
+    def _renew_leases(self) -> None:
+        try:
+            self._db.renew_leases()
+        except Exception:
+            logger.exception("Failed to renew claim leases")
+
     def _emit_counts(self) -> None:
         try:
             pending, stopped, active = self._db.get_counts()
@@ -145,11 +163,12 @@ class DownloadManager(QObject):
             self._emit_counts()
             return
 
-        while self._running and (not self._paused) and len(self._workers) < self._max_workers:
-            row = self._db.claim_next_pending(include_stopped=self._include_stopped)
-            if row is None:
-                break
+        # Claim every free slot in one transaction rather than one claim per slot.
+        free_slots = self._max_workers - len(self._workers)
+        rows = self._db.claim_next_batch(free_slots, include_stopped=self._include_stopped) if free_slots > 0 else []
+        claimed_at = time.time()
 
+        for row in rows:
             worker_id = self._next_worker_id
             self._next_worker_id += 1
 
@@ -159,6 +178,8 @@ class DownloadManager(QObject):
                 row=row,
                 gallerydl_cmd=self._gallerydl_cmd,
                 config_path=self._config_path,
+                status_writer=self._status_writer,
+                claimed_at=claimed_at,
             )
 
             worker.output.connect(self.worker_output)
@@ -170,6 +191,9 @@ class DownloadManager(QObject):
             self._workers[worker_id] = worker
             worker.start()
 
+        if self._workers and not self._heartbeat.isActive():
+            self._heartbeat.start()
+
         # Reset flag after initial fill - subsequent fills only pick up PENDING URLs
         self._include_stopped = False
         self._emit_counts()
@@ -193,6 +217,8 @@ class DownloadManager(QObject):
 
     def _on_worker_finished(self, worker_id: int) -> None:
         self._workers.pop(worker_id, None)
+        if not self._workers:
+            self._heartbeat.stop()
 
         if self._running and not self._paused:
             self._fill_workers()
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import logging
 import re
 import subprocess
 import sys
+import time
 from pathlib import Path
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
-from gallerydl_beyond.common.database_manager import DatabaseManager, UrlRow
+from gallerydl_beyond.common.database_manager import Attempt, DatabaseManager, UrlRow
+from gallerydl_beyond.common.status_writer import StatusWriter
+
+
+logger = logging.getLogger(__name__)
 
 # Patterns that indicate a file download failed
 _FAILURE_PATTERNS = [
@@ -19,6 +25,9 @@ _FAILURE_PATTERNS = [
 
 
 class DownloadWorker(QThread):
+    # Seconds to wait for the final status to be committed before signalling anyway.
+    COMMIT_TIMEOUT = 10.0
+
     output = pyqtSignal(int, str)  # worker_id, line
     url_started = pyqtSignal(int, int, str)  # worker_id, url_id, url
     url_completed = pyqtSignal(int, int)  # worker_id, url_id
@@ -32,11 +41,15 @@ class DownloadWorker(QThread):
         row: UrlRow,
         gallerydl_cmd: list[str],
         config_path: str | Path,
+        status_writer: StatusWriter | None = None,
+        claimed_at: float | None = None,
         parent=None,
     ):
         super().__init__(parent)
         self._worker_id = worker_id
         self._db = db_manager
+        # Status transitions go through the write-behind writer when one is given.
+        self._status: DatabaseManager | StatusWriter = status_writer or db_manager
         self._row = row
         self._gallerydl_cmd = list(gallerydl_cmd)
         self._config_path = Path(config_path)
@@ -49,6 +62,11 @@ class DownloadWorker(QThread):
         self._skipped_count = 0
         self._skipped_files: list[str] = []
 
+        # Run timings (epoch seconds), stored as an Attempt with the final status.
+        self._claimed_at = time.time() if claimed_at is None else claimed_at
+        self._started_at: float | None = None
+        self._first_output_at: float | None = None
+
     @property
     def worker_id(self) -> int:
         return self._worker_id
@@ -97,6 +115,23 @@ class DownloadWorker(QThread):
                 self._skipped_files.append(line)
                 break
 
+    def _attempt(self, exit_code: int | None) -> Attempt:
+        """Timings of this run, ending now."""
+        finished_at = time.time()
+        return Attempt(
+            claimed_at=self._claimed_at,
+            started_at=finished_at if self._started_at is None else self._started_at,
+            finished_at=finished_at,
+            first_output_at=self._first_output_at,
+            exit_code=exit_code,
+            failure_lines=self._skipped_count,
+        )
+
+    def _wait_committed(self) -> None:
+        """Wait for the final status to be committed, so `url_completed`/`url_failed` listeners read it."""
+        if isinstance(self._status, StatusWriter) and not self._status.wait_committed(self.COMMIT_TIMEOUT):
+            logger.warning("Status of URL %s not committed after %.0fs", self._row.id, self.COMMIT_TIMEOUT)
+
     def run(self) -> None:
         self.url_started.emit(self._worker_id, self._row.id, self._row.url)
 
@@ -108,6 +143,7 @@ class DownloadWorker(QThread):
 
         try:
             self.output.emit(self._worker_id, f"$ {' '.join(cmd)}")
+            self._started_at = time.time()
             self._process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
@@ -119,6 +155,8 @@ class DownloadWorker(QThread):
 
             assert self._process.stdout is not None
             for raw_line in self._process.stdout:
+                if self._first_output_at is None:
+                    self._first_output_at = time.time()
                 if self._stop_requested:
                     break
                 line = raw_line.rstrip("\n")
@@ -141,37 +179,49 @@ class DownloadWorker(QThread):
                     pass
                 returncode = self._process.wait()
 
+            attempt = self._attempt(returncode)
             if self._stop_requested:
                 if self._mark_as_requeue:
-                    self._db.mark_pending(self._row.id)
+                    self._status.mark_pending(self._row.id, attempt=attempt)
+                    self._wait_committed()
                     self.url_failed.emit(self._worker_id, self._row.id, "Requeued")
                 elif self._mark_as_skipped:
-                    self._db.mark_skipped(self._row.id)
+                    self._status.mark_skipped(self._row.id, attempt=attempt)
+                    self._wait_committed()
                     self.url_failed.emit(self._worker_id, self._row.id, "Skipped")
                 else:
-                    self._db.mark_stopped(self._row.id)
+                    self._status.mark_stopped(self._row.id, attempt=attempt)
+                    self._wait_committed()
                     self.url_failed.emit(self._worker_id, self._row.id, "Stopped")
                 return
 
             if returncode == 0:
                 if self._skipped_count > 0:
                     errors = "\n".join(self._skipped_files[:10])  # Limit stored errors
-                    self._db.mark_completed_partial(self._row.id, self._skipped_count, errors)
+                    self._status.mark_completed_partial(self._row.id, self._skipped_count, errors, attempt=attempt)
+                    self._wait_committed()
                     self.url_completed.emit(self._worker_id, self._row.id)
                 else:
-                    self._db.mark_completed(self._row.id)
+                    self._status.mark_completed(self._row.id, attempt=attempt)
+                    self._wait_committed()
                     self.url_completed.emit(self._worker_id, self._row.id)
             else:
                 error = f"gallery-dl exited with code {returncode}"
-                self._db.mark_failed(self._row.id, error)
+                self._status.mark_failed(self._row.id, error, attempt=attempt)
+                self._wait_committed()
                 self.url_failed.emit(self._worker_id, self._row.id, error)
 
         except Exception as exc:
             error = str(exc) or exc.__class__.__name__
+            process = self._process
             try:
-                self._db.mark_failed(self._row.id, error)
+                self._status.mark_failed(
+                    self._row.id, error, attempt=self._attempt(process.poll() if process is not None else None)
+                )
             except Exception:
                 pass
+            self._wait_committed()
             self.url_failed.emit(self._worker_id, self._row.id, error)
         finally:
             self._process = None
+            self._db.release_thread_connection()
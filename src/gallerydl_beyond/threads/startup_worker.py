@@ -118,6 +118,7 @@ class StartupWorker(QThread):
             logger.exception("Startup worker failed")
             self.log.emit("error", str(exc))
         finally:
+            self._db.release_thread_connection()
             self.finished_result.emit(
                 StartupResult(
                     config_path=config_path,
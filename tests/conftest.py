@@ -23,7 +23,8 @@ def db_manager(tmp_db_path: Path):
     # Create without QMutex for simpler testing (single-threaded tests)
     manager = DatabaseManager(db_path=tmp_db_path, mutex=MagicMock())
     manager.ensure_database()
-    return manager
+    yield manager
+    manager.close()
 
 
 @pytest.fixture
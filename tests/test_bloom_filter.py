@@ -0,0 +1,50 @@
+"""Tests for the Bloom filter."""
+
+from __future__ import annotations
+
+import pytest
+
+from gallerydl_beyond.common.bloom_filter import BloomFilter
+from gallerydl_beyond.common.url_normalizer import url_key
+
+
+class TestBloomFilter:
+    """Test membership, sizing and error rate."""
+
+    def test_added_keys_are_found(self):
+        """Every added key should test as present, including negative ones."""
+        bloom = BloomFilter(1000)
+        keys = [url_key(f"https://example.com/{i}") for i in range(1000)]
+        bloom.update(keys)
+
+        assert all(key in bloom for key in keys)
+        assert any(key < 0 for key in keys)
+
+    def test_add_reports_new_keys(self):
+        """add() should return False for a key already present and not count it again."""
+        bloom = BloomFilter(100)
+        key = url_key("https://example.com/1")
+
+        assert bloom.add(key) is True
+        assert bloom.add(key) is False
+        assert len(bloom) == 1
+
+    def test_false_positive_rate_near_target(self):
+        """At capacity, unseen keys should test present at about `error_rate`."""
+        bloom = BloomFilter(10_000, error_rate=0.01)
+        bloom.update(url_key(f"https://example.com/in/{i}") for i in range(10_000))
+
+        false_positives = sum(url_key(f"https://example.com/out/{i}") in bloom for i in range(20_000))
+
+        assert false_positives / 20_000 < 0.02
+
+    def test_size_follows_error_rate(self):
+        """About 9.6 bits per key at 1%, and more for a lower rate."""
+        assert BloomFilter(80_000, error_rate=0.01).nbytes == pytest.approx(96_000, rel=0.01)
+        assert BloomFilter(80_000, error_rate=0.001).nbytes > BloomFilter(80_000, error_rate=0.01).nbytes
+
+    @pytest.mark.parametrize("error_rate", [0.0, 1.0, -0.5])
+    def test_invalid_error_rate(self, error_rate: float):
+        """error_rate must be strictly between 0 and 1."""
+        with pytest.raises(ValueError):
+            BloomFilter(100, error_rate=error_rate)
@@ -2,14 +2,28 @@
 
 from __future__ import annotations
 
+import re
+import socket
 import sqlite3
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime
 from pathlib import Path
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from gallerydl_beyond.common.constants import UrlStatus
-from gallerydl_beyond.common.database_manager import DatabaseManager, TagRow, UrlRow
+from gallerydl_beyond.common.database_manager import (
+    Attempt,
+    DatabaseManager,
+    StatusTransition,
+    TagFilter,
+    TagRow,
+    UrlRow,
+)
+from gallerydl_beyond.common.url_normalizer import url_key
 
 
 class TestDatabaseCreation:
@@ -45,6 +59,8 @@ class TestDatabaseCreation:
             "date_processed",
             "last_error",
             "skipped_count",
+            "url_key",
+            "priority",
         }
         assert columns == expected_columns
 
@@ -54,7 +70,7 @@ class TestDatabaseCreation:
         manager.ensure_database()
 
         conn = sqlite3.connect(tmp_db_path)
-        cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='idx_urls_status';")
+        cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='idx_urls_queue';")
         result = cursor.fetchone()
         conn.close()
 
@@ -379,6 +395,58 @@ class TestClaimNextPending:
         assert second_claim is None
 
 
+class TestClaimNextBatch:
+    """Test claim_next_batch method."""
+
+    def test_claim_batch_claims_up_to_n(self, db_manager: DatabaseManager):
+        """claim_next_batch should claim at most n rows, in queue order."""
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(5)]
+
+        rows = db_manager.claim_next_batch(3)
+
+        assert [r.id for r in rows] == ids[:3]
+        assert all(r.status == UrlStatus.IN_PROGRESS for r in rows)
+        assert db_manager.get_counts() == (2, 0, 3)
+
+    def test_claim_batch_fewer_available(self, db_manager: DatabaseManager):
+        """claim_next_batch should return only what is available."""
+        db_manager.add_url("https://example.com/1")
+
+        rows = db_manager.claim_next_batch(8)
+
+        assert len(rows) == 1
+        assert db_manager.claim_next_batch(8) == []
+
+    def test_claim_batch_include_stopped(self, db_manager: DatabaseManager):
+        """claim_next_batch should only take STOPPED rows when asked to."""
+        id1 = db_manager.add_url("https://example.com/1")
+        id2 = db_manager.add_url("https://example.com/2")
+        db_manager.mark_stopped(id1)
+
+        assert [r.id for r in db_manager.claim_next_batch(2)] == [id2]
+        assert [r.id for r in db_manager.claim_next_batch(2, include_stopped=True)] == [id1]
+
+    def test_claim_batch_non_positive(self, db_manager: DatabaseManager):
+        """claim_next_batch with n <= 0 should claim nothing."""
+        db_manager.add_url("https://example.com/1")
+
+        assert db_manager.claim_next_batch(0) == []
+        assert db_manager.get_counts() == (1, 0, 0)
+
+    def test_claim_batch_without_returning(self, db_manager: DatabaseManager, monkeypatch):
+        """The SELECT + UPDATE fallback for old SQLite builds should behave the same."""
+        from gallerydl_beyond.common import database_manager
+
+        monkeypatch.setattr(database_manager, "_HAS_RETURNING", False)
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(3)]
+
+        rows = db_manager.claim_next_batch(2)
+
+        assert [r.id for r in rows] == ids[:2]
+        assert all(r.status == UrlStatus.IN_PROGRESS for r in rows)
+        assert db_manager.get_counts() == (1, 0, 2)
+
+
 class TestStatusUpdates:
     """Test status update methods."""
 
@@ -571,8 +639,9 @@ class TestListUrls:
 class TestResetInProgress:
     """Test startup recovery for interrupted downloads."""
 
-    def test_reset_in_progress_to_stopped(self, db_manager: DatabaseManager):
-        """reset_in_progress_to_stopped() should reset IN_PROGRESS to STOPPED."""
+    def test_reset_in_progress_to_stopped(self, db_manager: DatabaseManager, monkeypatch):
+        """reset_in_progress_to_stopped() should reset IN_PROGRESS to STOPPED once the lease expires."""
+        monkeypatch.setattr(db_manager, "LEASE_SECONDS", 0)
         db_manager.add_url("https://example.com/gallery")
         db_manager.claim_next_pending()
 
@@ -583,8 +652,9 @@ class TestResetInProgress:
         assert row.status == UrlStatus.STOPPED
         assert "Interrupted" in row.last_error
 
-    def test_reset_returns_count(self, db_manager: DatabaseManager):
+    def test_reset_returns_count(self, db_manager: DatabaseManager, monkeypatch):
         """reset_in_progress_to_stopped() should return number of reset URLs."""
+        monkeypatch.setattr(db_manager, "LEASE_SECONDS", 0)
         db_manager.add_url("https://example.com/1")
         db_manager.add_url("https://example.com/2")
         db_manager.add_url("https://example.com/3")
@@ -852,6 +922,49 @@ class TestExportImportUrls:
         assert added == 1
         assert skipped == 0
 
+    def test_import_urls_in_chunks(self, db_manager: DatabaseManager, tmp_path: Path):
+        """Duplicates should be counted whether they fall in the same chunk or a later one."""
+        import_file = tmp_path / "import.txt"
+        lines = [f"https://example.com/{i % 7}" for i in range(20)]
+        import_file.write_text("\ufeff" + "\n".join(lines) + "\n", encoding="utf-8")
+        reports: list[tuple[int, int]] = []
+
+        added, skipped = db_manager.import_urls(
+            import_file, chunk_size=3, progress=lambda done, total: reports.append((done, total))
+        )
+
+        assert (added, skipped) == (7, 13)
+        assert db_manager.count_urls() == 7
+        assert reports[-1] == (import_file.stat().st_size, import_file.stat().st_size)
+        assert [done for done, _ in reports] == sorted(done for done, _ in reports)
+
+    def test_import_urls_cancel_keeps_committed_chunks(self, db_manager: DatabaseManager, tmp_path: Path):
+        """Returning False from progress should stop after the current chunk."""
+        import_file = tmp_path / "import.txt"
+        import_file.write_text("".join(f"https://example.com/{i}\n" for i in range(10)))
+
+        added, skipped = db_manager.import_urls(import_file, chunk_size=4, progress=lambda done, total: False)
+
+        assert (added, skipped) == (4, 0)
+        assert db_manager.count_urls() == 4
+
+    def test_import_urls_releases_write_lock_between_chunks(self, db_manager: DatabaseManager, tmp_path: Path):
+        """Other writers should get the lock while an import is in progress."""
+        import_file = tmp_path / "import.txt"
+        import_file.write_text("".join(f"https://example.com/{i}\n" for i in range(6)))
+        other_ids: list[int] = []
+
+        def progress(done: int, total: int) -> None:
+            if not other_ids:
+                thread = threading.Thread(target=lambda: other_ids.append(db_manager.add_url("https://other.org/x")))
+                thread.start()
+                thread.join(timeout=5)
+
+        db_manager.import_urls(import_file, chunk_size=2, progress=progress)
+
+        assert len(other_ids) == 1
+        assert db_manager.count_urls() == 7
+
 
 class TestTagCreation:
     """Test tag tables creation."""
@@ -866,7 +979,7 @@ class TestTagCreation:
         columns = {row[1] for row in cursor.fetchall()}
         conn.close()
 
-        assert columns == {"id", "name", "date_created"}
+        assert columns == {"id", "name", "date_created", "url_count"}
 
     def test_ensure_database_creates_url_tags_table(self, tmp_db_path: Path):
         """ensure_database() should create the url_tags table."""
@@ -1082,7 +1195,7 @@ class TestUrlTagAssociation:
         db_manager.assign_tag_to_url(url_id, tag2)
 
         # Replace with new set
-        db_manager.set_url_tags(url_id, [tag2, tag3])
+        assert db_manager.set_url_tags(url_id, [tag2, tag3]) == (1, 1)
 
         tags = db_manager.get_tags_for_url(url_id)
         tag_names = [t.name for t in tags]
@@ -1094,11 +1207,19 @@ class TestUrlTagAssociation:
         tag_id = db_manager.create_tag("my-tag")
         db_manager.assign_tag_to_url(url_id, tag_id)
 
-        db_manager.set_url_tags(url_id, [])
+        assert db_manager.set_url_tags(url_id, []) == (0, 1)
 
         tags = db_manager.get_tags_for_url(url_id)
         assert tags == []
 
+    def test_set_url_tags_ignores_unknown_tags(self, db_manager: DatabaseManager):
+        """set_url_tags() should skip tag ids that do not exist."""
+        url_id = db_manager.add_url("https://example.com/gallery")
+        tag_id = db_manager.create_tag("real")
+
+        assert db_manager.set_url_tags(url_id, [tag_id, 9999]) == (1, 0)
+        assert [t.id for t in db_manager.get_tags_for_url(url_id)] == [tag_id]
+
     def test_delete_tag_cascade(self, db_manager: DatabaseManager):
         """Deleting a tag should cascade to url_tags."""
         url_id = db_manager.add_url("https://example.com/gallery")
@@ -1311,6 +1432,31 @@ class TestListUrlsWithTags:
         assert len(urls) == 1
         assert urls[0].tags == ()
 
+    def test_list_urls_tag_name_with_comma(self, db_manager: DatabaseManager):
+        """Tag names containing ", " should come back intact."""
+        url_id = db_manager.add_url("https://example.com/gallery")
+        db_manager.assign_tag_to_url(url_id, db_manager.create_tag("cats, dogs"))
+
+        assert db_manager.list_urls()[0].tags == ("cats, dogs",)
+
+    def test_list_urls_tags_per_row(self, db_manager: DatabaseManager):
+        """Each row on a page should get only its own tags."""
+        url1 = db_manager.add_url("https://example.com/1")
+        url2 = db_manager.add_url("https://example.com/2")
+        db_manager.add_url("https://example.com/3")
+        shared = db_manager.create_tag("shared")
+        db_manager.assign_tag_to_url(url1, shared)
+        db_manager.assign_tag_to_url(url2, shared)
+        db_manager.assign_tag_to_url(url2, db_manager.create_tag("only2"))
+
+        tags = {r.url: r.tags for r in db_manager.list_urls(sort_column="id")}
+
+        assert tags == {
+            "https://example.com/1": ("shared",),
+            "https://example.com/2": ("only2", "shared"),
+            "https://example.com/3": (),
+        }
+
     def test_list_urls_filter_by_tag(self, db_manager: DatabaseManager):
         """list_urls(tag_id=X) should only return URLs with that tag."""
         url1 = db_manager.add_url("https://example.com/tagged")
@@ -1462,6 +1608,14 @@ class TestBulkAddTag:
         added = db_manager.bulk_add_tag([], tag_id)
         assert added == 0
 
+    def test_bulk_add_tag_skips_unknown_ids(self, db_manager: DatabaseManager):
+        """Unknown URL ids and tag ids should be ignored, not counted."""
+        url_id = db_manager.add_url("https://example.com/1")
+        tag_id = db_manager.create_tag("test-tag")
+
+        assert db_manager.bulk_add_tag([url_id, 9999], tag_id) == 1
+        assert db_manager.bulk_add_tag([url_id], 9999) == 0
+
 
 class TestBulkRemoveTag:
     """Test bulk_remove_tag method."""
@@ -1570,3 +1724,1936 @@ class TestBulkRequeue:
         """bulk_requeue with empty list should return 0."""
         requeued = db_manager.bulk_requeue([])
         assert requeued == 0
+
+
+class TestLargeSelections:
+    """Test bulk operations on selections larger than SQLite's bound-parameter limit."""
+
+    # Just above SQLITE_MAX_VARIABLE_NUMBER (32766 since SQLite 3.32).
+    COUNT = 33_000
+
+    @pytest.fixture
+    def many(self, db_manager: DatabaseManager, tmp_path: Path) -> list[int]:
+        import_file = tmp_path / "many.txt"
+        import_file.write_text("".join(f"https://example.com/{i}\n" for i in range(self.COUNT)))
+        db_manager.import_urls(import_file)
+        return list(range(1, self.COUNT + 1))
+
+    def test_bulk_status_requeue_and_tags(self, db_manager: DatabaseManager, many: list[int]):
+        """Each bulk operation should cover the whole selection in one statement."""
+        tag_id = db_manager.create_tag("big")
+        db_manager.bulk_add_tag(many[:10], tag_id)
+
+        assert db_manager.bulk_update_status(many, UrlStatus.SKIPPED) == self.COUNT
+        assert db_manager.get_statistics()["by_status"][UrlStatus.SKIPPED] == self.COUNT
+        assert db_manager.bulk_requeue(many, force_redownload=True) == self.COUNT
+        assert db_manager.bulk_remove_tag(many, tag_id) == 10
+        # The temp selection should not outlive the operation.
+        with db_manager._read() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM temp.selected_ids;").fetchone()[0] == 0
+
+    def test_bulk_delete_skips_in_progress(self, db_manager: DatabaseManager, many: list[int]):
+        """Deletes should still skip claimed rows and report them."""
+        db_manager.claim_next_batch(3)
+
+        assert db_manager.bulk_delete_urls(many + many[:5]) == (self.COUNT - 3, 3)
+        assert db_manager.count_urls() == 3
+
+
+class TestConnectionPool:
+    """Test the per-thread connection pool."""
+
+    def test_same_thread_reuses_connection(self, db_manager: DatabaseManager):
+        """Calls from one thread should share a single pooled connection."""
+        db_manager.add_url("https://example.com/1")
+        conn = db_manager._connection()
+
+        db_manager.get_counts()
+        db_manager.list_urls()
+
+        assert db_manager._connection() is conn
+        assert len(db_manager._connections) == 1
+
+    def test_pragmas_applied(self, db_manager: DatabaseManager):
+        """Pooled connections should have WAL and foreign keys enabled."""
+        conn = db_manager._connection()
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA foreign_keys;").fetchone()[0] == 1
+
+    def test_threads_get_separate_connections(self, db_manager: DatabaseManager):
+        """Each thread should get its own connection."""
+        main_conn = db_manager._connection()
+        seen = []
+
+        def work():
+            db_manager.add_url("https://example.com/thread")
+            seen.append(db_manager._connection())
+
+        t = threading.Thread(target=work)
+        t.start()
+        t.join()
+
+        assert seen[0] is not main_conn
+        assert db_manager.url_exists("https://example.com/thread")
+
+    def test_release_thread_connection(self, db_manager: DatabaseManager):
+        """release_thread_connection() should drop only the calling thread's connection."""
+        db_manager._connection()
+
+        def work():
+            db_manager.get_counts()
+            db_manager.release_thread_connection()
+
+        t = threading.Thread(target=work)
+        t.start()
+        t.join()
+
+        assert list(db_manager._connections) == [threading.get_ident()]
+
+    def test_close_closes_all_connections(self, db_manager: DatabaseManager):
+        """close() should close pooled connections and allow lazy reopening."""
+        conn = db_manager._connection()
+
+        db_manager.close()
+
+        assert db_manager._connections == {}
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1;")
+        # Still usable afterwards
+        assert db_manager.add_url("https://example.com/1") is not None
+
+    def test_failed_write_rolls_back(self, db_manager: DatabaseManager):
+        """An exception inside a call should not leave a transaction open on the pooled connection."""
+        url_id = db_manager.add_url("https://example.com/1")
+        db_manager.claim_next_pending()
+
+        with pytest.raises(RuntimeError):
+            db_manager.delete_url(url_id)
+
+        assert not db_manager._connection().in_transaction
+        assert db_manager.get_by_url("https://example.com/1") is not None
+
+
+class TestConcurrency:
+    """Test reader/writer concurrency with a real QMutex."""
+
+    @pytest.fixture
+    def locked_manager(self, tmp_db_path: Path):
+        manager = DatabaseManager(db_path=tmp_db_path)
+        manager.ensure_database()
+        yield manager
+        manager.close()
+
+    def test_reads_do_not_wait_for_write_lock(self, locked_manager: DatabaseManager):
+        """Reads should complete while another thread holds the write mutex."""
+        locked_manager.add_url("https://example.com/1")
+        results = []
+
+        def read():
+            results.append(locked_manager.get_counts())
+            results.append(len(locked_manager.list_urls()))
+            locked_manager.release_thread_connection()
+
+        locked_manager._mutex.lock()
+        try:
+            t = threading.Thread(target=read)
+            t.start()
+            t.join(timeout=5)
+            finished = not t.is_alive()
+        finally:
+            locked_manager._mutex.unlock()
+        t.join()
+
+        assert finished
+        assert results == [(1, 0, 0), 1]
+
+    def test_concurrent_writers_and_reader(self, locked_manager: DatabaseManager):
+        """Several writer threads and a reader should run together without errors or lost updates."""
+        writers = 4
+        per_writer = 50
+        errors: list[Exception] = []
+        done = threading.Event()
+        reads = []
+
+        def write(n: int):
+            try:
+                for i in range(per_writer):
+                    url_id = locked_manager.add_url(f"https://example.com/{n}/{i}")
+                    if i % 2:
+                        locked_manager.mark_completed(url_id)
+            except Exception as exc:
+                errors.append(exc)
+                raise
+            finally:
+                locked_manager.release_thread_connection()
+
+        def read():
+            try:
+                while not done.is_set():
+                    pending, _stopped, _active = locked_manager.get_counts()
+                    reads.append(pending)
+                    locked_manager.list_urls(limit=20)
+            except Exception as exc:
+                errors.append(exc)
+                raise
+            finally:
+                locked_manager.release_thread_connection()
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(writers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        done.set()
+        reader.join()
+
+        assert errors == []
+        assert reads
+        stats = locked_manager.get_statistics()
+        assert stats["total"] == writers * per_writer
+        assert stats["by_status"][UrlStatus.COMPLETED] == writers * per_writer // 2
+        assert stats["by_status"][UrlStatus.PENDING] == writers * per_writer // 2
+
+
+class TestStatusCounts:
+    """Test the trigger-maintained status_counts table."""
+
+    def _stored_counts(self, tmp_db_path: Path) -> dict[int, int]:
+        conn = sqlite3.connect(tmp_db_path)
+        rows = conn.execute("SELECT status, url_count FROM status_counts WHERE url_count != 0;").fetchall()
+        conn.close()
+        return dict(rows)
+
+    def test_counts_follow_inserts_updates_deletes(self, db_manager: DatabaseManager, tmp_db_path: Path):
+        """Triggers should keep counts in step with every kind of change."""
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(4)]
+        db_manager.mark_completed(ids[0])
+        db_manager.mark_failed(ids[1], "Error")
+        db_manager.bulk_update_status(ids[2:], UrlStatus.SKIPPED)
+        db_manager.delete_url(ids[3])
+
+        assert self._stored_counts(tmp_db_path) == {
+            UrlStatus.COMPLETED: 1,
+            UrlStatus.FAILED: 1,
+            UrlStatus.SKIPPED: 1,
+        }
+        assert db_manager.verify_status_counts(repair=False) is True
+
+    def test_clear_all_resets_counts(self, db_manager: DatabaseManager, tmp_db_path: Path):
+        """Deleting every row should bring all counters back to zero."""
+        for i in range(3):
+            db_manager.add_url(f"https://example.com/{i}")
+
+        db_manager.clear_all()
+
+        assert self._stored_counts(tmp_db_path) == {}
+        assert db_manager.get_statistics()["total"] == 0
+
+    def test_statistics_date_range(self, db_manager: DatabaseManager):
+        """date_range should span the oldest add and the newest processing date."""
+        id1 = db_manager.add_url("https://example.com/1")
+        db_manager.add_url("https://example.com/2")
+        db_manager.mark_completed(id1)
+
+        oldest, newest = db_manager.get_statistics()["date_range"]
+
+        assert oldest == db_manager.get_by_url("https://example.com/1").date_added
+        assert newest == db_manager.get_by_url("https://example.com/1").date_processed
+
+    def test_verify_repairs_drift(self, db_manager: DatabaseManager, tmp_db_path: Path):
+        """verify_status_counts should detect and rebuild drifted counters."""
+        db_manager.add_url("https://example.com/1")
+        conn = sqlite3.connect(tmp_db_path)
+        conn.execute("UPDATE status_counts SET url_count = 42;")
+        conn.commit()
+        conn.close()
+
+        assert db_manager.verify_status_counts() is False
+        assert db_manager.verify_status_counts() is True
+        assert db_manager.get_counts() == (1, 0, 0)
+
+    def test_backfill_on_existing_database(self, tmp_db_path: Path):
+        """A database created before status_counts existed should be backfilled."""
+        manager = DatabaseManager(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+        manager.add_url("https://example.com/1")
+        manager.add_url("https://example.com/2")
+        manager.close()
+
+        conn = sqlite3.connect(tmp_db_path)
+        for trigger in ("trg_urls_counts_insert", "trg_urls_counts_delete", "trg_urls_counts_update"):
+            conn.execute(f"DROP TRIGGER {trigger};")
+        conn.execute("DROP TABLE status_counts;")
+        conn.execute("PRAGMA user_version = 0;")  # as written before schema versioning
+        conn.commit()
+        conn.close()
+
+        manager = DatabaseManager(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+
+        assert manager.get_counts() == (2, 0, 0)
+        manager.close()
+
+
+class TestUrlSearchIndex:
+    """Test the FTS5 trigram index used for URL search."""
+
+    def test_search_uses_fts_index(self, db_manager: DatabaseManager):
+        """Searches of 3+ characters should be answered from urls_fts."""
+        assert db_manager._fts_enabled
+        with db_manager._read() as conn:
+            joins, conditions, _params = db_manager._filter_sql(conn, "example", None)
+
+        assert "urls_fts" in joins
+        assert conditions == ["urls_fts MATCH ?"]
+
+    def test_short_search_falls_back_to_like(self, db_manager: DatabaseManager):
+        """Terms shorter than a trigram should still match via LIKE."""
+        db_manager.add_url("https://example.com/ab")
+        db_manager.add_url("https://example.com/cd")
+
+        assert db_manager.count_urls(search="ab") == 1
+        assert [r.url for r in db_manager.list_urls(search="ab")] == ["https://example.com/ab"]
+
+    def test_search_matches_substring_mid_token(self, db_manager: DatabaseManager):
+        """Trigram search should match arbitrary substrings, including punctuation."""
+        db_manager.add_url("https://example.com/gallery/12345")
+        db_manager.add_url("https://other.org/post/999")
+
+        assert db_manager.count_urls(search="ery/123") == 1
+        assert db_manager.count_urls(search='say "hi"') == 0
+
+    def test_index_follows_deletes(self, db_manager: DatabaseManager):
+        """Deleted URLs should disappear from search results."""
+        url_id = db_manager.add_url("https://example.com/gallery1")
+        db_manager.add_url("https://example.com/gallery2")
+
+        db_manager.delete_url(url_id)
+
+        assert [r.url for r in db_manager.list_urls(search="gallery")] == ["https://example.com/gallery2"]
+
+    def test_relevance_sort(self, db_manager: DatabaseManager):
+        """RELEVANCE_SORT should rank closer matches first."""
+        db_manager.add_url("https://example.com/cat/cat/cat")
+        db_manager.add_url("https://example.com/cat/dog/bird/fish")
+
+        rows = db_manager.list_urls(search="cat", sort_column=DatabaseManager.RELEVANCE_SORT)
+
+        assert [r.url for r in rows] == ["https://example.com/cat/cat/cat", "https://example.com/cat/dog/bird/fish"]
+
+    def test_backfill_on_existing_database(self, tmp_db_path: Path):
+        """An existing database without the index should get it built from current rows."""
+        manager = DatabaseManager(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+        manager.add_url("https://example.com/gallery1")
+        manager.close()
+
+        conn = sqlite3.connect(tmp_db_path)
+        for trigger in ("trg_urls_fts_insert", "trg_urls_fts_delete", "trg_urls_fts_update"):
+            conn.execute(f"DROP TRIGGER {trigger};")
+        conn.execute("DROP TABLE urls_fts;")
+        conn.execute("PRAGMA user_version = 1;")  # before the search index migration
+        conn.commit()
+        conn.close()
+
+        manager = DatabaseManager(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+
+        assert manager.count_urls(search="gallery") == 1
+        manager.close()
+
+
+class TestKeysetPagination:
+    """Test cursor-based paging through list_urls(after=...)."""
+
+    @pytest.fixture
+    def populated(self, db_manager: DatabaseManager) -> DatabaseManager:
+        # Several rows share each sort value so ties have to be broken by id.
+        for i in range(23):
+            url_id = db_manager.add_url(f"https://example.com/{i:02d}")
+            if i % 5:
+                db_manager.mark_completed(url_id)
+        return db_manager
+
+    @pytest.mark.parametrize("sort_column", sorted(DatabaseManager.SORT_COLUMNS))
+    @pytest.mark.parametrize("ascending", [True, False])
+    def test_cursor_walk_matches_offset_order(self, populated: DatabaseManager, sort_column: str, ascending: bool):
+        """Walking pages by cursor should visit the same rows, in the same order, as one query."""
+        expected = [r.id for r in populated.list_urls(sort_column=sort_column, sort_ascending=ascending)]
+
+        seen: list[int] = []
+        after = None
+        while True:
+            page = populated.list_urls(limit=5, after=after, sort_column=sort_column, sort_ascending=ascending)
+            if not page:
+                break
+            seen.extend(r.id for r in page)
+            after = populated.page_cursor(page[-1], sort_column)
+
+        assert seen == expected
+
+    def test_cursor_respects_filters(self, populated: DatabaseManager):
+        """Cursor pages should only contain rows matching the search."""
+        first = populated.list_urls(search="com/1", limit=3)
+        rest = populated.list_urls(search="com/1", limit=100, after=populated.page_cursor(first[-1], "date_processed"))
+
+        assert {r.url for r in first + rest} == {f"https://example.com/1{i}" for i in range(10)}
+
+    def test_relevance_sort_rejects_cursor(self, populated: DatabaseManager):
+        """Relevance order has no stable key to seek on."""
+        with pytest.raises(ValueError):
+            populated.list_urls(search="example", after=(0, 0), sort_column=DatabaseManager.RELEVANCE_SORT)
+
+    def test_unfiltered_count_uses_status_counts(self, populated: DatabaseManager):
+        """The unfiltered total should match a direct count of urls."""
+        conn = sqlite3.connect(populated.db_path)
+        (total,) = conn.execute("SELECT COUNT(*) FROM urls;").fetchone()
+        conn.close()
+
+        assert populated.count_urls() == total == 23
+
+    def test_history_model_navigation(self, populated: DatabaseManager):
+        """Next, previous, last and arbitrary page jumps should agree with offset paging."""
+        from gallerydl_beyond.models.history_model import HistoryModel
+
+        model = HistoryModel(populated)
+        expected = [r.id for r in populated.list_urls(sort_column=model.sort_column, sort_ascending=False)]
+
+        def page_ids() -> list[int]:
+            return [model._rows[i].id for i in range(len(model._rows))]
+
+        def check(page: int) -> None:
+            assert model.current_page == page
+            assert page_ids() == expected[page * 5 : page * 5 + 5]
+
+        model.refresh(page_size=5)
+        check(0)
+        for page in (1, 2, 1, 0, 4, 3, 2, 2):
+            model.refresh(page_size=5, page=page, recount=False)
+            check(page)
+        model.refresh(page_size=5, page=99, recount=False)
+        check(4)
+
+
+class TestQueueExport:
+    """Test full-fidelity export_queue() / import_queue() round trips."""
+
+    @pytest.fixture
+    def source(self, db_manager: DatabaseManager) -> DatabaseManager:
+        done = db_manager.add_url("https://example.com/done")
+        db_manager.mark_completed(done)
+        failed = db_manager.add_url("https://example.com/failed")
+        db_manager.mark_failed(failed, "boom, with a comma\nand a newline")
+        db_manager.add_url("https://example.com/running")
+        db_manager.claim_next_batch(1)
+        db_manager.add_url("https://example.com/pending")
+        tag = db_manager.create_tag("cats, dogs")
+        db_manager.assign_tag_to_url(done, tag)
+        db_manager.assign_tag_to_url(failed, tag)
+        db_manager.assign_tag_to_url(failed, db_manager.create_tag("ünïcode"))
+        return db_manager
+
+    @pytest.mark.parametrize("name", ["queue.jsonl", "queue.csv", "queue.jsonl.gz", "queue.csv.gz"])
+    def test_round_trip(self, source: DatabaseManager, tmp_path: Path, name: str):
+        """Every field and tag should survive an export and import into an empty database."""
+        export_file = tmp_path / name
+
+        assert source.export_queue(export_file, batch_size=2) == 4
+        assert not (tmp_path / (name + ".part")).exists()
+
+        target = DatabaseManager(db_path=tmp_path / "target.db", mutex=MagicMock())
+        target.ensure_database()
+        added, skipped = target.import_queue(export_file, chunk_size=3)
+
+        assert (added, skipped) == (4, 0)
+        expected = {r.url: r for r in source.list_urls()}
+        for row in target.list_urls():
+            original = expected[row.url]
+            if original.status == UrlStatus.IN_PROGRESS:
+                assert row.status == UrlStatus.STOPPED
+                original = replace(original, status=UrlStatus.STOPPED)
+            assert replace(row, id=original.id) == original
+        target.close()
+
+    def test_import_merges_tags_into_existing_urls(self, source: DatabaseManager, tmp_path: Path):
+        """Existing URLs are skipped but pick up the exported tags."""
+        export_file = tmp_path / "queue.jsonl"
+        source.export_queue(export_file)
+        source.set_url_tags(source.get_by_url("https://example.com/done").id, [])
+
+        added, skipped = source.import_queue(export_file)
+
+        assert (added, skipped) == (0, 4)
+        assert {r.url: r.tags for r in source.list_urls()}["https://example.com/done"] == ("cats, dogs",)
+
+    def test_export_cancel_leaves_no_file(self, source: DatabaseManager, tmp_path: Path):
+        """Cancelling should remove the partial file."""
+        export_file = tmp_path / "queue.csv"
+
+        assert source.export_queue(export_file, batch_size=1, progress=lambda done, total: False) == 0
+        assert list(tmp_path.glob("queue.csv*")) == []
+
+    def test_unsupported_format(self, source: DatabaseManager, tmp_path: Path):
+        """Only .jsonl and .csv (optionally gzipped) are queue files."""
+        with pytest.raises(ValueError):
+            source.export_queue(tmp_path / "queue.txt")
+
+
+class TestUrlDedup:
+    """Test duplicate detection on the normalized url_key."""
+
+    def test_add_url_rejects_equivalent_url(self, db_manager: DatabaseManager):
+        """A URL that normalizes to a stored one should not be queued again."""
+        url_id = db_manager.add_url("https://x.com/user/status/1")
+
+        assert db_manager.add_url("http://twitter.com/user/status/1/?s=20") is None
+        assert db_manager.url_exists("https://www.x.com/user/status/1")
+        assert db_manager.get_by_url("https://twitter.com/user/status/1").id == url_id
+
+    def test_requeue_by_equivalent_url(self, db_manager: DatabaseManager):
+        """requeue_existing_url() should find the row from any spelling of the address."""
+        url_id = db_manager.add_url("https://example.com/gallery/1")
+        db_manager.mark_completed(url_id)
+
+        assert db_manager.requeue_existing_url("http://www.example.com/gallery/1/", check_new_only=True) == url_id
+        assert db_manager.get_by_url("https://example.com/gallery/1").status == UrlStatus.PENDING
+
+    def test_import_counts_equivalent_urls_as_duplicates(self, db_manager: DatabaseManager, tmp_path: Path):
+        """Imports should skip URLs equivalent to stored ones or to earlier lines."""
+        db_manager.add_url("https://example.com/a")
+        import_file = tmp_path / "import.txt"
+        import_file.write_text(
+            "http://example.com/a/\nhttps://example.com/b\nhttps://www.example.com/b?utm_source=x\n"
+        )
+
+        assert db_manager.import_urls(import_file) == (1, 2)
+
+    def test_migration_backfills_keys_and_reports_duplicates(self, tmp_db_path: Path, caplog):
+        """Databases from before url_key should get it filled in and duplicates logged."""
+        conn = sqlite3.connect(tmp_db_path)
+        conn.execute(
+            """
+            CREATE TABLE urls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                status INTEGER NOT NULL DEFAULT 0,
+                force_redownload INTEGER NOT NULL DEFAULT 0,
+                check_new_only INTEGER NOT NULL DEFAULT 0,
+                download_count INTEGER NOT NULL DEFAULT 0,
+                date_added TEXT NOT NULL,
+                date_processed TEXT,
+                last_error TEXT,
+                skipped_count INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        conn.executemany(
+            "INSERT INTO urls (url, date_added) VALUES (?, '2024-01-01');",
+            [("https://x.com/a/status/1",), ("https://twitter.com/a/status/1",), ("https://example.com/solo",)],
+        )
+        conn.commit()
+        conn.close()
+
+        manager = DatabaseManager(db_path=tmp_db_path, mutex=MagicMock())
+        with caplog.at_level("WARNING"):
+            manager.ensure_database()
+
+        clusters = manager.find_duplicate_urls()
+        assert [[row.url for row in cluster] for cluster in clusters] == [
+            ["https://x.com/a/status/1", "https://twitter.com/a/status/1"]
+        ]
+        assert "1 group(s)" in caplog.text
+        assert manager.add_url("https://example.com/solo/") is None
+        manager.close()
+
+    def test_rows_written_without_key_are_found_after_reopen(self, db_manager: DatabaseManager):
+        """A row inserted by another tool without url_key should get one on the next open."""
+        db_manager.close()
+        conn = sqlite3.connect(db_manager.db_path)
+        conn.execute(
+            "INSERT INTO urls (url, status, date_added) VALUES ('https://example.com/external', ?, 0);",
+            (UrlStatus.COMPLETED,),
+        )
+        conn.commit()
+        conn.close()
+
+        manager = DatabaseManager(db_path=db_manager.db_path, mutex=MagicMock())
+        manager.ensure_database()
+
+        assert manager.url_exists("https://www.example.com/external/")
+        assert manager.requeue_existing_url("https://example.com/external") is not None
+        assert manager.add_url("https://example.com/external") is None
+        manager.close()
+
+    def test_migration_rekeys_urls_with_share_params(self, db_manager: DatabaseManager):
+        """Keys stored when `si` was stripped everywhere should be recomputed, so the row is found again."""
+        url = "https://example.com/view?si=2"
+        url_id = db_manager.add_url(url)
+        with db_manager._write() as conn:
+            conn.execute("UPDATE urls SET url_key = ? WHERE id = ?;", (url_key("https://example.com/view"), url_id))
+            conn.execute("PRAGMA user_version = 9;")
+        db_manager.close()
+
+        manager = DatabaseManager(db_path=db_manager.db_path, mutex=MagicMock())
+        manager.ensure_database()
+
+        assert manager.get_by_url(url).id == url_id
+        assert manager.add_url("https://example.com/view") is not None
+        manager.close()
+
+
+class TestSchemaVersioning:
+    """Test PRAGMA user_version based migrations."""
+
+    def test_new_database_is_at_current_version(self, db_manager: DatabaseManager):
+        """A fresh database should record the latest migration."""
+        with db_manager._read() as conn:
+            assert conn.execute("PRAGMA user_version;").fetchone()[0] == db_manager.schema_version
+
+    def test_current_database_skips_migrations(self, db_manager: DatabaseManager):
+        """Opening an up-to-date database should not run any migration step."""
+        manager = DatabaseManager(db_path=db_manager.db_path, mutex=MagicMock())
+        with patch.object(manager, "_apply_migrations") as apply:
+            manager.ensure_database()
+
+        apply.assert_not_called()
+        assert manager._fts_enabled
+        manager.close()
+
+    def test_repeat_call_is_free(self, db_manager: DatabaseManager):
+        """A second ensure_database() on the same manager should not query the database."""
+        with patch.object(db_manager, "_connect") as connect:
+            db_manager.ensure_database()
+
+        connect.assert_not_called()
+
+    def test_pending_steps_apply_once(self, db_manager: DatabaseManager):
+        """Only steps after the stored version should run, each once."""
+        calls: list[str] = []
+
+        class Extended(DatabaseManager):
+            MIGRATIONS = DatabaseManager.MIGRATIONS + ("_migration_test",)
+
+            def _migration_test(self, conn: sqlite3.Connection) -> None:
+                calls.append("run")
+                conn.execute("CREATE TABLE extra (id INTEGER PRIMARY KEY);")
+
+        for _ in range(2):
+            manager = Extended(db_path=db_manager.db_path, mutex=MagicMock())
+            manager.ensure_database()
+            manager.close()
+
+        assert calls == ["run"]
+        with db_manager._read() as conn:
+            assert conn.execute("PRAGMA user_version;").fetchone()[0] == len(Extended.MIGRATIONS)
+
+    def test_failed_step_rolls_back(self, db_manager: DatabaseManager):
+        """A failing step should leave neither its changes nor a version bump behind."""
+
+        class Broken(DatabaseManager):
+            MIGRATIONS = DatabaseManager.MIGRATIONS + ("_migration_broken",)
+
+            def _migration_broken(self, conn: sqlite3.Connection) -> None:
+                conn.execute("CREATE TABLE half_done (id INTEGER PRIMARY KEY);")
+                raise RuntimeError("boom")
+
+        manager = Broken(db_path=db_manager.db_path, mutex=MagicMock())
+        with pytest.raises(RuntimeError):
+            manager.ensure_database()
+        manager.close()
+
+        with db_manager._read() as conn:
+            assert conn.execute("PRAGMA user_version;").fetchone()[0] == db_manager.schema_version
+            assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done';").fetchone() is None
+
+
+class TestRowCache:
+    """Test the read-through UrlRow cache."""
+
+    URL = "https://example.com/gallery"
+
+    def test_repeat_lookup_skips_database(self, db_manager: DatabaseManager):
+        """A second lookup by URL or id should be served without a read."""
+        url_id = db_manager.add_url(self.URL)
+        first = db_manager.get_by_url(self.URL)
+
+        with patch.object(db_manager, "_read") as read:
+            assert db_manager.get_by_url(self.URL) == first
+            assert db_manager.get_by_id(url_id) == first
+            assert db_manager.url_exists(self.URL) is True
+
+        read.assert_not_called()
+        assert db_manager.cache_stats()["hits"] == 3
+
+    def test_lookup_by_other_spelling(self, db_manager: DatabaseManager):
+        """A URL spelling that matched once should hit the cache afterwards."""
+        url_id = db_manager.add_url(self.URL)
+        spelling = "http://www.example.com/gallery/?utm_source=x"
+        assert db_manager.get_by_url(spelling).id == url_id
+
+        with patch.object(db_manager, "_read") as read:
+            assert db_manager.get_by_url(spelling).id == url_id
+        read.assert_not_called()
+
+    def test_missing_rows_are_not_cached(self, db_manager: DatabaseManager):
+        """A miss should not stop a later insert from being found."""
+        assert db_manager.get_by_url(self.URL) is None
+        url_id = db_manager.add_url(self.URL)
+
+        assert db_manager.get_by_url(self.URL).id == url_id
+        assert db_manager.cache_stats()["misses"] >= 2
+
+    def test_get_by_id(self, db_manager: DatabaseManager):
+        """get_by_id() should return the row, or None for unknown ids."""
+        url_id = db_manager.add_url(self.URL)
+
+        assert db_manager.get_by_id(url_id) == db_manager.get_by_url(self.URL)
+        assert db_manager.get_by_id(url_id + 1000) is None
+
+    def test_mark_methods_invalidate(self, db_manager: DatabaseManager):
+        """Status changes should be visible to the next lookup."""
+        url_id = db_manager.add_url(self.URL)
+        db_manager.get_by_id(url_id)
+
+        db_manager.mark_failed(url_id, "boom")
+        assert db_manager.get_by_url(self.URL).status == UrlStatus.FAILED
+        db_manager.mark_completed(url_id)
+        row = db_manager.get_by_id(url_id)
+        assert row.status == UrlStatus.COMPLETED
+        assert row.download_count == 1
+
+    def test_requeue_and_claim_invalidate(self, db_manager: DatabaseManager):
+        """Requeueing and claiming should refresh the cached row."""
+        url_id = db_manager.add_url(self.URL)
+        db_manager.mark_failed(url_id, "boom")
+        db_manager.get_by_url(self.URL)
+
+        assert db_manager.requeue_existing_url(self.URL, force_redownload=True) == url_id
+        row = db_manager.get_by_url(self.URL)
+        assert (row.status, row.force_redownload, row.last_error) == (UrlStatus.PENDING, 1, None)
+
+        db_manager.claim_next_pending()
+        assert db_manager.get_by_id(url_id).status == UrlStatus.IN_PROGRESS
+
+    def test_delete_invalidates(self, db_manager: DatabaseManager):
+        """A deleted URL should not be reported as existing, and can be re-added."""
+        url_id = db_manager.add_url(self.URL)
+        db_manager.get_by_url(self.URL)
+
+        assert db_manager.delete_url(url_id) is True
+
+        assert db_manager.url_exists(self.URL) is False
+        assert db_manager.get_by_id(url_id) is None
+        assert db_manager.add_url(self.URL) is not None
+
+    @pytest.mark.parametrize(
+        "operation",
+        [
+            lambda db, ids: db.bulk_update_status(ids, UrlStatus.SKIPPED),
+            lambda db, ids: db.bulk_requeue(ids, check_new_only=True),
+            lambda db, ids: db.bulk_delete_urls(ids),
+            lambda db, ids: db.clear_by_status(UrlStatus.PENDING),
+            lambda db, ids: db.clear_all(),
+        ],
+    )
+    def test_bulk_operations_invalidate(self, db_manager: DatabaseManager, operation):
+        """Bulk and table-wide writes should drop the rows they touch."""
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(3)]
+        before = [db_manager.get_by_id(url_id) for url_id in ids]
+
+        operation(db_manager, ids)
+
+        after = [db_manager.get_by_id(url_id) for url_id in ids]
+        assert all(a != b for a, b in zip(after, before))
+
+    def test_table_wide_update_invalidates(self, db_manager: DatabaseManager, monkeypatch):
+        """retry_all_failed() and reset_in_progress_to_stopped() should clear the cache."""
+        monkeypatch.setattr(db_manager, "LEASE_SECONDS", 0)
+        failed = db_manager.add_url(self.URL)
+        db_manager.mark_failed(failed, "boom")
+        claimed = db_manager.add_url("https://example.com/other")
+        db_manager.claim_next_pending()
+        db_manager.get_by_id(failed)
+        db_manager.get_by_id(claimed)
+
+        db_manager.retry_all_failed()
+        db_manager.reset_in_progress_to_stopped()
+
+        assert db_manager.get_by_id(failed).status == UrlStatus.PENDING
+        assert db_manager.get_by_id(claimed).status == UrlStatus.STOPPED
+
+    def test_stale_read_is_not_cached(self, db_manager: DatabaseManager):
+        """A row read before a write started should not enter the cache after it."""
+        url_id = db_manager.add_url(self.URL)
+        generation = db_manager._row_cache.generation
+        stale = db_manager.get_by_id(url_id)
+
+        db_manager.mark_failed(url_id, "boom")
+        db_manager._row_cache.put(stale, generation)
+
+        assert db_manager.get_by_id(url_id).status == UrlStatus.FAILED
+
+    def test_capacity_is_bounded(self, tmp_db_path: Path):
+        """The least recently used row should be evicted once the cache is full."""
+
+        class Small(DatabaseManager):
+            ROW_CACHE_SIZE = 2
+
+        manager = Small(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+        ids = [manager.add_url(f"https://example.com/{i}") for i in range(3)]
+        for url_id in ids:
+            manager.get_by_id(url_id)
+        manager.get_by_id(ids[1])
+
+        assert manager.cache_stats()["size"] == 2
+        with patch.object(manager, "_read") as read:
+            manager.get_by_id(ids[1])
+            manager.get_by_id(ids[2])
+        read.assert_not_called()
+        assert manager.get_by_url("https://example.com/0").id == ids[0]
+        manager.close()
+
+
+class TestUrlFilter:
+    """Test the Bloom filter behind bulk inserts."""
+
+    def test_add_urls(self, db_manager: DatabaseManager):
+        """add_urls() should insert new URLs in order and skip stored or repeated ones."""
+        db_manager.add_url("https://example.com/a")
+
+        added, skipped = db_manager.add_urls(
+            [
+                "https://example.com/b",
+                "http://www.example.com/a/",
+                "https://example.com/c",
+                "https://example.com/b?utm_source=x",
+                "  ",
+            ]
+        )
+
+        assert (added, skipped) == (2, 2)
+        rows = db_manager.list_urls(sort_column="id", sort_ascending=True)
+        assert [row.url for row in rows] == ["https://example.com/a", "https://example.com/b", "https://example.com/c"]
+
+    def test_add_urls_completed(self, db_manager: DatabaseManager):
+        """completed=True should record the URLs as downloaded once."""
+        db_manager.add_urls(["https://example.com/a"], completed=True)
+
+        row = db_manager.get_by_url("https://example.com/a")
+        assert row.status == UrlStatus.COMPLETED
+        assert row.download_count == 1
+        assert row.date_processed is not None
+
+    def test_built_on_first_bulk_insert(self, db_manager: DatabaseManager):
+        """The filter should only exist once a bulk path needs it, and report its size."""
+        db_manager.add_url("https://example.com/a")
+        assert db_manager.url_filter_stats() is None
+
+        db_manager.add_urls(["https://example.com/b"])
+
+        stats = db_manager.url_filter_stats()
+        assert stats["keys"] == 2
+        assert stats["capacity"] == DatabaseManager.URL_FILTER_MIN_CAPACITY
+        assert stats["error_rate"] == DatabaseManager.URL_FILTER_ERROR_RATE
+        assert stats["bytes"] > 0
+
+    def test_sees_rows_added_later(self, db_manager: DatabaseManager, tmp_path: Path):
+        """Rows added outside the bulk paths, even by another connection, should still be skipped."""
+        db_manager.add_urls(["https://example.com/a"])
+        db_manager.add_url("https://example.com/b")
+        conn = sqlite3.connect(db_manager.db_path)
+        conn.execute(
+            "INSERT INTO urls (url, status, date_added, url_key) VALUES (?, 0, 1704067200, ?);",
+            ("https://example.com/c", url_key("https://example.com/c")),
+        )
+        conn.commit()
+        conn.close()
+
+        import_file = tmp_path / "urls.txt"
+        import_file.write_text("https://example.com/b\nhttps://example.com/c\nhttps://example.com/d\n")
+
+        assert db_manager.import_urls(import_file) == (1, 2)
+        assert db_manager.url_filter_stats()["keys"] == 4
+
+    def test_rebuilt_after_deletes(self, db_manager: DatabaseManager):
+        """Once most of its keys are deleted, the filter should be rebuilt from the table."""
+        db_manager.add_urls(f"https://example.com/{i}" for i in range(10))
+        db_manager.clear_all()
+
+        assert db_manager.add_urls(["https://example.com/0", "https://example.com/new"]) == (2, 0)
+        assert db_manager.add_urls(["https://example.com/other"]) == (1, 0)
+        assert db_manager.url_filter_stats()["keys"] == 3
+
+    def test_false_positives_do_not_lose_urls(self, tmp_db_path: Path):
+        """A saturated filter should only cost duplicate probes, never skip new URLs."""
+
+        class Tiny(DatabaseManager):
+            URL_FILTER_MIN_CAPACITY = 4
+            URL_FILTER_ERROR_RATE = 0.5
+
+        manager = Tiny(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+        urls = [f"https://example.com/{i}" for i in range(200)]
+
+        assert manager.add_urls(urls, chunk_size=7) == (200, 0)
+        assert manager.add_urls(urls, chunk_size=7) == (0, 200)
+        assert manager.count_urls() == 200
+        manager.close()
+
+
+class TestTagFilter:
+    """Test multi-tag AND / OR / NOT filtering."""
+
+    @pytest.fixture
+    def tagged(self, db_manager: DatabaseManager) -> dict[str, int]:
+        """Ten URLs: `a` on 0-5, `b` on 3-9, `c` on 0, 4 and 8."""
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(10)]
+        tags = {name: db_manager.create_tag(name) for name in ("a", "b", "c")}
+        db_manager.bulk_add_tag(ids[0:6], tags["a"])
+        db_manager.bulk_add_tag(ids[3:10], tags["b"])
+        db_manager.bulk_add_tag([ids[0], ids[4], ids[8]], tags["c"])
+        return tags
+
+    @staticmethod
+    def _matching(db_manager: DatabaseManager, tags: TagFilter) -> list[str]:
+        rows = db_manager.list_urls(tags=tags, sort_column="id", sort_ascending=True)
+        assert db_manager.count_urls(tags=tags) == len(rows)
+        return [row.url.rsplit("/", 1)[1] for row in rows]
+
+    def test_all_of(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """all_of should intersect the tags."""
+        assert self._matching(db_manager, TagFilter(all_of=[tagged["a"], tagged["b"]])) == ["3", "4", "5"]
+
+    def test_any_of(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """any_of alone should unite the tags."""
+        assert self._matching(db_manager, TagFilter(any_of=[tagged["a"], tagged["c"]])) == [
+            "0",
+            "1",
+            "2",
+            "3",
+            "4",
+            "5",
+            "8",
+        ]
+
+    def test_none_of_alone(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """none_of alone should exclude tagged URLs, keeping untagged ones."""
+        assert self._matching(db_manager, TagFilter(none_of=[tagged["b"], tagged["c"]])) == ["1", "2"]
+
+    def test_combination(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """'b AND (a OR c) AND NOT c' style filters should combine all three groups."""
+        tags = TagFilter(all_of=[tagged["b"]], any_of=[tagged["a"], tagged["c"]], none_of=[tagged["c"]])
+        assert self._matching(db_manager, tags) == ["3", "5"]
+
+    def test_combined_with_tag_id_and_search(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """tag_id should join all_of, and search should still apply."""
+        tags = TagFilter(none_of=[tagged["c"]])
+        assert db_manager.count_urls(tag_id=tagged["a"], tags=tags) == 4
+        assert db_manager.count_urls(search="example.com/5", tag_id=tagged["a"], tags=tags) == 1
+
+    def test_unknown_tag_matches_nothing(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """A required tag that does not exist should give an empty result, not an error."""
+        assert db_manager.count_urls(tags=TagFilter(all_of=[tagged["a"], 999])) == 0
+
+    def test_keyset_pages(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """Keyset pagination should walk the filtered results without gaps."""
+        tags = TagFilter(any_of=[tagged["a"], tagged["b"]], none_of=[tagged["c"]])
+        expected = db_manager.list_urls(tags=tags, limit=100)
+
+        seen: list[UrlRow] = []
+        after = None
+        while page := db_manager.list_urls(tags=tags, limit=2, after=after):
+            seen.extend(page)
+            after = db_manager.page_cursor(page[-1], db_manager.DEFAULT_SORT_COLUMN)
+
+        assert [row.id for row in seen] == [row.id for row in expected]
+        assert len(seen) == 7
+
+    def test_drives_from_smallest_tag(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """The smallest all_of tag should be the one scanned from the (tag_id, url_id) index."""
+        tags = TagFilter(all_of=[tagged["a"], tagged["b"], tagged["c"]])
+        with db_manager._read() as conn:
+            condition, params = db_manager._tag_filter_sql(conn, tags)
+            plan = [
+                row[3]
+                for row in conn.execute(f"EXPLAIN QUERY PLAN SELECT u.id FROM urls u WHERE {condition};", params)
+            ]
+
+        assert params[0] == tagged["c"]
+        assert any("idx_url_tags_tag_url (tag_id=?)" in step for step in plan)
+        assert not any(step.startswith("SCAN u") for step in plan)
+
+    def test_tag_counts_follow_assignments(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """tags.url_count should track every way url_tags changes."""
+        url_id = db_manager.get_by_url("https://example.com/4").id
+        db_manager.remove_tag_from_url(url_id, tagged["a"])
+        db_manager.assign_tag_to_url(url_id, tagged["a"])
+        db_manager.bulk_remove_tag([url_id], tagged["b"])
+        db_manager.set_url_tags(db_manager.get_by_url("https://example.com/1").id, [tagged["c"]])
+        db_manager.delete_url(db_manager.get_by_url("https://example.com/0").id)
+
+        with db_manager._read() as conn:
+            stored = dict(conn.execute("SELECT id, url_count FROM tags;").fetchall())
+            actual = dict(conn.execute("SELECT tag_id, COUNT(*) FROM url_tags GROUP BY tag_id;").fetchall())
+
+        assert stored == actual == {tagged["a"]: 4, tagged["b"]: 6, tagged["c"]: 3}
+
+    def test_migration_adds_index_and_counts(self, db_manager: DatabaseManager, tagged: dict[str, int]):
+        """Databases from before the tag filter should get the new index and backfilled counts."""
+        conn = sqlite3.connect(db_manager.db_path)
+        conn.executescript(
+            """
+            DROP INDEX idx_url_tags_tag_url;
+            CREATE INDEX idx_url_tags_tag_id ON url_tags(tag_id);
+            DROP TRIGGER trg_url_tags_count_insert;
+            DROP TRIGGER trg_url_tags_count_delete;
+            UPDATE tags SET url_count = 0;
+            PRAGMA user_version = 2;
+            """
+        )
+        conn.close()
+        db_manager.close()
+
+        manager = DatabaseManager(db_path=db_manager.db_path, mutex=MagicMock())
+        manager.ensure_database()
+
+        with manager._read() as conn:
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index';")}
+            counts = dict(conn.execute("SELECT name, url_count FROM tags;").fetchall())
+        assert "idx_url_tags_tag_url" in indexes
+        assert "idx_url_tags_tag_id" not in indexes
+        assert counts == {"a": 6, "b": 7, "c": 3}
+        manager.close()
+
+    def test_filter_normalizes(self):
+        """Equal combinations should compare equal, and an empty filter is falsy."""
+        assert TagFilter(all_of=[2, 1, 2]) == TagFilter(all_of=(1, 2))
+        assert not TagFilter()
+        assert TagFilter(none_of=[3])
+
+
+class TestSchemaV2:
+    """Test INTEGER timestamps and the index set of schema v2, checked against query plans."""
+
+    @staticmethod
+    def _traced(manager: DatabaseManager, action) -> list[str]:
+        """Run `action` and return the statements it sent on this thread's connection."""
+        statements: list[str] = []
+        conn = manager._connection()
+        conn.set_trace_callback(statements.append)
+        try:
+            action()
+        finally:
+            conn.set_trace_callback(None)
+        return statements
+
+    @staticmethod
+    def _plan(manager: DatabaseManager, sql: str, params: tuple = ()) -> list[str]:
+        with manager._read() as conn:
+            return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+    def _create_v1_database(self, db_path: Path) -> None:
+        """Build a schema-v3 database whose urls table still stores ISO TEXT dates."""
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            """
+            CREATE TABLE urls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                status INTEGER NOT NULL DEFAULT 0,
+                force_redownload INTEGER NOT NULL DEFAULT 0,
+                check_new_only INTEGER NOT NULL DEFAULT 0,
+                download_count INTEGER NOT NULL DEFAULT 0,
+                date_added TEXT NOT NULL,
+                date_processed TEXT,
+                last_error TEXT,
+                skipped_count INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        conn.executemany(
+            "INSERT INTO urls (url, status, date_added, date_processed) VALUES (?, ?, ?, ?);",
+            [
+                ("https://example.com/a", UrlStatus.COMPLETED, "2024-01-01T00:00:00+00:00", "2024-01-02T12:00:00"),
+                ("https://example.com/b", UrlStatus.PENDING, "2024-01-03T00:00:00+00:00", None),
+                ("https://example.com/c", UrlStatus.PENDING, "not a date", None),
+                ("https://example.com/d", UrlStatus.PENDING, "2024-01-04T00:00:00+00:00", None),
+            ],
+        )
+        conn.execute("CREATE INDEX idx_urls_status ON urls(status);")
+        conn.execute("CREATE INDEX idx_urls_url ON urls(url);")
+        conn.commit()
+        conn.close()
+
+        class V1(DatabaseManager):
+            MIGRATIONS = DatabaseManager.MIGRATIONS[:3]
+
+        manager = V1(db_path=db_path, mutex=MagicMock())
+        manager.ensure_database()
+        tag_id = manager.create_tag("kept")
+        manager.assign_tag_to_url(1, tag_id)
+        manager.assign_tag_to_url(2, tag_id)
+        # Raw SQL: delete_url() reads the `all_urls` view, which this schema predates.
+        with manager._write() as conn:
+            conn.execute("DELETE FROM urls WHERE id = 4;")
+        manager.close()
+
+    def test_dates_stored_as_integers(self, db_manager: DatabaseManager):
+        """Dates should be stored as Unix seconds and read back as ISO strings."""
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.mark_completed(url_id)
+
+        with db_manager._read() as conn:
+            types = conn.execute("SELECT typeof(date_added), typeof(date_processed) FROM urls;").fetchone()
+        row = db_manager.get_by_id(url_id)
+        assert types == ("integer", "integer")
+        assert datetime.fromisoformat(row.date_added).tzinfo is not None
+        assert datetime.fromisoformat(row.date_processed) >= datetime.fromisoformat(row.date_added)
+
+    def test_claim_walks_queue_index(self, db_manager: DatabaseManager):
+        """Claiming should read ids off (status, priority, id) without sorting the whole queue."""
+        db_manager.add_urls([f"https://example.com/{i}" for i in range(50)])
+
+        for include_stopped in (False, True):
+            statements = self._traced(
+                db_manager, lambda include_stopped=include_stopped: db_manager.claim_next_batch(2, include_stopped)
+            )
+            # Trigger steps are traced under their parent statement, so deduplicate.
+            (claim,) = {s for s in statements if "ORDER BY priority DESC, id LIMIT" in s}
+            plan = self._plan(db_manager, claim)
+            searches = [step for step in plan if "idx_urls_queue" in step]
+            assert len(searches) == (2 if include_stopped else 1)
+            assert not any(step.startswith("SCAN urls") for step in plan)
+            if not include_stopped:
+                assert not any("TEMP B-TREE" in step for step in plan)
+
+    def test_default_sort_uses_expression_index(self, db_manager: DatabaseManager):
+        """The default History sort should walk idx_urls_sort_processed instead of sorting."""
+        db_manager.add_urls([f"https://example.com/{i}" for i in range(50)])
+
+        statements = self._traced(db_manager, lambda: db_manager.list_urls(limit=10))
+        (query,) = [s for s in statements if "FROM all_urls" in s]
+        plan = self._plan(db_manager, query)
+        assert any("idx_urls_sort_processed" in step for step in plan)
+        assert any("idx_urls_history_sort_processed" in step for step in plan)
+        assert not any("TEMP B-TREE" in step for step in plan)
+
+    def test_url_lookup_uses_unique_index(self, db_manager: DatabaseManager):
+        """The UNIQUE autoindex should serve url lookups, so no separate url index exists."""
+        plan = self._plan(db_manager, "SELECT id FROM urls WHERE url = ?;", ("https://example.com/a",))
+        with db_manager._read() as conn:
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index';")}
+
+        assert any("sqlite_autoindex_urls_1" in step for step in plan)
+        assert "idx_urls_url" not in indexes
+        assert "idx_urls_status" not in indexes
+
+    def test_migration_converts_text_dates(self, tmp_db_path: Path):
+        """Upgrading should rewrite TEXT dates as integers and keep ids, tags and search."""
+        self._create_v1_database(tmp_db_path)
+
+        manager = DatabaseManager(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+
+        with manager._read() as conn:
+            types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(urls);")}
+            stored = conn.execute(
+                "SELECT typeof(date_added), typeof(date_processed) FROM urls WHERE id = 1;"
+            ).fetchone()
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index';")}
+        assert types["date_added"] == "INTEGER"
+        assert types["date_processed"] == "INTEGER"
+        assert stored == ("integer", "integer")
+        assert {"idx_urls_queue", "idx_urls_sort_processed"} <= indexes
+        assert not {"idx_urls_url", "idx_urls_status"} & indexes
+
+        first = manager.get_by_id(1)
+        assert first.date_added == "2024-01-01T00:00:00+00:00"
+        assert first.date_processed == "2024-01-02T12:00:00+00:00"
+        assert datetime.fromisoformat(manager.get_by_id(3).date_added).year >= 2025  # unparsable: migration time
+
+        assert [row.id for row in manager.list_urls(sort_column="id", sort_ascending=True)] == [1, 2, 3]
+        assert manager.count_urls(tags=TagFilter(all_of=[1])) == 2
+        assert [row.url for row in manager.list_urls(search="example.com/b")] == ["https://example.com/b"]
+        assert manager.get_counts()[UrlStatus.PENDING] == 2
+        assert manager.add_url("https://example.com/e") == 5  # id 4 is not reused
+        manager.close()
+
+
+class TestMaintenance:
+    """Test the maintenance operations and their log."""
+
+    def _free_some_pages(self, manager: DatabaseManager) -> None:
+        manager.add_urls([f"https://example.com/{i}/" + "x" * 500 for i in range(2000)])
+        manager.clear_all()
+
+    def test_new_database_uses_incremental_vacuum(self, db_manager: DatabaseManager):
+        """Fresh databases should be created with auto_vacuum = INCREMENTAL."""
+        assert db_manager.page_usage()["auto_vacuum"] == "incremental"
+
+    def test_incremental_vacuum_frees_in_slices(self, db_manager: DatabaseManager):
+        """Each call should free at most the requested number of pages."""
+        self._free_some_pages(db_manager)
+        free_before = db_manager.page_usage()["free_pages"]
+
+        assert db_manager.incremental_vacuum(50) == 50
+        assert db_manager.page_usage()["free_pages"] == free_before - 50
+        assert db_manager.maintenance_log()["incremental_vacuum"]["detail"] == "50 page(s)"
+
+    def test_vacuum_enables_incremental_mode(self, tmp_db_path: Path):
+        """A database created without auto_vacuum should switch over on vacuum()."""
+        conn = sqlite3.connect(tmp_db_path)
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("CREATE TABLE placeholder (id INTEGER PRIMARY KEY);")
+        conn.commit()
+        conn.close()
+        manager = DatabaseManager(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+        self._free_some_pages(manager)
+
+        assert manager.page_usage()["auto_vacuum"] == "none"
+        assert manager.incremental_vacuum(50) == 0
+        manager.vacuum()
+        usage = manager.page_usage()
+        assert usage["auto_vacuum"] == "incremental"
+        assert usage["free_pages"] == 0
+        assert "vacuum" in manager.maintenance_log()
+        manager.close()
+
+    def test_checkpoint_truncates_wal(self, db_manager: DatabaseManager):
+        """checkpoint_wal() should leave an empty WAL file behind."""
+        db_manager.add_urls([f"https://example.com/{i}" for i in range(200)])
+        wal_path = db_manager.db_path.with_name(db_manager.db_path.name + "-wal")
+
+        assert db_manager.checkpoint_wal()
+        # The log entry itself is the only write after the checkpoint.
+        assert wal_path.stat().st_size < 64 * 1024
+        assert db_manager.maintenance_log()["checkpoint"]["detail"].endswith("bytes of WAL")
+
+    def test_checkpoint_gives_up_quickly_without_write_lock(self, db_manager: DatabaseManager, monkeypatch):
+        """A reader blocking the checkpoint should make it give up after the short timeout, lock-free."""
+        monkeypatch.setattr(db_manager, "CHECKPOINT_BUSY_TIMEOUT", 0.1)
+        db_manager.add_urls([f"https://example.com/{i}" for i in range(200)])
+        reader = sqlite3.connect(db_manager.db_path)
+        reader.execute("BEGIN;")
+        reader.execute("SELECT COUNT(*) FROM urls;").fetchone()
+        db_manager.add_url("https://example.com/after-snapshot")
+        db_manager._mutex.reset_mock()
+        try:
+            started = time.monotonic()
+            assert db_manager.checkpoint_wal() is False
+            assert time.monotonic() - started < 5
+        finally:
+            reader.close()
+
+        # Only the maintenance_log entry took the mutex.
+        assert db_manager._mutex.lock.call_count == 1
+        assert db_manager.maintenance_log()["checkpoint"]["detail"] == "blocked by a reader"
+        with db_manager._read() as conn:
+            assert conn.execute("PRAGMA busy_timeout;").fetchone()[0] == int(db_manager.BUSY_TIMEOUT * 1000)
+
+    def test_optimize_collects_statistics(self, db_manager: DatabaseManager):
+        """optimize() should leave planner statistics for the urls indexes."""
+        db_manager.add_urls([f"https://example.com/{i}" for i in range(200)])
+
+        db_manager.optimize()
+
+        with db_manager._read() as conn:
+            analyzed = {row[0] for row in conn.execute("SELECT idx FROM sqlite_stat1 WHERE tbl = 'urls';")}
+        assert "idx_urls_queue" in analyzed
+        assert "optimize" in db_manager.maintenance_log()
+
+    def test_log_keeps_last_run_per_task(self, db_manager: DatabaseManager):
+        """Repeated runs should replace the task's entry, with an ISO timestamp."""
+        db_manager.verify_status_counts()
+        db_manager.verify_status_counts()
+
+        log = db_manager.maintenance_log()
+        assert list(log) == ["verify_counts"]
+        assert log["verify_counts"]["detail"] == "ok"
+        assert datetime.fromisoformat(log["verify_counts"]["last_run"]).tzinfo is not None
+
+
+class TestBackup:
+    """Test online backups and rotating snapshots."""
+
+    def test_backup_is_complete_copy(self, db_manager: DatabaseManager, tmp_path: Path):
+        """The backup should open on its own with every row, in rollback-journal mode."""
+        db_manager.add_urls([f"https://example.com/{i}" for i in range(500)])
+        tag_id = db_manager.create_tag("kept")
+        db_manager.assign_tag_to_url(1, tag_id)
+        target = tmp_path / "out" / "backup.db"
+
+        assert db_manager.backup(target, pages_per_step=8)
+
+        conn = sqlite3.connect(target)
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "delete"
+        conn.close()
+        assert [p.name for p in target.parent.iterdir()] == ["backup.db"]
+        copy = DatabaseManager(db_path=target, mutex=MagicMock())
+        copy.ensure_database()
+        assert copy.count_urls() == 500
+        assert copy.get_tags_for_url(1)[0].name == "kept"
+        copy.close()
+
+    def test_backup_reports_progress_in_steps(self, db_manager: DatabaseManager, tmp_path: Path):
+        """Progress should be reported per step and end at the total page count."""
+        db_manager.add_urls([f"https://example.com/{i}/" + "x" * 200 for i in range(2000)])
+        calls: list[tuple[int, int]] = []
+
+        db_manager.backup(
+            tmp_path / "backup.db", pages_per_step=16, progress=lambda done, total: calls.append((done, total))
+        )
+
+        assert len(calls) > 1
+        assert calls[-1][0] == calls[-1][1]
+        assert [done for done, _ in calls] == sorted(done for done, _ in calls)
+
+    def test_backup_cancel_leaves_nothing(self, db_manager: DatabaseManager, tmp_path: Path):
+        """Returning False from progress should stop the backup and remove the partial file."""
+        db_manager.add_urls([f"https://example.com/{i}/" + "x" * 200 for i in range(2000)])
+        target = tmp_path / "backup.db"
+
+        assert not db_manager.backup(target, pages_per_step=16, progress=lambda done, total: False)
+        assert not any(p.name.startswith("backup.db") for p in tmp_path.iterdir())
+
+    def test_writers_continue_during_backup(self, db_manager: DatabaseManager, tmp_path: Path):
+        """Writes committed mid-backup should succeed and not appear in the copy."""
+        db_manager.add_urls([f"https://example.com/{i}" for i in range(200)])
+        written: list[int | None] = []
+
+        def write_during_backup(done: int, total: int) -> None:
+            if not written:
+                worker = threading.Thread(target=lambda: written.append(db_manager.add_url("https://example.com/new")))
+                worker.start()
+                worker.join(5)
+
+        db_manager.backup(tmp_path / "backup.db", pages_per_step=1, progress=write_during_backup)
+
+        assert written and written[0] is not None
+        copy = sqlite3.connect(tmp_path / "backup.db")
+        assert copy.execute("SELECT COUNT(*) FROM urls;").fetchone()[0] == 200
+        copy.close()
+
+    def test_snapshots_rotate(self, db_manager: DatabaseManager, tmp_path: Path):
+        """Only the newest `keep` snapshots should remain, newest first."""
+        db_manager.add_url("https://example.com/a")
+        made = [db_manager.backup_snapshot(tmp_path / "snaps", keep=2) for _ in range(4)]
+
+        assert db_manager.list_snapshots(tmp_path / "snaps") == [made[3], made[2]]
+        assert not made[0].exists()
+
+
+class TestPriority:
+    """Test queue priorities: raised URLs are claimed first, ties in insertion order."""
+
+    def test_default_priority_is_zero(self, db_manager: DatabaseManager):
+        url_id = db_manager.add_url("https://example.com/a")
+
+        assert db_manager.get_by_id(url_id).priority == 0
+
+    def test_raised_urls_claimed_first(self, db_manager: DatabaseManager):
+        """Higher priorities come first; equal priorities keep id order."""
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(6)]
+        db_manager.bulk_adjust_priority([ids[4], ids[2]], 1)
+        db_manager.bulk_adjust_priority([ids[0]], -1)
+
+        claimed = [row.id for row in db_manager.claim_next_batch(6)]
+
+        assert claimed == [ids[2], ids[4], ids[1], ids[3], ids[5], ids[0]]
+
+    def test_priority_spans_statuses(self, db_manager: DatabaseManager):
+        """With include_stopped, a raised stopped URL should beat pending ones; without, it is skipped."""
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(3)]
+        db_manager.bulk_update_status([ids[2]], UrlStatus.STOPPED)
+        db_manager.bulk_adjust_priority([ids[2]], 2)
+
+        assert [row.id for row in db_manager.claim_next_batch(2, include_stopped=True)] == [ids[2], ids[0]]
+        assert [row.id for row in db_manager.claim_next_batch(2)] == [ids[1]]
+
+    def test_adjust_tag_priority(self, db_manager: DatabaseManager):
+        """Only URLs with the tag should move, and adjustments accumulate."""
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(3)]
+        tag_id = db_manager.create_tag("urgent")
+        db_manager.bulk_add_tag(ids[1:], tag_id)
+
+        assert db_manager.adjust_tag_priority(tag_id, 1) == 2
+        assert db_manager.adjust_tag_priority(tag_id, 1) == 2
+        assert [db_manager.get_by_id(i).priority for i in ids] == [0, 2, 2]
+
+    def test_reset_priorities(self, db_manager: DatabaseManager):
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(3)]
+        db_manager.bulk_adjust_priority(ids[:2], 3)
+        db_manager.get_by_id(ids[0])  # cache the row so the reset must invalidate it
+
+        assert db_manager.reset_priorities() == 2
+        assert [db_manager.get_by_id(i).priority for i in ids] == [0, 0, 0]
+
+    def test_priority_survives_export_import(self, db_manager: DatabaseManager, tmp_path: Path):
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.bulk_adjust_priority([url_id], -4)
+        db_manager.export_queue(tmp_path / "queue.jsonl")
+
+        target = DatabaseManager(db_path=tmp_path / "target.db", mutex=MagicMock())
+        target.ensure_database()
+        target.import_queue(tmp_path / "queue.jsonl")
+
+        assert target.get_by_url("https://example.com/a").priority == -4
+        target.close()
+
+    def test_migration_adds_priority(self, db_manager: DatabaseManager):
+        """Upgrading a database from before priorities should add the column and queue index."""
+        db_manager.add_url("https://example.com/a")
+        with db_manager._write() as conn:
+            conn.execute("DROP INDEX idx_urls_queue;")
+            conn.execute("DROP VIEW all_urls;")
+            conn.execute("ALTER TABLE urls DROP COLUMN priority;")
+            conn.execute("CREATE INDEX idx_urls_status_id ON urls(status, id);")
+            conn.execute("PRAGMA user_version = 5;")
+        db_manager.close()
+
+        manager = DatabaseManager(db_path=db_manager.db_path, mutex=MagicMock())
+        manager.ensure_database()
+
+        with manager._read() as conn:
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index';")}
+        assert "idx_urls_queue" in indexes
+        assert "idx_urls_status_id" not in indexes
+        assert manager.get_by_url("https://example.com/a").priority == 0
+        assert [row.url for row in manager.claim_next_batch(1)] == ["https://example.com/a"]
+        manager.close()
+
+
+class TestAttempts:
+    """Test the per-run `attempts` history and its retention."""
+
+    @staticmethod
+    def _attempt(started_at: float, duration: float = 2.0, **fields) -> Attempt:
+        return Attempt(
+            claimed_at=started_at - 0.5,
+            started_at=started_at,
+            finished_at=started_at + duration,
+            first_output_at=started_at + 0.25,
+            **fields,
+        )
+
+    def test_recorded_with_status_transition(self, db_manager: DatabaseManager):
+        """An attempt should be stored in the transition's transaction with its final status."""
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.claim_next_batch(1)
+
+        db_manager.mark_failed(url_id, "boom", attempt=self._attempt(1_700_000_000.125, exit_code=4, failure_lines=2))
+
+        (row,) = db_manager.list_attempts(url_id)
+        assert row.url_id == url_id
+        assert row.status == UrlStatus.FAILED
+        assert (row.claimed_at, row.started_at, row.first_output_at) == (
+            1_699_999_999.625,
+            1_700_000_000.125,
+            1_700_000_000.375,
+        )
+        assert row.duration == 2.0
+        assert (row.exit_code, row.failure_lines) == (4, 2)
+
+    def test_transition_without_attempt_records_nothing(self, db_manager: DatabaseManager):
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.mark_completed(url_id)
+
+        assert db_manager.list_attempts(url_id) == []
+
+    def test_list_newest_first(self, db_manager: DatabaseManager):
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.apply_status_transitions(
+            [
+                StatusTransition.failed(url_id, "boom", attempt=self._attempt(1000.0)),
+                StatusTransition.completed(url_id, attempt=self._attempt(2000.0, exit_code=0)),
+            ]
+        )
+
+        rows = db_manager.list_attempts(url_id)
+        assert [(r.status, r.started_at) for r in rows] == [(UrlStatus.COMPLETED, 2000.0), (UrlStatus.FAILED, 1000.0)]
+        assert len(db_manager.list_attempts(url_id, limit=1)) == 1
+
+    def test_statistics(self, db_manager: DatabaseManager):
+        """Statistics should summarize runs, optionally only recent ones."""
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.mark_failed(url_id, "boom", attempt=self._attempt(1000.0, duration=4.0, failure_lines=3))
+        db_manager.mark_completed(url_id, attempt=self._attempt(5000.0, duration=2.0, exit_code=0))
+
+        stats = db_manager.get_attempt_statistics()
+        assert stats["attempts"] == 2
+        assert stats["by_status"] == {UrlStatus.FAILED: 1, UrlStatus.COMPLETED: 1}
+        assert (stats["total_seconds"], stats["mean_seconds"]) == (6.0, 3.0)
+        assert (stats["mean_wait_seconds"], stats["mean_first_output_seconds"]) == (0.5, 0.25)
+        assert stats["failure_lines"] == 3
+        assert db_manager.get_attempt_statistics(since=4000.0)["attempts"] == 1
+        assert db_manager.get_attempt_statistics(since=9000.0)["mean_seconds"] is None
+
+    def test_survives_url_removal(self, db_manager: DatabaseManager):
+        """Run history is kept for capacity planning after the URL is cleared."""
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.mark_completed(url_id, attempt=self._attempt(1000.0))
+        db_manager.clear_all()
+
+        assert len(db_manager.list_attempts(url_id)) == 1
+
+    def test_prune_by_age(self, db_manager: DatabaseManager):
+        """Runs older than the retention period should go; recent ones stay."""
+        url_id = db_manager.add_url("https://example.com/a")
+        now = time.time()
+        for days_ago in (40, 20, 10, 1):
+            db_manager.mark_failed(url_id, "boom", attempt=self._attempt(now - days_ago * 86400))
+
+        assert db_manager.prune_attempts(max_age_days=15, max_per_url=0) == 2
+        assert len(db_manager.list_attempts(url_id)) == 2
+        assert db_manager.prune_attempts(max_age_days=0.5, max_per_url=0) == 2
+        assert db_manager.maintenance_log()["prune_attempts"]["detail"] == "2 attempt(s) removed"
+
+    def test_prune_keeps_newest_per_url(self, db_manager: DatabaseManager):
+        a = db_manager.add_url("https://example.com/a")
+        b = db_manager.add_url("https://example.com/b")
+        now = time.time()
+        for i in range(5):
+            db_manager.mark_failed(a, "boom", attempt=self._attempt(now - i))
+        db_manager.mark_failed(b, "boom", attempt=self._attempt(now))
+
+        assert db_manager.prune_attempts(max_per_url=2) == 3
+        assert [r.started_at for r in db_manager.list_attempts(a)] == [round(now, 3), round(now - 1, 3)]
+        assert len(db_manager.list_attempts(b)) == 1
+
+    def test_per_url_prune_only_visits_urls_over_the_limit(self, db_manager: DatabaseManager):
+        """The per-URL pass should read the url_id index, never rank the whole table."""
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.mark_failed(url_id, "boom", attempt=self._attempt(time.time()))
+        statements: list[str] = []
+        db_manager._connection().set_trace_callback(statements.append)
+        try:
+            assert db_manager.prune_attempts(max_per_url=2) == 0
+        finally:
+            db_manager._connection().set_trace_callback(None)
+
+        (delete,) = [sql for sql in statements if "GROUP BY url_id" in sql]
+        plan = db_manager.explain_query_plan(delete)
+        assert not any("TEMP B-TREE" in step for step in plan)
+        assert all("idx_attempts_url_started" in step for step in plan if "attempts" in step and "rowid" not in step)
+        assert len(db_manager.list_attempts(url_id)) == 1
+
+    def test_age_prune_walks_rowid(self, db_manager: DatabaseManager):
+        """Finding the age cutoff should walk the table in id order, not sort or use a temp index."""
+        with db_manager._read() as conn:
+            plan = [
+                row[3]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT id FROM attempts WHERE finished_at >= ? ORDER BY id LIMIT 1;", (0,)
+                )
+            ]
+        assert not any("TEMP B-TREE" in step for step in plan)
+
+
+class TestArchive:
+    """Test the `urls_history` cold tier: finished URLs move there but stay visible everywhere."""
+
+    @staticmethod
+    def _finished(db_manager: DatabaseManager, count: int, *, days_ago: int = 60) -> list[int]:
+        """Add `count` completed URLs processed `days_ago` days ago."""
+        ids = [db_manager.add_url(f"https://example.com/old/{i}") for i in range(count)]
+        for url_id in ids:
+            db_manager.mark_completed(url_id)
+        with db_manager._write() as conn:
+            conn.execute("UPDATE urls SET date_processed = date_processed - ?;", (days_ago * 86400,))
+        return ids
+
+    @staticmethod
+    def _archived_ids(db_manager: DatabaseManager) -> set[int]:
+        with db_manager._read() as conn:
+            return {row[0] for row in conn.execute("SELECT id FROM urls_history;")}
+
+    def test_moves_old_finished_urls(self, db_manager: DatabaseManager):
+        """Only completed/skipped URLs past the cutoff should move, oldest first and in batches."""
+        old = self._finished(db_manager, 3)
+        recent = db_manager.add_url("https://example.com/recent")
+        db_manager.mark_completed(recent)
+        failed = db_manager.add_url("https://example.com/failed")
+        db_manager.mark_failed(failed, "boom")
+        with db_manager._write() as conn:
+            conn.execute("UPDATE urls SET date_processed = date_processed - ? WHERE id = ?;", (90 * 86400, failed))
+
+        assert db_manager.archive_completed(older_than_days=30, batch_size=2) == 2
+        assert db_manager.archive_completed(older_than_days=30, batch_size=2) == 1
+        assert db_manager.archive_completed(older_than_days=30) == 0
+        assert self._archived_ids(db_manager) == set(old)
+        assert db_manager.archive_completed(older_than_days=0) == 0
+        assert db_manager.maintenance_log()["archive"]["detail"] == "1 URL(s) moved"
+
+    def test_reads_cover_both_tiers(self, db_manager: DatabaseManager):
+        """Listing, counting, search and statistics should not change when rows are archived."""
+        old = self._finished(db_manager, 3)
+        db_manager.add_urls([f"https://example.com/new/{i}" for i in range(3)])
+        tag_id = db_manager.create_tag("kept")
+        db_manager.assign_tag_to_url(old[0], tag_id)
+        before = (
+            db_manager.list_urls(limit=10),
+            db_manager.count_urls(search="old"),
+            db_manager.get_counts(),
+            db_manager.get_statistics(),
+            db_manager.list_urls(tags=TagFilter(all_of=(tag_id,))),
+        )
+
+        db_manager.archive_completed(older_than_days=30)
+        db_manager.clear_cache()
+
+        after = (
+            db_manager.list_urls(limit=10),
+            db_manager.count_urls(search="old"),
+            db_manager.get_counts(),
+            db_manager.get_statistics(),
+            db_manager.list_urls(tags=TagFilter(all_of=(tag_id,))),
+        )
+        assert self._archived_ids(db_manager) == set(old)
+        assert after == before
+        assert [row.id for row in db_manager.list_urls(search="old/1")] == [old[1]]
+        assert db_manager.get_by_id(old[2]).url == "https://example.com/old/2"
+        assert [tag.name for tag in db_manager.get_tags_for_url(old[0])] == ["kept"]
+        assert db_manager.verify_status_counts(repair=False)
+
+    def test_duplicates_detected_across_tiers(self, db_manager: DatabaseManager):
+        """Adding an archived URL again, in any spelling, should not create a second row."""
+        self._finished(db_manager, 2)
+        db_manager.archive_completed(older_than_days=30)
+        db_manager.clear_cache()
+
+        assert db_manager.url_exists("https://example.com/old/0")
+        assert db_manager.add_url("https://EXAMPLE.com/old/0") is None
+        assert db_manager.add_urls(["https://example.com/old/1", "https://example.com/new"]) == (1, 1)
+        assert db_manager.find_duplicate_urls() == []
+
+    def test_requeue_restores_row(self, db_manager: DatabaseManager):
+        """Re-queueing an archived URL should move it back, keeping its id and tags, and make it claimable."""
+        (url_id,) = self._finished(db_manager, 1)
+        tag_id = db_manager.create_tag("kept")
+        db_manager.assign_tag_to_url(url_id, tag_id)
+        db_manager.archive_completed(older_than_days=30)
+
+        assert db_manager.requeue_existing_url("https://example.com/old/0") == url_id
+
+        assert self._archived_ids(db_manager) == set()
+        assert [row.id for row in db_manager.claim_next_batch(1)] == [url_id]
+        assert [tag.id for tag in db_manager.get_tags_for_url(url_id)] == [tag_id]
+        assert db_manager.verify_status_counts(repair=False)
+
+    def test_bulk_status_change_restores_rows(self, db_manager: DatabaseManager):
+        ids = self._finished(db_manager, 2)
+        db_manager.archive_completed(older_than_days=30)
+
+        assert db_manager.bulk_update_status(ids, UrlStatus.PENDING) == 2
+
+        assert self._archived_ids(db_manager) == set()
+        assert db_manager.get_counts()[0] == 2
+
+    def test_deletes_cover_both_tiers(self, db_manager: DatabaseManager):
+        """Removing archived URLs should also drop their tags and search entries."""
+        ids = self._finished(db_manager, 3)
+        tag_id = db_manager.create_tag("kept")
+        db_manager.assign_tag_to_url(ids[0], tag_id)
+        db_manager.archive_completed(older_than_days=30)
+
+        assert db_manager.delete_url(ids[0])
+        assert db_manager.bulk_delete_urls([ids[1]]) == (1, 0)
+        with db_manager._read() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM url_tags;").fetchone()[0] == 0
+            assert conn.execute("SELECT url_count FROM tags;").fetchone()[0] == 0
+        assert db_manager.list_urls(search="old/0") == []
+        assert db_manager.clear_all() == 1
+        assert self._archived_ids(db_manager) == set()
+        assert db_manager.verify_status_counts(repair=False)
+
+    def test_exports_include_archived(self, db_manager: DatabaseManager, tmp_path: Path):
+        self._finished(db_manager, 2)
+        db_manager.add_url("https://example.com/new")
+        db_manager.archive_completed(older_than_days=30)
+
+        assert db_manager.export_urls(tmp_path / "urls.txt") == 3
+        assert db_manager.export_queue(tmp_path / "queue.jsonl") == 3
+
+    def test_tagging_archived_rows(self, db_manager: DatabaseManager):
+        """Tags can be added to archived rows; unknown ids are still rejected."""
+        ids = self._finished(db_manager, 2)
+        tag_id = db_manager.create_tag("later")
+        db_manager.archive_completed(older_than_days=30)
+
+        assert db_manager.bulk_add_tag(ids, tag_id) == 2
+        assert db_manager.assign_tag_to_url(9999, tag_id) is False
+        assert db_manager.count_urls(tag_id=tag_id) == 2
+
+    def test_default_sort_merges_tiers(self, db_manager: DatabaseManager):
+        """The History query over both tiers should walk each tier's sort index, not sort."""
+        self._finished(db_manager, 5)
+        db_manager.add_urls([f"https://example.com/new/{i}" for i in range(5)])
+        db_manager.archive_completed(older_than_days=30)
+
+        statements = TestSchemaV2._traced(db_manager, lambda: db_manager.list_urls(limit=3))
+        (query,) = [s for s in statements if "FROM all_urls" in s]
+        plan = TestSchemaV2._plan(db_manager, query)
+
+        assert any("idx_urls_history_sort_processed" in step for step in plan)
+        assert not any("TEMP B-TREE" in step for step in plan)
+
+    def test_migration_keeps_tags_and_search(self, tmp_db_path: Path):
+        """Upgrading a schema-7 database should keep tags, drop the url_tags foreign key and keep search."""
+
+        class V7(DatabaseManager):
+            MIGRATIONS = DatabaseManager.MIGRATIONS[:7]
+
+        manager = V7(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+        tag_id = manager.create_tag("kept")
+        # Raw SQL: add_url() reads the `all_urls` view, which this schema predates.
+        with manager._write() as conn:
+            conn.execute(
+                "INSERT INTO urls (url, status, date_added, url_key) VALUES (?, ?, ?, ?);",
+                ("https://example.com/a", UrlStatus.COMPLETED, 0, url_key("https://example.com/a")),
+            )
+        manager.assign_tag_to_url(1, tag_id)
+        manager.close()
+
+        manager = DatabaseManager(db_path=tmp_db_path, mutex=MagicMock())
+        manager.ensure_database()
+        with manager._read() as conn:
+            foreign_keys = {row[2] for row in conn.execute("PRAGMA foreign_key_list(url_tags);")}
+
+        assert foreign_keys == {"tags"}
+        assert manager.archive_completed(older_than_days=30) == 1
+        assert [tag.name for tag in manager.get_tags_for_url(1)] == ["kept"]
+        assert [row.id for row in manager.list_urls(search="example.com/a")] == [1]
+        with manager._read() as conn:
+            assert conn.execute("SELECT url_count FROM tags;").fetchone()[0] == 1
+        manager.close()
+
+
+class TestLeases:
+    """Test claim leases: several managers (app instances) sharing one queue."""
+
+    @pytest.fixture
+    def other(self, db_manager: DatabaseManager):
+        """A second manager on the same file, as another app instance would open it."""
+        manager = DatabaseManager(db_path=db_manager.db_path, mutex=MagicMock(), owner_id="other")
+        manager.ensure_database()
+        yield manager
+        manager.close()
+
+    def test_claim_takes_lease(self, db_manager: DatabaseManager):
+        url_id = db_manager.add_url("https://example.com/a")
+        before = time.time()
+
+        db_manager.claim_next_batch(1)
+
+        ((owner, expires_at),) = db_manager.list_leases().values()
+        assert db_manager.list_leases().keys() == {url_id}
+        assert owner == db_manager.owner_id
+        assert expires_at >= before + db_manager.LEASE_SECONDS - 1
+
+    def test_instances_share_queue(self, db_manager: DatabaseManager, other: DatabaseManager):
+        """Each URL should be claimed by one instance only."""
+        db_manager.add_urls([f"https://example.com/{i}" for i in range(4)])
+
+        mine = {row.id for row in db_manager.claim_next_batch(2)}
+        theirs = {row.id for row in other.claim_next_batch(4)}
+
+        assert len(mine) == len(theirs) == 2
+        assert not mine & theirs
+        assert {owner for owner, _ in db_manager.list_leases().values()} == {db_manager.owner_id, "other"}
+
+    def test_startup_reset_spares_live_leases(self, db_manager: DatabaseManager, other: DatabaseManager, monkeypatch):
+        """Only URLs whose lease ran out should be reset, not another running instance's downloads."""
+        running = other.add_url("https://example.com/running")
+        other.claim_next_batch(1)
+        monkeypatch.setattr(other, "LEASE_SECONDS", 0)
+        crashed = other.add_url("https://example.com/crashed")
+        other.claim_next_batch(1)
+
+        assert db_manager.reset_in_progress_to_stopped() == 1
+
+        assert db_manager.get_by_id(running).status == UrlStatus.IN_PROGRESS
+        assert db_manager.get_by_id(crashed).status == UrlStatus.STOPPED
+        assert db_manager.list_leases().keys() == {running}
+
+    def test_startup_reclaims_crashed_run_on_this_host(self, db_manager: DatabaseManager, other: DatabaseManager):
+        """Live leases of an earlier run on this host should be reset at startup; other hosts' kept."""
+        crashed = DatabaseManager(
+            db_path=db_manager.db_path, mutex=MagicMock(), owner_id=f"{socket.gethostname()}:1:dead"
+        )
+        stuck = crashed.add_url("https://example.com/stuck")
+        crashed.claim_next_batch(1)
+        crashed.close()
+        remote = other.add_url("https://example.com/remote")
+        other.claim_next_batch(1)
+
+        assert db_manager.reset_in_progress_to_stopped() == 0
+        assert db_manager.reset_in_progress_to_stopped(startup=True) == 1
+
+        assert db_manager.get_by_id(stuck).status == UrlStatus.STOPPED
+        assert db_manager.get_by_id(remote).status == UrlStatus.IN_PROGRESS
+        assert db_manager.list_leases().keys() == {remote}
+
+    def test_unleased_in_progress_counts_as_expired(self, db_manager: DatabaseManager):
+        """URLs claimed before leases existed have no lease and should be reset."""
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.claim_next_batch(1)
+        with db_manager._write() as conn:
+            conn.execute("DELETE FROM leases;")
+
+        assert db_manager.reset_in_progress_to_stopped() == 1
+        assert db_manager.get_by_id(url_id).status == UrlStatus.STOPPED
+
+    def test_renew_extends_own_leases(self, db_manager: DatabaseManager, other: DatabaseManager, monkeypatch):
+        db_manager.add_urls(["https://example.com/a", "https://example.com/b"])
+        monkeypatch.setattr(db_manager, "LEASE_SECONDS", 0)
+        mine = db_manager.claim_next_batch(1)[0].id
+        other.claim_next_batch(1)
+        monkeypatch.setattr(db_manager, "LEASE_SECONDS", 60)
+
+        assert db_manager.renew_leases() == 1
+        assert db_manager.reset_in_progress_to_stopped() == 0
+        assert db_manager.list_leases()[mine][1] > time.time() + 30
+
+    def test_transition_releases_lease(self, db_manager: DatabaseManager):
+        url_id = db_manager.add_url("https://example.com/a")
+        db_manager.claim_next_batch(1)
+
+        db_manager.mark_completed(url_id)
+
+        assert db_manager.list_leases() == {}
+        assert db_manager.get_by_id(url_id).status == UrlStatus.COMPLETED
+
+    def test_late_transition_after_reclaim_is_dropped(
+        self, db_manager: DatabaseManager, other: DatabaseManager, monkeypatch
+    ):
+        """An owner that lost its lease should not overwrite the new owner's claim."""
+        url_id = db_manager.add_url("https://example.com/a")
+        monkeypatch.setattr(db_manager, "LEASE_SECONDS", 0)
+        db_manager.claim_next_batch(1)
+        other.reset_in_progress_to_stopped()
+        other.claim_next_batch(1, include_stopped=True)
+
+        now = time.time()
+        db_manager.mark_failed(
+            url_id, "boom", attempt=Attempt(claimed_at=now - 2, started_at=now - 1, finished_at=now)
+        )
+
+        assert other.get_by_id(url_id).status == UrlStatus.IN_PROGRESS
+        assert other.list_leases()[url_id][0] == "other"
+        assert other.list_attempts(url_id) == []
+        other.mark_completed(url_id)
+        assert other.get_by_id(url_id).status == UrlStatus.COMPLETED
+
+    def test_add_after_delete_by_other_instance(self, db_manager: DatabaseManager, other: DatabaseManager):
+        """A row cached here but deleted by another instance should not block re-adding it."""
+        url_id = db_manager.add_url("https://example.com/a")
+        assert db_manager.get_by_url("https://example.com/a").id == url_id
+        assert other.delete_url(url_id)
+
+        new_id = db_manager.add_url("https://example.com/a")
+
+        assert new_id is not None
+        assert other.get_by_url("https://example.com/a").id == new_id
+
+    def test_requeue_after_delete_by_other_instance(self, db_manager: DatabaseManager, other: DatabaseManager):
+        url_id = db_manager.add_url("https://example.com/a")
+        assert db_manager.get_by_url("https://example.com/a").id == url_id
+        assert other.delete_url(url_id)
+
+        assert db_manager.requeue_existing_url("https://example.com/a") is None
+
+
+class TestProfiling:
+    """Test opt-in profiling and that hot queries avoid full scans of the URL tables."""
+
+    @staticmethod
+    def _full_scans(snapshot: dict) -> list[str]:
+        """Plan steps that read a URL table without an index (`SCAN urls`, not `SCAN urls USING INDEX ...`)."""
+        return [
+            f"{entry['method']}: {step}"
+            for entry in snapshot["slow_statements"]
+            for step in entry["plan"]
+            if re.match(r"SCAN (urls|urls_history|u)$", step)
+        ]
+
+    @pytest.fixture
+    def profiled(self, db_manager: DatabaseManager):
+        """A populated database with every statement logged (threshold 0)."""
+        db_manager.add_urls([f"https://example.com/gallery/{i}" for i in range(200)])
+        tag_id = db_manager.create_tag("art")
+        db_manager.bulk_add_tag(range(1, 50), tag_id)
+        with db_manager._write() as conn:
+            conn.execute("ANALYZE;")
+        db_manager.enable_profiling(slow_statement_ms=0)
+        yield db_manager
+        db_manager.disable_profiling()
+
+    def test_off_by_default(self, db_manager: DatabaseManager):
+        db_manager.get_counts()
+
+        assert db_manager.profile_snapshot() is None
+
+    def test_times_calls_by_method(self, profiled: DatabaseManager):
+        profiled.claim_next_batch(2)
+        profiled.get_counts()
+
+        methods = profiled.profile_snapshot()["methods"]
+        assert methods["claim_next_batch"]["calls"] == 1
+        assert methods["claim_next_batch"]["statements"] >= 2
+        assert methods["claim_next_batch"]["lock_wait_ms"] >= 0
+        assert methods["get_counts"]["calls"] == 1
+
+    def test_hot_queries_avoid_full_scans(self, profiled: DatabaseManager):
+        """Claiming, counts, a History page, search and tag filters should all be index lookups."""
+        tag_id = profiled.list_tags()[0].id
+        profiled.claim_next_batch(4, include_stopped=True)
+        profiled.get_counts()
+        profiled.count_urls()
+        first = profiled.list_urls(limit=50)
+        profiled.list_urls(limit=50, after=profiled.page_cursor(first[-1], "date_processed"))
+        profiled.list_urls(search="gallery/1", limit=50)
+        profiled.count_urls(search="gallery/1")
+        profiled.list_urls(tag_id=tag_id, limit=50)
+        profiled.count_urls(tag_id=tag_id)
+
+        snapshot = profiled.profile_snapshot()
+        assert {"claim_next_batch", "get_counts", "count_urls", "list_urls"} <= snapshot["methods"].keys()
+        assert snapshot["slow_statements"]
+        assert self._full_scans(snapshot) == []
+
+    def test_detects_full_scan(self, profiled: DatabaseManager):
+        """The check above should catch a query that does scan."""
+        with profiled._read() as conn:
+            conn.execute("SELECT COUNT(*) FROM urls WHERE last_error IS NULL;").fetchone()
+
+        assert self._full_scans(profiled.profile_snapshot()) == ["TestProfiling.test_detects_full_scan: SCAN urls"]
+
+    def test_calls_through_private_helpers_are_named_after_the_method(self, profiled: DatabaseManager):
+        """Transactions opened by private helpers or nested functions should count for the public method."""
+        profiled._url_filter = None  # So add_urls() rebuilds it in _prepare_url_filter()
+        profiled.add_urls(["https://example.com/new"])
+
+        assert profiled.profile_snapshot()["methods"]["add_urls"]["calls"] == 2
+
+    def test_disable_stops_tracing(self, profiled: DatabaseManager):
+        profiled.disable_profiling()
+        profiled.get_counts()
+
+        assert profiled.profile_snapshot() is None
+        assert profiled._connection().execute("SELECT 1;").fetchone() == (1,)
+
+    def test_disable_leaves_other_threads_connections_alone(self, profiled: DatabaseManager):
+        """Each thread should remove its own trace callback, at its next transaction."""
+        profiled.get_counts()
+        thread = threading.Thread(target=profiled.disable_profiling)
+        thread.start()
+        thread.join()
+
+        assert threading.get_ident() in profiled._traced
+        profiled.get_counts()
+        assert threading.get_ident() not in profiled._traced
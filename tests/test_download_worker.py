@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import sys
+import time
 from pathlib import Path
 from unittest.mock import MagicMock
 
@@ -9,9 +11,10 @@ import pytest
 
 from gallerydl_beyond.common.constants import UrlStatus
 from gallerydl_beyond.common.database_manager import UrlRow
+from gallerydl_beyond.common.status_writer import StatusWriter
 
 # Import the failure patterns directly for testing
-from gallerydl_beyond.threads.download_worker import _FAILURE_PATTERNS
+from gallerydl_beyond.threads.download_worker import _FAILURE_PATTERNS, DownloadWorker
 
 
 class TestFailurePatterns:
@@ -325,3 +328,66 @@ class TestPopenKwargs:
 
             assert kwargs.get("start_new_session") is True
             assert "creationflags" not in kwargs
+
+
+class TestAttemptRecording:
+    """Test that a worker run stores its timings with the final status."""
+
+    @staticmethod
+    def _worker(db_manager, tmp_path: Path, script: str, **kwargs) -> DownloadWorker:
+        db_manager.add_url("https://example.com/gallery")
+        (row,) = db_manager.claim_next_batch(1)
+        return DownloadWorker(
+            worker_id=1,
+            db_manager=db_manager,
+            row=row,
+            # Everything after the script ("-c <config> <url>") becomes its sys.argv.
+            gallerydl_cmd=[sys.executable, "-c", script],
+            config_path=tmp_path / "config.json",
+            claimed_at=time.time() - 1.0,
+            **kwargs,
+        )
+
+    def _run(self, db_manager, tmp_path: Path, script: str):
+        worker = self._worker(db_manager, tmp_path, script)
+        worker.run()
+        return worker.url_id
+
+    def test_failed_run(self, db_manager, tmp_path: Path):
+        url_id = self._run(db_manager, tmp_path, "print('HttpError: 404'); raise SystemExit(3)")
+
+        (attempt,) = db_manager.list_attempts(url_id)
+        assert attempt.status == UrlStatus.FAILED
+        assert attempt.exit_code == 3
+        assert attempt.failure_lines == 1
+        assert attempt.claimed_at < attempt.started_at <= attempt.first_output_at <= attempt.finished_at
+
+    def test_silent_success(self, db_manager, tmp_path: Path):
+        url_id = self._run(db_manager, tmp_path, "pass")
+
+        (attempt,) = db_manager.list_attempts(url_id)
+        assert attempt.status == UrlStatus.COMPLETED
+        assert attempt.exit_code == 0
+        assert attempt.first_output_at is None
+
+    @pytest.mark.parametrize(
+        ("script", "status"), [("pass", UrlStatus.COMPLETED), ("raise SystemExit(1)", UrlStatus.FAILED)]
+    )
+    def test_terminal_signal_follows_commit(self, db_manager, tmp_path: Path, script: str, status: int):
+        """With a StatusWriter, listeners of the final signal should already read the new status and counts."""
+        writer = StatusWriter(db_manager, flush_delay=0.2)
+        worker = self._worker(db_manager, tmp_path, script, status_writer=writer)
+        seen = []
+
+        def on_done(_worker_id: int, url_id: int, *_error) -> None:
+            # (status, active count) as the download manager and History would read them.
+            seen.append((db_manager.get_by_id(url_id).status, db_manager.get_counts()[2]))
+
+        worker.url_completed.connect(on_done)
+        worker.url_failed.connect(on_done)
+        try:
+            worker.run()
+        finally:
+            writer.close()
+
+        assert seen == [(status, 0)]
@@ -0,0 +1,119 @@
+"""Tests for MaintenanceScheduler."""
+
+from __future__ import annotations
+
+import pytest
+
+from gallerydl_beyond.common.database_manager import DatabaseManager
+from gallerydl_beyond.common.maintenance_scheduler import MaintenanceScheduler
+
+
+@pytest.fixture
+def idle():
+    """Mutable idle flag read by the scheduler."""
+    return {"idle": True}
+
+
+@pytest.fixture
+def scheduler(db_manager: DatabaseManager, idle: dict):
+    """A scheduler whose thread never ticks during a test; tests call run_pending()."""
+    maintenance = MaintenanceScheduler(db_manager, is_idle=lambda: idle["idle"], tick_interval=3600.0)
+    yield maintenance
+    maintenance.close()
+
+
+class TestMaintenanceScheduler:
+    """Test idle-time scheduling of maintenance steps."""
+
+    def test_runs_nothing_while_busy(self, db_manager: DatabaseManager, scheduler: MaintenanceScheduler, idle):
+        """No step should run while downloads are active."""
+        idle["idle"] = False
+
+        assert scheduler.run_pending() is None
+        assert db_manager.maintenance_log() == {}
+
+    def test_runs_one_due_task_per_call(self, db_manager: DatabaseManager, scheduler: MaintenanceScheduler):
+        """Due tasks should run one per tick, then nothing until their interval passes."""
+        ran = [scheduler.run_pending() for _ in range(6)]
+
+        assert ran == ["checkpoint", "optimize", "verify_counts", "prune_attempts", "reclaim_leases", None]
+        assert set(db_manager.maintenance_log()) == {
+            "checkpoint",
+            "optimize",
+            "verify_counts",
+            "prune_attempts",
+            "reclaim_leases",
+        }
+
+    def test_reclaims_free_pages_in_slices(self, db_manager: DatabaseManager, scheduler: MaintenanceScheduler):
+        """Free pages should be returned one slice per tick once periodic tasks are done."""
+        db_manager.add_urls([f"https://example.com/{i}/" + "x" * 500 for i in range(2000)])
+        db_manager.clear_all()
+        for _ in range(3):
+            scheduler.run_pending()
+        free_before = db_manager.page_usage()["free_pages"]
+
+        assert scheduler.run_pending() == "incremental_vacuum"
+        assert db_manager.page_usage()["free_pages"] == max(0, free_before - scheduler.VACUUM_SLICE_PAGES)
+
+    def test_intervals_carry_over_sessions(self, db_manager: DatabaseManager, scheduler: MaintenanceScheduler):
+        """A new scheduler should read last runs from the log instead of repeating them."""
+        for _ in range(5):
+            scheduler.run_pending()
+
+        fresh = MaintenanceScheduler(db_manager, is_idle=lambda: True, tick_interval=3600.0)
+        try:
+            assert fresh.run_pending() is None
+        finally:
+            fresh.close()
+
+    def test_failed_task_waits_for_next_interval(self, db_manager: DatabaseManager, scheduler, monkeypatch):
+        """A failing step should not be retried on every tick."""
+
+        def broken() -> bool:
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(db_manager, "checkpoint_wal", broken)
+        with pytest.raises(RuntimeError):
+            scheduler.run_pending()
+
+        assert scheduler.run_pending() == "optimize"
+
+    def test_prunes_attempts_with_configured_limits(self, db_manager: DatabaseManager, monkeypatch):
+        """Attempt pruning should pass the scheduler's retention settings through."""
+        calls: list[dict] = []
+        monkeypatch.setattr(db_manager, "prune_attempts", lambda **limits: calls.append(limits) or 0)
+        maintenance = MaintenanceScheduler(
+            db_manager, is_idle=lambda: True, tick_interval=3600.0, attempt_retention_days=7, attempts_per_url=3
+        )
+        try:
+            ran = [maintenance.run_pending() for _ in range(4)]
+        finally:
+            maintenance.close()
+
+        assert ran[-1] == "prune_attempts"
+        assert calls == [{"max_age_days": 7, "max_per_url": 3}]
+
+    def test_archives_in_batches(self, db_manager: DatabaseManager, monkeypatch):
+        """Old finished URLs should be archived one batch per tick, then periodic tasks resume."""
+        db_manager.add_urls([f"https://example.com/{i}" for i in range(3)], completed=True)
+        with db_manager._write() as conn:
+            conn.execute("UPDATE urls SET date_processed = date_processed - ?;", (60 * 86400,))
+        monkeypatch.setattr(db_manager, "ARCHIVE_BATCH_SIZE", 2)
+        maintenance = MaintenanceScheduler(db_manager, is_idle=lambda: True, tick_interval=3600.0)
+        try:
+            ran = [maintenance.run_pending() for _ in range(4)]
+        finally:
+            maintenance.close()
+
+        assert ran == ["checkpoint", "archive", "archive", "optimize"]
+
+    def test_archiving_can_be_disabled(self, db_manager: DatabaseManager, monkeypatch):
+        monkeypatch.setattr(db_manager, "archive_completed", lambda **_: pytest.fail("archive ran"))
+        maintenance = MaintenanceScheduler(
+            db_manager, is_idle=lambda: True, tick_interval=3600.0, archive_after_days=0
+        )
+        try:
+            assert [maintenance.run_pending() for _ in range(2)] == ["checkpoint", "optimize"]
+        finally:
+            maintenance.close()
@@ -0,0 +1,103 @@
+"""Tests for QueryProfiler."""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import time
+
+import pytest
+
+from gallerydl_beyond.common.query_profiler import BUCKETS_MS, QueryProfiler
+
+
+@pytest.fixture
+def explained() -> list[str]:
+    """Statements the profiler asked to explain."""
+    return []
+
+
+@pytest.fixture
+def profiler(explained: list[str]) -> QueryProfiler:
+    return QueryProfiler(slow_statement_ms=5.0, explain=lambda sql: explained.append(sql) or ["SCAN t"])
+
+
+class TestQueryProfiler:
+    """Test call timing, histograms and the slow-statement log."""
+
+    def test_records_calls_per_method(self, profiler: QueryProfiler):
+        for _ in range(3):
+            with profiler.call("list_urls"):
+                profiler.statement("SELECT 1")
+        with profiler.call("count_urls"):
+            pass
+
+        methods = profiler.snapshot()["methods"]
+        assert methods["list_urls"]["calls"] == 3
+        assert methods["list_urls"]["statements"] == 3
+        assert sum(methods["list_urls"]["histogram"]) == 3
+        assert len(methods["list_urls"]["histogram"]) == len(BUCKETS_MS) + 1
+        assert methods["count_urls"]["statements"] == 0
+
+    def test_histogram_bucket(self, profiler: QueryProfiler):
+        """A call should land in the first bucket whose bound is not below its duration."""
+        with profiler.call("slow"):
+            time.sleep(0.02)
+
+        histogram = profiler.snapshot()["methods"]["slow"]["histogram"]
+        assert histogram.index(1) == BUCKETS_MS.index(50.0)
+
+    def test_lock_wait_counts_toward_current_call(self, profiler: QueryProfiler):
+        profiler.lock_waited(1.0)  # No call open: ignored
+        with profiler.call("claim_next_batch"):
+            profiler.lock_waited(0.25)
+
+        assert profiler.snapshot()["methods"]["claim_next_batch"]["lock_wait_ms"] == 250.0
+
+    def test_slow_statement_logged_with_plan(self, profiler: QueryProfiler, explained: list[str], caplog):
+        """Statements over the threshold should be explained and logged once the call ends; fast ones not."""
+        with (
+            caplog.at_level(logging.WARNING, logger="gallerydl_beyond.common.query_profiler"),
+            profiler.call("list_urls"),
+        ):
+            profiler.statement("SELECT * FROM t")
+            time.sleep(0.01)
+            profiler.statement("SELECT * FROM t")  # Trigger step: same text, same statement
+            profiler.statement("SELECT 1")
+            assert explained == []
+
+        (slow,) = profiler.snapshot()["slow_statements"]
+        assert explained == ["SELECT * FROM t"]
+        assert (slow["method"], slow["sql"], slow["plan"]) == ("list_urls", "SELECT * FROM t", ["SCAN t"])
+        assert slow["duration_ms"] >= 10
+        assert "SCAN t" in caplog.text
+
+    def test_transaction_statements_not_explained(self, explained: list[str]):
+        profiler = QueryProfiler(slow_statement_ms=0, explain=lambda sql: explained.append(sql) or [])
+        with profiler.call("vacuum"):
+            profiler.statement("BEGIN IMMEDIATE;")
+            profiler.statement("COMMIT")
+
+        assert explained == []
+
+    def test_failed_explain_is_reported(self):
+        def broken(sql: str) -> list[str]:
+            raise sqlite3.OperationalError("no such table")
+
+        profiler = QueryProfiler(slow_statement_ms=0, explain=broken)
+        with profiler.call("bulk_add_tag"):
+            profiler.statement("SELECT id FROM temp.selected_ids")
+
+        assert profiler.snapshot()["slow_statements"][0]["plan"] == ["(no plan: no such table)"]
+
+    def test_statements_outside_calls_ignored(self, profiler: QueryProfiler):
+        profiler.statement("SELECT 1")
+
+        assert profiler.snapshot()["methods"] == {}
+
+    def test_snapshot_reset(self, profiler: QueryProfiler):
+        with profiler.call("get_counts"):
+            pass
+
+        assert profiler.snapshot(reset=True)["methods"]
+        assert profiler.snapshot()["methods"] == {}
@@ -0,0 +1,174 @@
+"""Tests for StatusWriter."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from gallerydl_beyond.common.constants import UrlStatus
+from gallerydl_beyond.common.database_manager import DatabaseManager
+from gallerydl_beyond.common.status_writer import StatusWriter
+
+
+@pytest.fixture
+def writer(db_manager: DatabaseManager):
+    """A StatusWriter with a deadline long enough that tests control when it flushes."""
+    status_writer = StatusWriter(db_manager, flush_delay=60.0)
+    yield status_writer
+    status_writer.close()
+
+
+class TestStatusWriter:
+    """Test write-behind status transitions."""
+
+    def test_transitions_are_deferred_until_flush(self, db_manager: DatabaseManager, writer: StatusWriter):
+        """Queued transitions should not be visible before they are committed."""
+        url_id = db_manager.add_url("https://example.com/1")
+        db_manager.claim_next_batch(1)
+
+        writer.mark_completed(url_id)
+
+        assert writer.pending_count == 1
+        assert db_manager.get_by_url("https://example.com/1").status == UrlStatus.IN_PROGRESS
+        assert writer.flush(timeout=5)
+        row = db_manager.get_by_url("https://example.com/1")
+        assert row.status == UrlStatus.COMPLETED
+        assert row.download_count == 1
+        assert row.date_processed is not None
+
+    def test_wait_committed_keeps_the_deadline(self, db_manager: DatabaseManager, writer: StatusWriter):
+        """wait_committed() should wait for the scheduled commit rather than force one."""
+        url_id = db_manager.add_url("https://example.com/1")
+        writer.mark_completed(url_id)
+
+        assert not writer.wait_committed(timeout=0.05)
+        assert writer.pending_count == 1
+        assert writer.flush(timeout=5)
+        assert writer.wait_committed(timeout=0)
+
+    def test_burst_is_one_commit(self, db_manager: DatabaseManager, writer: StatusWriter):
+        """Transitions queued together should share one transaction."""
+        ids = [db_manager.add_url(f"https://example.com/{i}") for i in range(8)]
+
+        with patch.object(db_manager, "apply_status_transitions", wraps=db_manager.apply_status_transitions) as apply:
+            for url_id in ids:
+                writer.mark_stopped(url_id)
+            assert writer.flush(timeout=5)
+
+        assert apply.call_count == 1
+        assert db_manager.get_counts()[1] == 8
+
+    def test_same_url_keeps_order(self, db_manager: DatabaseManager, writer: StatusWriter):
+        """The last transition queued for a URL should win."""
+        url_id = db_manager.add_url("https://example.com/1")
+
+        writer.mark_failed(url_id, "first")
+        writer.mark_pending(url_id)
+        writer.mark_completed_partial(url_id, 2, "some files failed")
+        writer.flush(timeout=5)
+
+        row = db_manager.get_by_url("https://example.com/1")
+        assert row.status == UrlStatus.COMPLETED_PARTIAL
+        assert row.skipped_count == 2
+        assert row.last_error == "some files failed"
+
+    def test_deadline_commits_without_flush(self, db_manager: DatabaseManager):
+        """With a short delay the writer should commit on its own."""
+        url_id = db_manager.add_url("https://example.com/1")
+        status_writer = StatusWriter(db_manager, flush_delay=0.01)
+        try:
+            status_writer.mark_skipped(url_id)
+            for _ in range(500):
+                if status_writer.pending_count == 0:
+                    break
+                status_writer._thread.join(0.01)
+            assert db_manager.get_by_url("https://example.com/1").status == UrlStatus.SKIPPED
+        finally:
+            status_writer.close()
+
+    def test_close_commits_and_then_writes_synchronously(self, db_manager: DatabaseManager, writer: StatusWriter):
+        """close() should commit the queue; later transitions go straight to the database."""
+        url1 = db_manager.add_url("https://example.com/1")
+        url2 = db_manager.add_url("https://example.com/2")
+        writer.mark_failed(url1, "boom")
+
+        assert writer.close(timeout=5)
+        writer.mark_stopped(url2)
+
+        assert db_manager.get_by_url("https://example.com/1").last_error == "boom"
+        assert db_manager.get_by_url("https://example.com/2").status == UrlStatus.STOPPED
+        assert writer.pending_count == 0
+
+    def test_failed_commit_is_retried_in_order(self, db_manager: DatabaseManager, writer: StatusWriter):
+        """A failing commit should keep its batch and retry it."""
+        url_id = db_manager.add_url("https://example.com/1")
+        real_apply = db_manager.apply_status_transitions
+        calls = []
+
+        def flaky(transitions):
+            calls.append(list(transitions))
+            if len(calls) == 1:
+                raise RuntimeError("database is locked")
+            return real_apply(transitions)
+
+        writer.RETRY_DELAY = 0.01
+        with patch.object(db_manager, "apply_status_transitions", side_effect=flaky):
+            writer.mark_failed(url_id, "first")
+            writer.mark_pending(url_id)
+            assert writer.flush(timeout=5)
+
+        assert calls[0] == calls[1]
+        assert db_manager.get_by_url("https://example.com/1").status == UrlStatus.PENDING
+
+    def test_write_after_timed_out_close_stays_behind_queued_batch(
+        self, db_manager: DatabaseManager, writer: StatusWriter
+    ):
+        """A synchronous write after close() should not overtake a transition close() left queued."""
+        url_id = db_manager.add_url("https://example.com/1")
+        real_apply = db_manager.apply_status_transitions
+        locked = threading.Event()
+        locked.set()
+
+        def flaky(transitions):
+            if locked.is_set():
+                raise sqlite3.OperationalError("database is locked")
+            return real_apply(transitions)
+
+        writer.RETRY_DELAY = 0.05
+        with patch.object(db_manager, "apply_status_transitions", side_effect=flaky):
+            writer.mark_failed(url_id, "old")
+            assert not writer.close(timeout=0.01)
+            locked.clear()
+            writer.mark_completed(url_id)
+            writer._thread.join(5)
+
+        assert db_manager.get_by_url("https://example.com/1").status == UrlStatus.COMPLETED
+        assert writer.pending_count == 0
+
+    def test_permanently_failing_transition_is_dropped(
+        self, db_manager: DatabaseManager, writer: StatusWriter, caplog
+    ):
+        """After MAX_ATTEMPTS the batch should be applied one by one, dropping only what still fails."""
+        bad = db_manager.add_url("https://example.com/bad")
+        good = db_manager.add_url("https://example.com/good")
+        real_apply = db_manager.apply_status_transitions
+
+        def reject_bad(transitions):
+            if any(t.url_id == bad for t in transitions):
+                raise sqlite3.IntegrityError("constraint failed")
+            return real_apply(transitions)
+
+        writer.RETRY_DELAY = 0.01
+        with patch.object(db_manager, "apply_status_transitions", side_effect=reject_bad):
+            writer.mark_failed(bad, "boom")
+            writer.mark_completed(good)
+            assert writer.flush(timeout=5)
+            writer.mark_stopped(good)
+            assert writer.flush(timeout=5)
+
+        assert db_manager.get_by_id(bad).status == UrlStatus.PENDING
+        assert db_manager.get_by_id(good).status == UrlStatus.STOPPED
+        assert f"Dropped status transition of URL {bad}" in caplog.text
@@ -0,0 +1,85 @@
+"""Tests for URL normalization."""
+
+from __future__ import annotations
+
+import pytest
+
+from gallerydl_beyond.common.url_normalizer import normalize_url, url_key
+
+
+class TestNormalizeUrl:
+    """Test canonical URL forms."""
+
+    @pytest.mark.parametrize(
+        "variant",
+        [
+            "http://twitter.com/user/status/1",
+            "https://www.twitter.com/user/status/1",
+            "https://x.com/user/status/1",
+            "https://X.COM/user/status/1/",
+            "https://x.com/user/status/1?s=20&t=abcdef",
+            "https://x.com:443/user/status/1#reply",
+            "  https://mobile.twitter.com/user/status/1  ",
+        ],
+    )
+    def test_variants_share_canonical_form(self, variant: str):
+        """Cosmetic differences should normalize away."""
+        assert normalize_url(variant) == "https://twitter.com/user/status/1"
+
+    def test_tracking_params_removed(self):
+        """utm_* and click ids should be dropped, other params kept and sorted."""
+        url = "https://example.com/gallery?utm_source=feed&page=2&fbclid=xyz&b=1"
+
+        assert normalize_url(url) == "https://example.com/gallery?b=1&page=2"
+
+    def test_host_specific_params_kept_elsewhere(self):
+        """`s` is tracking on twitter but selects the page type on booru sites."""
+        url = "https://gelbooru.com/index.php?page=post&s=view&id=5"
+
+        assert normalize_url(url) == "https://gelbooru.com/index.php?id=5&page=post&s=view"
+
+    @pytest.mark.parametrize(
+        ("url", "expected"),
+        [
+            ("https://youtu.be/abc?si=share", "https://youtu.be/abc"),
+            ("https://www.instagram.com/p/abc/?igsh=share", "https://instagram.com/p/abc"),
+            ("https://x.com/a/status/1?ref_src=twsrc", "https://twitter.com/a/status/1"),
+        ],
+    )
+    def test_share_params_removed_on_their_sites(self, url: str, expected: str):
+        assert normalize_url(url) == expected
+
+    def test_share_params_kept_on_other_hosts(self):
+        """Short share parameter names may select content elsewhere."""
+        url = "https://example.com/view?si=2&share_id=9&ref_src=feed"
+
+        assert normalize_url(url) == "https://example.com/view?ref_src=feed&share_id=9&si=2"
+        assert url_key(url) != url_key("https://example.com/view")
+
+    def test_path_case_and_route_fragments_kept(self):
+        """Paths are case-sensitive and hash routes identify content."""
+        assert normalize_url("https://example.com/Gallery/AbC") == "https://example.com/Gallery/AbC"
+        assert normalize_url("https://example.com/#/album/1") != normalize_url("https://example.com/#/album/2")
+
+    def test_non_http_left_alone(self):
+        """Strings that are not http(s) URLs should only be stripped."""
+        assert normalize_url("  ftp://Example.com/x/ ") == "ftp://Example.com/x/"
+        assert normalize_url("not a url") == "not a url"
+
+    def test_non_default_port_kept(self):
+        """A non-default port is part of the address."""
+        assert normalize_url("http://Example.com:8080/x") == "https://example.com:8080/x"
+
+
+class TestUrlKey:
+    """Test the hashed dedup key."""
+
+    def test_key_matches_for_equivalent_urls(self):
+        """Equivalent URLs should hash to the same key."""
+        assert url_key("https://x.com/a/status/1") == url_key("http://www.twitter.com/a/status/1/")
+        assert url_key("https://x.com/a/status/1") != url_key("https://x.com/a/status/2")
+
+    def test_key_fits_sqlite_integer(self):
+        """Keys should be signed 64-bit integers."""
+        for url in ("https://example.com/1", "https://example.com/2", "https://example.com/3"):
+            assert -(2**63) <= url_key(url) < 2**63